@@ -0,0 +1,184 @@
+import gc
+import json
+import os
+import time
+from statistics import median, quantiles
+from urllib.parse import urlencode
+
+from rest_framework.test import APITestCase
+
+from django.core.cache import cache
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog_api.users.models import User, PasswordResetCode
+from blog_api.users.tokens import RefreshToken
+from blog_api.posts.models import Tag, Post
+from blog_api.benchmarks.seed import PASSWORD, CONTENT, seed
+
+
+SCALE = float(os.environ.get('BENCHMARK_SCALE', 1))
+ROUNDS = int(os.environ.get('BENCHMARK_ROUNDS', 20))
+LATENCY_FACTOR = float(os.environ.get('BENCHMARK_LATENCY_FACTOR', 1))
+
+TITLE = 'A benchmark title that is long enough to pass the eight word validator'
+
+# url name, method, authenticated, request data, expected status, query budget, p95 latency budget (ms).
+# Query budgets are the most queries measured at BENCHMARK_SCALE=1 and 0.01, latency budgets roughly 3x the measured
+# p95. Lower them with the change that earns it, raising one should be a conscious decision in review.
+ENDPOINTS = [
+    ('post-create', 'post', True, lambda t: {
+        'title': TITLE, 'content': CONTENT, 'post_tags': 'benchtag1, benchtag2, benchnewtag'
+    }, 201, 18, 600),
+    ('post-detail', 'get', False, lambda t: {'post_slug': t.post.slug}, 200, 4, 500),
+    ('post-detail', 'get', False, lambda t: {'post_slug': t.post.slug}, 304, 2, 50),
+    ('post-update', 'put', True, lambda t: {
+        'slug': t.own_post.slug, 'title': TITLE, 'content': CONTENT, 'post_tags': 'benchtag3, benchtag4'
+    }, 200, 17, 400),
+    ('post-delete', 'post', True, lambda t: {'post_to_delete': t.own_post.slug}, 204, 9, 100),
+    ('post-bookmarks', 'get', True, lambda t: {'post_slug': t.post.slug}, 200, 6, 250),
+    ('post-bookmark', 'post', True, lambda t: {'post_to_bookmark': t.post.slug}, 201, 12, 150),
+    ('post-likes', 'get', False, lambda t: {'post_slug': t.post.slug}, 200, 5, 300),
+    ('post-dislikes', 'get', False, lambda t: {'post_slug': t.post.slug}, 200, 5, 150),
+    ('post-like', 'post', True, lambda t: {'post_slug': t.post.slug, 'like': 'like'}, 201, 13, 100),
+    ('tags', 'get', False, None, 200, 4, 150),
+    ('tags-by-post-count', 'get', False, None, 200, 4, 150),
+    ('tag-posts', 'get', False, lambda t: {'tag_pub_id': t.tag.pub_id}, 200, 5, 150),
+    ('post-next-previous', 'get', True, None, 200, 5, 100),
+    ('post-search', 'get', False, lambda t: {'search_term': 'databases caching'}, 200, 5, 4000),
+    ('posts-featured', 'get', False, None, 200, 6, 150),
+    ('posts-most-liked', 'get', False, None, 200, 6, 150),
+    ('posts-most-disliked', 'get', False, None, 200, 6, 400),
+    ('posts-oldest', 'get', False, None, 200, 5, 100),
+    ('posts-most-bookmarked', 'get', False, None, 200, 6, 100),
+    ('posts', 'get', False, None, 200, 5, 100),
+    ('posts', 'get', False, None, 304, 3, 50),
+    ('posts-export', 'get', True, lambda t: {'kind': 'users', 'gzip': 'true'}, 200, 4, 1000),
+    ('posts-fallback', 'get', False, None, 403, 2, 50),
+    ('user-register', 'post', False, lambda t: {
+        'name': 'Bench', 'username': 'benchnewuser', 'email': 'benchnewuser@example.com',
+        'password': PASSWORD, 'password2': PASSWORD
+    }, 201, 11, 100),
+    ('user-verify-resend', 'post', False, lambda t: {
+        'email': t.unverified_user.email, 'password': PASSWORD
+    }, 200, 4, 50),
+    ('user-verify', 'post', False, lambda t: {
+        'verification_code': t.unverified_user.verification_codes.latest('created_at').verification_code
+    }, 200, 6, 50),
+    ('user-login-refresh', 'post', False, lambda t: {'refresh': t.refresh}, 200, 8, 50),
+    ('user-login', 'post', False, lambda t: {'email': t.user.email, 'password': PASSWORD}, 200, 5, 50),
+    ('user-logout', 'post', True, lambda t: {'refresh': t.refresh}, 204, 9, 50),
+    ('user-update', 'put', True, lambda t: {'username': 'benchrenamed'}, 200, 7, 100),
+    ('user-delete', 'post', True, lambda t: {'delete_confirmed': True, 'refresh': t.refresh}, 204, 10, 100),
+    ('user-password-reset-send', 'post', False, lambda t: {'email': t.user.email}, 200, 6, 50),
+    ('user-password-reset', 'post', False, lambda t: {
+        'password_reset_code': t.password_reset_code.password_reset_code,
+        'password': 'Testing54321@', 'password2': 'Testing54321@'
+    }, 200, 8, 100),
+    ('user-follower-posts', 'get', True, None, 200, 5, 150),
+    ('user-following-posts', 'get', True, None, 200, 5, 150),
+    ('user-followers', 'get', True, None, 200, 5, 400),
+    ('user-following', 'get', True, None, 200, 5, 600),
+    ('user-follow', 'post', True, lambda t: {'follow_pub_id': t.other_user.pub_id}, 201, 13, 50),
+    ('user-bookmarks', 'get', True, None, 200, 6, 75),
+    ('user-posts', 'get', True, None, 200, 5, 100),
+    ('user-likes', 'get', True, None, 200, 6, 400),
+    ('user-dislikes', 'get', True, None, 200, 6, 100),
+    ('user', 'get', True, lambda t: {'user_pub_id': t.other_user.pub_id}, 200, 4, 50),
+    ('user-fallback', 'get', False, None, 403, 2, 50),
+    # last, the rolled back rows of its bulk inserts slow down the next scans of posts
+    ('post-import', 'post', True, lambda t: '\n'.join(
+        json.dumps({'title': TITLE, 'content': CONTENT, 'post_tags': f'benchtag{i % 5}, benchimport{i}'}) for i in range(100)
+    ), 201, 12, 1500),
+]
+
+
+class EndpointBenchmarks(APITestCase):
+    '''
+    --Endpoint benchmarks--
+    Seeds realistic volumes (10k users, 100k posts, 2M reactions, 1M follows at BENCHMARK_SCALE=1) once, then calls
+    every url in blog_api/posts/urls.py and blog_api/users/urls.py BENCHMARK_ROUNDS times. Each round runs in a
+    rolled back savepoint so writes don't pile up, the cache is cleared before each endpoint so the first round
+    is cold. Fails when an endpoint goes over its query budget (the most queries of any round) or its p95 latency
+    budget (scaled by BENCHMARK_LATENCY_FACTOR for slower machines). Run against a local Postgres with:
+        python manage.py test blog_api.benchmarks.bench_endpoints
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.volumes = seed(SCALE)
+        cls.user = User.objects.get(username='benchuser0')
+        User.objects.filter(pk=cls.user.pk).update(is_staff=True)  # for the export
+        cls.other_user = User.objects.get(username='benchuser1')
+        cls.post = Post.objects.filter(is_active=True).exclude(author=cls.user).order_by('-score').first()
+        cls.post.bookmarks.remove(cls.user)
+        cls.user.reactions.filter(post=cls.post).delete()
+        cls.user.following.filter(following=cls.other_user).delete()
+        cls.own_post = Post.objects.filter(author=cls.user, is_active=True).first()
+        cls.tag = Tag.objects.get(name='benchtag1')
+        cls.unverified_user = User.objects.create_user(
+            username='benchunverified', email='benchunverified@example.com', password=PASSWORD
+        )
+        cls.password_reset_code = PasswordResetCode.objects.create(user=cls.user)
+        cls.refresh = str(RefreshToken.for_user(cls.user))
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        print(f'\n{"endpoint":<28}{"p50 ms":>10}{"p95 ms":>10}{"queries":>10}{"budget":>10}')
+        for name, p50, p95, queries, budget in cls.results:
+            print(f'{name:<28}{p50:>10.1f}{p95:>10.1f}{queries:>10}{budget:>10}')
+        super().tearDownClass()
+
+    def call(self, name, method, data, **headers):
+        if isinstance(data, str):  # JSON Lines
+            return self.client.generic(method.upper(), reverse(name), data, content_type='application/x-ndjson')
+        if method == 'get':  # views read request.data, the export reads query parameters
+            return self.client.generic(
+                'GET', reverse(name) + ('?' + urlencode(data) if data else ''), json.dumps(data) if data else '',
+                content_type='application/json', **headers
+            )
+        return getattr(self.client, method)(reverse(name), data, format='json')
+
+    def benchmark(self, name, method, authenticated, data, status):
+        if authenticated:  # a fresh token per endpoint, a full run outlives ACCESS_TOKEN_LIFETIME
+            self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.user).access_token))
+        else:
+            self.client.credentials()
+        cache.clear()
+        gc.collect()  # a full collection of the seeded objects would otherwise land in whichever endpoint runs then
+        timings = []
+        query_counts = []
+        for round in range(ROUNDS):
+            with transaction.atomic():
+                request_data = data(self) if data else None
+                headers = {}
+                if status == 304:  # a conditional GET with the ETag of the full response
+                    headers['HTTP_IF_NONE_MATCH'] = self.call(name, method, request_data)['ETag']
+                reset_queries()  # connection.queries is capped at 9000, a saturated log captures nothing
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = self.call(name, method, request_data, **headers)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    timings.append((time.perf_counter() - start) * 1000)
+                query_counts.append(len(queries))
+                self.assertEqual(response.status_code, status, getattr(response, 'data', None))
+                transaction.set_rollback(True)
+        p95 = quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        return median(timings), p95, max(query_counts)
+
+    def test_endpoint_budgets(self):
+        '''
+        Ensure every endpoint stays within its query and latency budgets on a realistically sized database.
+        '''
+        print(f'Benchmarking endpoints with {self.volumes}')
+        for url_name, method, authenticated, data, status, query_budget, latency_budget in ENDPOINTS:
+            name = f'{url_name} (304)' if status == 304 else url_name
+            with self.subTest(endpoint=name):
+                p50, p95, queries = self.benchmark(url_name, method, authenticated, data, status)
+                self.results.append((name, p50, p95, queries, query_budget))
+                self.assertLessEqual(queries, query_budget, f'{name} ran {queries} queries.')
+                self.assertLessEqual(p95, latency_budget * LATENCY_FACTOR, f'{name} p95 was {p95:.1f}ms.')
+        print('Done.....')
@@ -0,0 +1,61 @@
+import os
+import time
+from statistics import median
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from blog_api.posts.models import Post
+from blog_api.posts.api.serializers import PostOverviewSerializer
+from blog_api.utils.renderers import FastJSONRenderer
+from blog_api.benchmarks.seed import seed
+
+
+SCALE = float(os.environ.get('BENCHMARK_SCALE', 0.01))
+ROUNDS = int(os.environ.get('BENCHMARK_ROUNDS', 20))
+ROWS = 1000
+
+# the least FastJSONRenderer must beat JSONRenderer by on the median round
+MIN_SPEEDUP = 3
+
+
+class RendererBenchmarks(APITestCase):
+    '''
+    --Renderer benchmarks--
+    Renders ROWS posts serialized with PostOverviewSerializer, the shape of every post list endpoint, with
+    JSONRenderer and FastJSONRenderer BENCHMARK_ROUNDS times each. Only the rendering is timed, the serialized
+    data is built once. Fails when the output differs by a byte or FastJSONRenderer is less than MIN_SPEEDUP
+    times faster. Run with:
+        python manage.py test blog_api.benchmarks.bench_renderers
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(SCALE)
+        posts = Post.objects.prefetch_related('tags').select_related('author').order_by('-created_at', '-id')[:ROWS]
+        cls.data = PostOverviewSerializer(posts, many=True).data
+
+    def render(self, renderer):
+        timings = []
+        for round in range(ROUNDS):
+            start = time.perf_counter()
+            content = renderer.render(self.data, 'application/json', {})
+            timings.append((time.perf_counter() - start) * 1000)
+        return content, median(timings)
+
+    def test_fast_json_renderer(self):
+        '''
+        Ensure FastJSONRenderer renders post overviews byte for byte like JSONRenderer, MIN_SPEEDUP times faster.
+        '''
+        print(f'Benchmarking renderers with {len(self.data)} post overviews')
+        content, json_ms = self.render(JSONRenderer())
+        fast_content, fast_ms = self.render(FastJSONRenderer())
+
+        print(f'\n{"renderer":<20}{"p50 ms":>10}{"KB":>10}')
+        print(f'{"JSONRenderer":<20}{json_ms:>10.2f}{len(content) / 1024:>10.0f}')
+        print(f'{"FastJSONRenderer":<20}{fast_ms:>10.2f}{len(fast_content) / 1024:>10.0f}')
+        print(f'speedup {json_ms / fast_ms:.1f}x')
+
+        self.assertEqual(fast_content, content)
+        self.assertGreaterEqual(json_ms / fast_ms, MIN_SPEEDUP)
+        print('Done.....')
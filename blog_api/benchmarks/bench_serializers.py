@@ -0,0 +1,74 @@
+import os
+import time
+from statistics import median
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from blog_api.posts.models import Post
+from blog_api.posts.api.serializers import PostOverviewSerializer, PostDetailSerializer, PostOverviewReadSerializer, \
+                                                                                                PostDetailReadSerializer
+from blog_api.benchmarks.seed import seed
+
+
+SCALE = float(os.environ.get('BENCHMARK_SCALE', 0.01))
+ROUNDS = int(os.environ.get('BENCHMARK_ROUNDS', 20))
+ROWS = 1000
+
+# the least the read serializers must beat the model serializers by on the median round
+MIN_SPEEDUP = 3
+
+# name, model serializer, read serializer
+SERIALIZERS = [
+    ('overview', PostOverviewSerializer, PostOverviewReadSerializer),
+    ('detail', PostDetailSerializer, PostDetailReadSerializer),
+]
+
+
+class SerializerBenchmarks(APITestCase):
+    '''
+    --Serializer benchmarks--
+    Fetches and serializes ROWS posts BENCHMARK_ROUNDS times with the model serializers, from instances with
+    select_related/prefetch_related like the views did, and with the read serializers, from .values() rows.
+    Fails when the rendered JSON differs by a byte or a read serializer is less than MIN_SPEEDUP times faster.
+    Run with:
+        python manage.py test blog_api.benchmarks.bench_serializers
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(SCALE)
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        print(f'\n{"serializer":<12}{"model ms":>12}{"read ms":>12}{"speedup":>10}')
+        for name, model_ms, read_ms in cls.results:
+            print(f'{name:<12}{model_ms:>12.1f}{read_ms:>12.1f}{model_ms / read_ms:>9.1f}x')
+        super().tearDownClass()
+
+    def serialize(self, serialize):
+        timings = []
+        for round in range(ROUNDS):
+            start = time.perf_counter()
+            data = serialize()
+            timings.append((time.perf_counter() - start) * 1000)
+        return JSONRenderer().render(data), median(timings)
+
+    def test_read_serializers(self):
+        '''
+        Ensure the read serializers render ROWS posts like the model serializers, MIN_SPEEDUP times faster.
+        '''
+        print(f'Benchmarking serializers with {ROWS} posts')
+        posts = Post.objects.filter(is_active=True).order_by('-created_at', '-id')
+        instances = posts.select_related('author', 'previouspost', 'nextpost').prefetch_related('tags')
+        for name, model_serializer, read_serializer in SERIALIZERS:
+            with self.subTest(serializer=name):
+                content, model_ms = self.serialize(lambda: model_serializer(instances[:ROWS], many=True).data)
+                read_content, read_ms = self.serialize(
+                    lambda: read_serializer(read_serializer.get_queryset(posts)[:ROWS], many=True).data
+                )
+                self.results.append((name, model_ms, read_ms))
+                self.assertEqual(read_content, content)
+                self.assertGreaterEqual(model_ms / read_ms, MIN_SPEEDUP)
+        print('Done.....')
@@ -0,0 +1,159 @@
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+
+
+PASSWORD = 'Testing4321@'
+
+# rows seeded at BENCHMARK_SCALE=1
+VOLUMES = {
+    'users': 10000,
+    'posts': 100000,
+    'tags': 200,
+    'reactions': 2000000,
+    'follows': 1000000,
+    'bookmarks': 500000,
+}
+
+CONTENT = (
+    'Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed facilisis nunc id orci hendrerit, id tempor '
+    'lorem tincidunt. Praesent id fermentum orci. Proin malesuada est sed nisl aliquam, ac congue nibh sagittis. '
+    'Vestibulum sed ipsum vulputate, sodales neque auctor, mollis odio. Nullam sit amet mattis ante. Aenean mi '
+    'sapien, aliquet eget sapien ac, finibus accumsan erat. Donec pretium risus faucibus ultrices egestas.'
+)
+
+
+def get_volumes(scale):
+    volumes = {name: max(int(rows * scale), 1) for name, rows in VOLUMES.items()}
+    volumes['users'] = max(volumes['users'], 200)
+    volumes['posts'] = max(volumes['posts'], 200)
+    volumes['tags'] = max(volumes['tags'], 10)
+    # every user reacts to / follows / bookmarks the same number of distinct rows
+    volumes['follows'] = min(volumes['follows'], volumes['users'] * (volumes['users'] - 2))
+    return volumes
+
+
+def _first_id(cursor, table, column, prefix, expected):
+    cursor.execute(f'SELECT min(id), max(id), count(*) FROM {table} WHERE {column} LIKE %s', [prefix + '%'])
+    first, last, count = cursor.fetchone()
+    if count != expected or last - first + 1 != count:
+        raise RuntimeError(f'Seeded {table} ids are not contiguous.')
+    return first
+
+
+def seed(scale=1.0):
+    '''
+    --Seed benchmark data--
+    Inserts users, posts, tags, reactions, follows and bookmarks with INSERT ... SELECT generate_series so millions
+    of rows take seconds. Every user reacts to, follows and bookmarks the same number of distinct rows, picked with
+    prime strides so no unique constraint is hit. Post, tag and user counters are then set from the rows and the tables analyzed.
+    Seeded rows are named benchuser<n>, bench-post-<n> and benchtag<n>.
+    '''
+    volumes = get_volumes(scale)
+    users, posts, tags = volumes['users'], volumes['posts'], volumes['tags']
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''
+            INSERT INTO users_user (password, is_superuser, is_staff, date_joined, created_at, updated_at, pub_id,
+                                    username, name, email, is_active, followers_count, following_count)
+            SELECT %s, false, false, now(), now() - g * interval '1 minute', now(), 'benchuser' || g,
+                   'benchuser' || g, 'Bench User', 'benchuser' || g || '@example.com', true, 0, 0
+            FROM generate_series(0, %s - 1) g
+            ''', [make_password(PASSWORD), users]
+        )
+        first_user = _first_id(cursor, 'users_user', 'username', 'benchuser', users)
+
+        cursor.execute(
+            '''
+            INSERT INTO posts_post (created_at, updated_at, slug, title, author_id, featured, estimated_reading_time,
+                                    content, is_active, score, likes_count, dislikes_count, bookmarks_count)
+            SELECT now() - g * interval '1 minute', now(), 'bench-post-' || g,
+                   'Benchmark post ' || g || ' about databases caching queues and api performance',
+                   %s + mod(g, %s), mod(g, 47) = 3, 1, %s, mod(g, 19) <> 5, 0, 0, 0, 0
+            FROM generate_series(0, %s - 1) g
+            ''', [first_user, users, CONTENT, posts]
+        )
+        first_post = _first_id(cursor, 'posts_post', 'slug', 'bench-post-', posts)
+
+        cursor.execute(
+            '''
+            INSERT INTO posts_tag (created_at, updated_at, pub_id, name, post_count)
+            SELECT now(), now(), 'benchtag' || g, 'benchtag' || g, 0 FROM generate_series(0, %s - 1) g
+            ''', [tags]
+        )
+        first_tag = _first_id(cursor, 'posts_tag', 'name', 'benchtag', tags)
+
+        cursor.execute(
+            '''
+            INSERT INTO posts_post_tags (post_id, tag_id)
+            SELECT %s + g, %s + mod(g + k, %s) FROM generate_series(0, %s - 1) g, (VALUES (0), (1), (7)) v(k)
+            ''', [first_post, first_tag, tags, posts]
+        )
+
+        cursor.execute(
+            '''
+            INSERT INTO posts_reaction (created_at, updated_at, post_id, user_id, value)
+            SELECT now(), now(), %s + mod((g / %s) * 7919 + mod(g, %s), %s), %s + mod(g, %s),
+                   CASE WHEN mod(g, 3) = 0 THEN -1 ELSE 1 END
+            FROM generate_series(0, %s - 1) g
+            ''', [first_post, users, users, posts, first_user, users, min(volumes['reactions'], users * posts)]
+        )
+
+        cursor.execute(
+            '''
+            INSERT INTO posts_post_bookmarks (post_id, user_id)
+            SELECT %s + mod((g / %s) * 104729 + mod(g, %s) * 31, %s), %s + mod(g, %s)
+            FROM generate_series(0, %s - 1) g
+            ''', [first_post, users, users, posts, first_user, users, min(volumes['bookmarks'], users * posts)]
+        )
+
+        cursor.execute(
+            '''
+            INSERT INTO users_userfollowing (created_at, updated_at, user_id, following_id)
+            SELECT now(), now(), 'benchuser' || mod(g, %s), 'benchuser' || mod(mod(g, %s) + 1 + g / %s, %s)
+            FROM generate_series(0, %s - 1) g
+            ''', [users, users, users, users, volumes['follows']]
+        )
+
+        cursor.execute(
+            '''
+            UPDATE posts_post p SET likes_count = r.likes, dislikes_count = r.dislikes, score = r.likes - r.dislikes
+            FROM (
+                SELECT post_id, count(*) FILTER (WHERE value = 1) likes, count(*) FILTER (WHERE value = -1) dislikes
+                FROM posts_reaction GROUP BY post_id
+            ) r
+            WHERE p.id = r.post_id
+            '''
+        )
+        cursor.execute(
+            '''
+            UPDATE posts_post p SET bookmarks_count = b.total
+            FROM (SELECT post_id, count(*) total FROM posts_post_bookmarks GROUP BY post_id) b
+            WHERE p.id = b.post_id
+            '''
+        )
+        cursor.execute(
+            '''
+            UPDATE posts_tag t SET post_count = c.total
+            FROM (
+                SELECT pt.tag_id, count(*) total FROM posts_post_tags pt
+                JOIN posts_post p ON p.id = pt.post_id AND p.is_active
+                GROUP BY pt.tag_id
+            ) c
+            WHERE t.id = c.tag_id
+            '''
+        )
+        cursor.execute(
+            '''
+            UPDATE users_user u SET followers_count = coalesce(followers.total, 0), following_count = coalesce(following.total, 0)
+            FROM users_user s
+            LEFT JOIN (SELECT following_id, count(*) total FROM users_userfollowing GROUP BY following_id) followers
+                ON followers.following_id = s.pub_id
+            LEFT JOIN (SELECT user_id, count(*) total FROM users_userfollowing GROUP BY user_id) following
+                ON following.user_id = s.pub_id
+            WHERE u.id = s.id AND s.username LIKE 'benchuser%%'
+            '''
+        )
+        cursor.execute('ANALYZE')
+
+    return volumes
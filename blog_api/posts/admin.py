@@ -5,7 +5,7 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
-from blog_api.posts.models import Tag, Post, Like, DisLike
+from blog_api.posts.models import Tag, Post, Reaction
 
 
 @admin.register(Post)
@@ -60,5 +60,10 @@ class TagAdmin(admin.ModelAdmin):
         return instance.get_post_count()
 
 
-admin.site.register(Like)
-admin.site.register(DisLike)
+@admin.register(Reaction)
+class ReactionAdmin(admin.ModelAdmin):
+    list_display = ['post', 'user', 'value', 'created_at',]
+    list_filter = ['value',]
+    list_select_related = True
+    raw_id_fields = ['post', 'user',]
+    readonly_fields = ['created_at', 'updated_at',]
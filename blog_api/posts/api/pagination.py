@@ -0,0 +1,129 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class KeysetPagination(BasePagination):
+    '''
+    --Keyset (cursor) pagination--
+    Paginates on a stable, indexed ordering e.g. ('-created_at', '-id'). Every page is one
+    `WHERE keys < last keys ORDER BY keys LIMIT page_size + 1` query with no COUNT(*) and no OFFSET,
+    so page cost stays flat however deep the client scrolls. The last key should be unique (`id`).
+    Cursors are opaque base64 encoded key values of the first/last row of a page.
+    '''
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+    page_size = 10
+    ordering = ('-created_at', '-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor['reverse'] if cursor else False
+        ordering = self._get_ordering(reverse)
+
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self._get_keyset_filter(ordering, cursor['position']))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._get_position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({
+            'p': [value.isoformat() if isinstance(value, datetime) else value for value in position],
+            'r': int(reverse),
+        })
+        encoded = base64.urlsafe_b64encode(cursor.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            position = cursor['p']
+            if len(position) != len(self.ordering):
+                raise ValueError()
+            position = [
+                self._to_python(field.lstrip('-'), value) for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return {
+            'position': position,
+            'reverse': bool(cursor.get('r', False)),
+        }
+
+    def _get_ordering(self, reverse):
+        if not reverse:
+            return list(self.ordering)
+        return [field[1:] if field.startswith('-') else '-' + field for field in self.ordering]
+
+    def _get_position(self, instance):
+        if isinstance(instance, dict):  # a .values() row
+            return [instance[field.lstrip('-')] for field in self.ordering]
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    def _get_keyset_filter(self, ordering, position):
+        '''
+        Expands the row comparison `(a, b) < (x, y)` into `a < x OR (a = x AND b < y)` so it can walk
+        the composite index in either direction.
+        '''
+        keyset_filter = Q()
+        equal_so_far = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = f'{name}__lt' if field.startswith('-') else f'{name}__gt'
+            keyset_filter |= Q(**equal_so_far, **{lookup: value})
+            equal_so_far[name] = value
+        return keyset_filter
+
+    def _to_python(self, name, value):
+        try:
+            return self.model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value  # annotated value
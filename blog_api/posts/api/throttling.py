@@ -0,0 +1,8 @@
+from rest_framework.throttling import UserRateThrottle
+
+
+class PostImportRateThrottle(UserRateThrottle):
+    """
+    Limits each user's bulk imports to the 'post_import' rate, a single import can insert any number of posts.
+    """
+    scope = 'post_import'
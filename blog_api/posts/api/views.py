@@ -1,49 +1,173 @@
-from datetime import timedelta
+import hashlib
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
 from rest_framework.throttling import AnonRateThrottle
 
-from django.db.models import Q, Count, F
-
-from blog_api.posts.models import Tag, Post
+from django.conf import settings
+from django.db.models import Q, Count, F, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from blog_api.posts.models import Tag, Post, Reaction
+from blog_api.posts.managers import fuzzy_search_threshold
+from blog_api.posts.api.pagination import KeysetPagination
+from blog_api.posts.api.throttling import PostImportRateThrottle
+from blog_api.posts.cache import get_post_detail, get_posts_version
+from blog_api.posts.imports import import_posts
+from blog_api.posts.exports import EXPORTS, EXPORT_FORMATS, export_lines, gzip_chunks, parse_watermark
+from blog_api.posts.rankings import get_ranking_ids
 from blog_api.posts.api.serializers import NextPostPreviousPostSerializer, TagSerializer, PostCreateSerializer, PostDetailSerializer, \
-                                                                                                PostUpdateSerializer, PostOverviewSerializer
+                                                PostUpdateSerializer, PostOverviewReadSerializer, PostDetailReadSerializer
 from blog_api.users.models import User
 from blog_api.users.api.serializers import UserPublicSerializer
 
 
-def get_paginated_queryset(request, qs, serializer_obj, page_size=10):
-    paginator = PageNumberPagination()
+def get_paginated_queryset(request, qs, serializer_obj, page_size=10, ordering=None):
+    '''
+    Paginates and serializes a queryset. Passing an `ordering` of stable, indexed keys e.g.
+    ('-created_at', '-id') switches to keyset (cursor) pagination, no COUNT(*) and no OFFSET.
+    Read serializers (see PostReadSerializer) fetch the page as .values() rows.
+    '''
+    if hasattr(serializer_obj, 'get_queryset'):
+        qs = serializer_obj.get_queryset(qs)
+    if ordering:
+        paginator = KeysetPagination()
+        paginator.ordering = ordering
+    else:
+        paginator = PageNumberPagination()
     paginator.page_size = page_size
     page = paginator.paginate_queryset(qs, request)
     serializer = serializer_obj(page, many=True, context={'request': request})
     return paginator.get_paginated_response(serializer.data)
 
 
+def get_paginated_ranking(request, ranking, serializer_obj, page_size=10):
+    '''
+    Paginates a precomputed ranking of post ids (see blog_api.posts.rankings) and hydrates only the page,
+    so the cost is one query for the page whatever the size of the posts table.
+    '''
+    paginator = PageNumberPagination()
+    paginator.page_size = page_size
+    page_ids = paginator.paginate_queryset(get_ranking_ids(ranking), request)
+    posts = (
+        Post.objects.prefetch_related('tags')
+                    .select_related('author')
+                    .filter(is_active=True, id__in=page_ids)
+                    .order_by()
+    )
+    if hasattr(serializer_obj, 'get_queryset'):
+        posts = {row['id']: row for row in serializer_obj.get_queryset(posts)}
+    else:
+        posts = {post.id: post for post in posts}
+    page = [posts[post_id] for post_id in page_ids if post_id in posts]
+    serializer = serializer_obj(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+def serialize_post_detail(post_slug):
+    '''
+    Builds the post detail entry cached by `get_post_detail`, the serialized post with a digest of it for the
+    ETag. Returns None if there is no active post with the provided slug.
+    '''
+    post = PostDetailReadSerializer.get_queryset(Post.objects.filter(slug=post_slug, is_active=True)).first()
+    if post is None:
+        return None
+    serialized_post = PostDetailReadSerializer(post).data
+    return {
+        'post': serialized_post,
+        'digest': hashlib.md5(JSONRenderer().render(serialized_post)).hexdigest(),
+    }
+
+
+def _get_etag(*parts):
+    return '"%s"' % hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _get_version_time(version):
+    return datetime.fromtimestamp(version / 10 ** 9, tz=timezone.utc)
+
+
+def get_posts_validators(request):
+    '''
+    --Post and tag list validators--
+    ==========================================================================================================
+    Returns the ETag and last modified time of the post and tag lists without querying or serializing them.
+    1) Reads max(updated_at) of the posts, the end of the (updated_at, id) index. Catches every write that
+       touches updated_at, bulk imports included.
+    2) Reads the posts version from the cache, bumped by the writes that don't e.g. reactions, tags, authors.
+    3) The ETag hashes both with the negotiated media type, the last modified time is the later of the two.
+    ==========================================================================================================
+    '''
+    last_updated = Post.objects.order_by().aggregate(last_updated=Max('updated_at'))['last_updated']  # 1
+    version = get_posts_version()  # 2
+    return (
+        _get_etag(last_updated, version, request.accepted_media_type),
+        max(filter(None, (last_updated, _get_version_time(version)))),
+    )  # 3
+
+
+def get_post_detail_validators(request):
+    '''
+    Returns the ETag of a post detail from its cache entry, no query on a hit. The ETag hashes the serialized
+    post itself, so it changes with anything shown in the detail, the author's and tags' counters included, even
+    the writes that don't drop the cached detail. Every post is read from the same URL, the slug is in the body,
+    so there is no last modified time, an If-Modified-Since could otherwise match a different post.
+    '''
+    post_slug = request.data.get('post_slug', None)
+    if not post_slug:
+        return None, None
+    entry = get_post_detail(post_slug, lambda: serialize_post_detail(post_slug))
+    if entry is None:
+        return None, None
+    return _get_etag(entry['digest'], request.accepted_media_type), None
+
+
+def conditional(get_validators):
+    '''
+    --Conditional GET--
+    Django's condition() with the ETag and last modified time computed together, once per request, by
+    get_validators(request). A GET whose If-None-Match or If-Modified-Since still matches gets a 304 before
+    the view runs. Goes below the DRF decorators so authentication, permissions and throttles still apply.
+    '''
+    def get_validator(request, index):
+        if not hasattr(request, '_validators'):
+            request._validators = get_validators(request)
+        return request._validators[index]
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: get_validator(request, 0),
+        last_modified_func=lambda request, *args, **kwargs: get_validator(request, 1),
+    )
+
+
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def all_posts(request):
     '''
     --All posts view--
     ==========================================================================================================
-    Returns nested representations of all posts. Paginates the quereyset.
+    Returns nested representations of all posts, newest first. Cursor paginates the queryset.
     ==========================================================================================================
     '''
     posts_to_paginate = (
-        Post.objects.prefetch_related('bookmarks')
-                    .prefetch_related('tags')
+        Post.objects.prefetch_related('tags')
                     .select_related('author')
-                    .select_related('previouspost')
-                    .select_related('nextpost')
                     .filter(is_active=True)
     )
 
-    all_posts = get_paginated_queryset(request, posts_to_paginate, PostOverviewSerializer)
+    all_posts = get_paginated_queryset(request, posts_to_paginate, PostOverviewReadSerializer, ordering=('-created_at', '-id',))
 
     return all_posts
 
@@ -51,16 +175,16 @@ def all_posts(request):
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def featured_posts(request):
     '''
     --All featured posts view--
     ==========================================================================================================
-    Returns nested representations of all posts that are featured. Paginates the queryset.
+    Returns nested representations of all posts that are featured. Paginates the precomputed ranking.
     ==========================================================================================================
     '''
-    featured_posts_to_paginate = Post.items.featured()
-
-    featured_posts = get_paginated_queryset(request, featured_posts_to_paginate, PostOverviewSerializer)
+    featured_posts = get_paginated_ranking(request, 'featured', PostOverviewReadSerializer)
 
     return featured_posts
 
@@ -68,16 +192,16 @@ def featured_posts(request):
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def most_liked_posts(request):
     '''
     --All most liked posts view--
     ==========================================================================================================
-    Returns nested representations of all posts by most liked. Paginates the queryset.
+    Returns nested representations of all posts by most liked. Paginates the precomputed ranking.
     ==========================================================================================================
     '''
-    most_liked_posts_to_paginate = Post.items.most_liked()
-
-    most_liked_posts = get_paginated_queryset(request, most_liked_posts_to_paginate, PostOverviewSerializer)
+    most_liked_posts = get_paginated_ranking(request, 'most_liked', PostOverviewReadSerializer)
 
     return most_liked_posts
 
@@ -85,16 +209,16 @@ def most_liked_posts(request):
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def most_disliked_posts(request):
     '''
     --All most disliked posts view--
     ==========================================================================================================
-    Returns nested representations of all posts by most disliked. Paginates the queryset.
+    Returns nested representations of all posts by most disliked. Paginates the precomputed ranking.
     ==========================================================================================================
     '''
-    most_disliked_posts_to_paginate = Post.items.most_disliked()
-
-    most_disliked_posts = get_paginated_queryset(request, most_disliked_posts_to_paginate, PostOverviewSerializer)
+    most_disliked_posts = get_paginated_ranking(request, 'most_disliked', PostOverviewReadSerializer)
 
     return most_disliked_posts
 
@@ -102,16 +226,18 @@ def most_disliked_posts(request):
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def oldest_posts(request):
     '''
     --All oldest posts view--
     ==========================================================================================================
-    Returns nested representations of all posts by oldest. Paginates the quereyset.
+    Returns nested representations of all posts by oldest. Cursor paginates the queryset.
     ==========================================================================================================
     '''
     posts_to_paginate = Post.items.oldest_posts()
 
-    oldest_posts = get_paginated_queryset(request, posts_to_paginate, PostOverviewSerializer)
+    oldest_posts = get_paginated_queryset(request, posts_to_paginate, PostOverviewReadSerializer, ordering=('created_at', 'id',))
 
     return oldest_posts
 
@@ -119,16 +245,16 @@ def oldest_posts(request):
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def most_bookmarked_posts(request):
     '''
     --Most bookmarked posts view--
     ==========================================================================================================
-    Returns nested representations of all posts by most bookmarked. Paginates the quereyset.
+    Returns nested representations of all posts by most bookmarked. Paginates the precomputed ranking.
     ==========================================================================================================
     '''
-    posts_to_paginate = Post.items.most_bookmarked()
-
-    most_bookmarked_posts = get_paginated_queryset(request, posts_to_paginate, PostOverviewSerializer)
+    most_bookmarked_posts = get_paginated_ranking(request, 'most_bookmarked', PostOverviewReadSerializer)
 
     return most_bookmarked_posts
 
@@ -240,15 +366,10 @@ def post_create(request):
     
     serializer = PostCreateSerializer(data=request.data)  # 4
     if serializer.is_valid():
-        serializer.save()
-
-        new_post = Post.objects.get(slug=serializer.data['slug'])
+        new_post = serializer.save()
 
         if post_tags:
-            tag_set = Tag.items.comma_to_qs(post_tags)
-            new_post.tags.clear()
-            new_post.tags.add(*tag_set)  # 5
-            new_post.save()
+            new_post.tags.set(Tag.items.comma_to_qs(post_tags))  # 5
 
         new_post = PostDetailSerializer(new_post)
         return Response({
@@ -264,18 +385,57 @@ def post_create(request):
     )
 
 
+@api_view(['POST'])
+@permission_classes((IsAdminUser,))
+@throttle_classes([PostImportRateThrottle])
+def post_import(request):
+    '''
+    --Post import view--
+    ==========================================================================================================
+    :param: JSON Lines request body, one post per line e.g.
+        {"title": "...", "content": "...", "featured": false, "created_at": "2021-08-01T10:00:00Z", "post_tags": "tag1, tag2"}
+    :returns: boolean created.
+    :returns: int imported.
+    :returns: list errors, the line number and message of each rejected line.
+    :returns: Response.HTTP_STATUS_CODE.
+    Admins only, imports can backdate posts and are throttled to the 'post_import' rate.
+    1) Streams the request body through import_posts in chunks, every post authored by the current user.
+    2) Returns 201 with the number of posts imported and the rejected lines. If no post could be imported
+        returns 400 and the errors.
+    ==========================================================================================================
+    '''
+    result = import_posts(request.stream or [], author=request.user)  # 1
+
+    if not result['imported']:
+        return Response({
+                'created': False,
+                'message': result['errors'] or 'No posts found in the request body.',
+            }, status=HTTP_400_BAD_REQUEST
+        )
+
+    return Response({
+            'created': True,
+            'imported': result['imported'],
+            'failed': result['failed'],
+            'errors': result['errors'],  # 2
+        }, status=HTTP_201_CREATED
+    )
+
+
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(private=True, no_cache=True)  # the slug is in the body, a shared cache can't tell posts apart
+@conditional(get_post_detail_validators)
 def post_detail(request):
     '''
     --Post detail view--
     ==========================================================================================================
     :param: str post_slug (required)
     1) Attempts to pull the post_slug from request. If no returns 400 and message.
-    2) Attempts to pull up the post object with provided post_slug. If not found
-       returns 400 and message.
-    3) Serializes and returns the post object.
+    2) Attempts to pull the serialized post from the post detail cache, building it from the active post with
+       the provided post_slug on a miss. If not found returns 400 and message.
+    3) Returns the serialized post.
     ==========================================================================================================
     '''
     post_slug = request.data.get('post_slug', None)  # 1
@@ -285,18 +445,14 @@ def post_detail(request):
             }, status=HTTP_400_BAD_REQUEST
         )
 
-    try:
-        post = Post.objects.get(slug=post_slug)  # 2
-        if not post.is_active:
-            raise Post.DoesNotExist()
-    except Post.DoesNotExist:
+    post_detail = get_post_detail(post_slug, lambda: serialize_post_detail(post_slug))  # 2
+    if post_detail is None:
         return Response({
                 'message': 'No post found with provided slug.'
             }, status=HTTP_400_BAD_REQUEST
         )
-    serialized_post = PostDetailSerializer(post).data  # 3
-    return Response({
-            'post': serialized_post
+    return Response({  # 3
+            'post': post_detail['post']
         }, status=HTTP_200_OK
     )
 
@@ -324,7 +480,8 @@ def post_update(request):
        not to self.
     6) Serializes the request data.
     7) Attempts to save the PostUpdateSerializer. Returns 200 and message. If errors returns 400 and message.
-    8) If any post tags were included in the request, adds them to the post.
+    8) If any post tags were included in the request, sets them on the post. Only the tags that changed are
+       inserted or deleted.
     9) Updates any objects with a post count attribute.
     10) Returns serialized post.
     ==========================================================================================================
@@ -415,13 +572,8 @@ def post_update(request):
     if serializer.is_valid():  # 7
         serializer.save()
 
-        updated_post = Post.objects.get(slug=serializer.data['slug'])
-
         if post_tags:
-            tag_set = Tag.items.comma_to_qs(post_tags)
-            updated_post.tags.clear()
-            updated_post.tags.add(*tag_set)  # 8
-            updated_post.save()
+            post.tags.set(Tag.items.comma_to_qs(post_tags))  # 8
 
         updated_post = PostDetailSerializer(post)  # serializer was already saved, have to reserialize to get tags if any
         return Response({
@@ -465,7 +617,7 @@ def post_bookmarks(request):
             }, status=HTTP_400_BAD_REQUEST
         )
 
-    bookmarks = post.bookmarks.all()
+    bookmarks = User.items.with_counts().filter(bookmarked_posts=post)
 
     all_post_bookmarks = get_paginated_queryset(request, bookmarks, UserPublicSerializer, page_size=30)
 
@@ -505,7 +657,7 @@ def post_bookmark(request):
         )
 
     user = request.user
-    bookmarked = user.bookmark_post(post_to_bookmark)  # 3
+    bookmarked = user.bookmark_post(post_to_bookmark, post=post)  # 3
 
     if bookmarked['bookmarked']:
         return Response({
@@ -584,9 +736,13 @@ def post_search(request):
     --Post search view--
     ==========================================================================================================
     :param: str searh_term (required)
+    :param: str search_mode, 'prefix' to match words by prefix or 'fuzzy' to tolerate typos in titles.
     1) Attempts to get search_term from request. If no returns 400 and message.
-    2) Checks that the provided search term is greater than 3 charactars. If no returns 400 and message.
-    3) Calls search() on the PostManager. Returns all matching posts. Paginates queryset.
+    2) Checks that the provided search term is greater than 3 charactars and the search mode is valid. If no
+       returns 400 and message.
+    3) Calls search() on the PostManager. Paginates the ranked queryset, only the requested page is evaluated,
+       with the fuzzy search threshold lowered for fuzzy searches. If the first page is empty returns 400 and
+       message.
     ==========================================================================================================
     '''
     search_term = request.data.get('search_term', None)  # 1
@@ -602,14 +758,21 @@ def post_search(request):
             }, status=HTTP_400_BAD_REQUEST
         )
 
-    search_results = Post.items.search(search_text=search_term)  # 3
-    if not search_results:
+    search_mode = request.data.get('search_mode', None)
+    if search_mode not in (None, 'prefix', 'fuzzy'):
         return Response({
-                'message': 'No posts found with provided search term.'
+                'message': 'Search mode must be prefix or fuzzy.'
             }, status=HTTP_400_BAD_REQUEST
         )
 
-    all_posts = get_paginated_queryset(request, search_results, PostOverviewSerializer)
+    search_results = Post.items.search(search_text=search_term, mode=search_mode)  # 3
+    with fuzzy_search_threshold() if search_mode == 'fuzzy' else nullcontext():
+        all_posts = get_paginated_queryset(request, search_results, PostOverviewReadSerializer)
+    if not all_posts.data['results'] and not request.query_params.get('page'):
+        return Response({
+                'message': 'No posts found with provided search term.'
+            }, status=HTTP_400_BAD_REQUEST
+        )
 
     return all_posts
 
@@ -668,7 +831,7 @@ def post_like(request):
 
     user = request.user  # 5
 
-    liked = user.like_post(post.slug, like)  # 6
+    liked = user.like_post(post.slug, like, post=post)  # 6
     
     if liked['liked']:
         return Response({
@@ -722,7 +885,7 @@ def post_likes(request):
             }, status=HTTP_400_BAD_REQUEST
         )
 
-    users_liked = post.likes.users.all()
+    users_liked = User.items.with_counts().filter(reactions__post=post, reactions__value=Reaction.LIKE)
     all_users_liked = get_paginated_queryset(request, users_liked, UserPublicSerializer, page_size=30)
     return all_users_liked
 
@@ -758,7 +921,7 @@ def post_dislikes(request):
             }, status=HTTP_400_BAD_REQUEST
         )
 
-    users_disliked = post.dislikes.users.all()
+    users_disliked = User.items.with_counts().filter(reactions__post=post, reactions__value=Reaction.DISLIKE)
     all_users_disliked = get_paginated_queryset(request, users_disliked, UserPublicSerializer, page_size=30)
     return all_users_disliked
 
@@ -766,15 +929,17 @@ def post_dislikes(request):
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def all_tags(request):
     '''
     --All tags view--
     ==========================================================================================================
-    Return all tag names and pub_id's.
+    Return all tag names and pub_id's. Cursor paginates on the unique name.
     ==========================================================================================================
     '''
     tags = Tag.objects.all()
-    all_tags = get_paginated_queryset(request, tags, TagSerializer, page_size=1000)
+    all_tags = get_paginated_queryset(request, tags, TagSerializer, page_size=1000, ordering=('name',))
     
     return all_tags
 
@@ -782,15 +947,20 @@ def all_tags(request):
 @api_view(['GET'])
 @permission_classes((AllowAny,))
 @throttle_classes([AnonRateThrottle])
+@cache_control(public=True, max_age=settings.POST_CACHE_MAX_AGE)
+@conditional(get_posts_validators)
 def all_tags_by_post_count(request):
     '''
     --All tags view--
     ==========================================================================================================
-    Return all tag names and pub_id's by post count.
+    Return all tag names and pub_id's by their stored count of active posts. Cursor paginates on the count
+    and the unique name.
     ==========================================================================================================
     '''
     tags = Tag.items.highest_post_count()
-    all_tags_by_post_count = get_paginated_queryset(request, tags, TagSerializer, page_size=1000)
+    all_tags_by_post_count = get_paginated_queryset(
+        request, tags, TagSerializer, page_size=1000, ordering=('-post_count', 'name',)
+    )
     
     return all_tags_by_post_count
 
@@ -802,7 +972,7 @@ def all_tag_posts(request):
     '''
     --All tags view--
     ==========================================================================================================
-    Return all posts for a given tag.
+    Return all posts for a given tag, newest first. Cursor paginates the queryset.
     ==========================================================================================================
     '''
     tag_pub_id = request.data.get('tag_pub_id', None)
@@ -821,19 +991,66 @@ def all_tag_posts(request):
         )
 
     tag_posts = (
-        tag.posts.prefetch_related('bookmarks')
-                .prefetch_related('tags')
+        tag.posts.prefetch_related('tags')
                 .select_related('author')
-                .select_related('previouspost')
-                .select_related('nextpost')
                 .filter(is_active=True)
     )
 
-    all_tag_posts = get_paginated_queryset(request, tag_posts, PostOverviewSerializer)
+    all_tag_posts = get_paginated_queryset(request, tag_posts, PostOverviewReadSerializer, ordering=('-created_at', '-id',))
     
     return all_tag_posts
 
 
+@api_view(['GET'])
+@permission_classes((IsAdminUser,))
+def export(request):
+    '''
+    --Export view--
+    ==========================================================================================================
+    :param: str kind (required) posts, users or reactions.
+    :param: str export_format jsonl (default) or csv. Not format, DRF reads that one for content negotiation.
+    :param: str since ISO 8601 datetime, only rows updated after it. The updated_at of the last row of the
+        previous pull, rows are exported oldest update first.
+    :param: boolean gzip.
+    :returns: StreamingHttpResponse of the rows.
+    :returns: Response.HTTP_STATUS_CODE.
+    Query parameters, the response is a file download. Admin only.
+    1) Validates the parameters. If any is invalid returns 400 and message.
+    2) Streams the rows as they are read from a server side cursor, gzipped on the fly if asked.
+    ==========================================================================================================
+    '''
+    kind = request.query_params.get('kind', None)
+    export_format = request.query_params.get('export_format', 'jsonl')
+    since = request.query_params.get('since', None)
+    gzipped = request.query_params.get('gzip', '').lower() in ('1', 'true')
+
+    if kind not in EXPORTS or export_format not in EXPORT_FORMATS:  # 1
+        return Response({
+                'message': f'Please provide a kind of {", ".join(EXPORTS)} and an export_format of {", ".join(EXPORT_FORMATS)}.'
+            }, status=HTTP_400_BAD_REQUEST
+        )
+
+    if since:
+        since = parse_watermark(since)
+        if not since:
+            return Response({
+                    'message': 'Please provide since as an ISO 8601 datetime.'
+                }, status=HTTP_400_BAD_REQUEST
+            )
+
+    content = export_lines(kind, export_format, since=since)  # 2
+    content_type = EXPORT_FORMATS[export_format]
+    filename = f'{kind}.{export_format}'
+    if gzipped:
+        content = gzip_chunks(content)
+        content_type = 'application/gzip'
+        filename += '.gz'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @api_view(['GET', 'POST', 'PUT', 'PATCH'])
 @permission_classes((AllowAny,))
 def posts_fallback(request):
@@ -0,0 +1,98 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+POST_DETAIL_KEY = 'posts:detail:{slug}:{version}:entry'
+POST_DETAIL_VERSION_KEY = 'posts:detail:{slug}:version'
+POST_DETAIL_LOCK_KEY = 'posts:detail:{slug}:{version}:lock'
+POSTS_VERSION_KEY = 'posts:version'
+
+LOCK_TIMEOUT = 10  # seconds a rebuild may hold the lock before another request takes over
+LOCK_POLL_INTERVAL = 0.05
+LOCK_POLL_ATTEMPTS = 20
+
+
+def _get_version(version_key):
+    '''
+    Returns the current version stored under version_key. Versions never expire, a missing one (evicted
+    or invalidated) starts over at the current time so it can't collide with an older version.
+    '''
+    version = cache.get(version_key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(version_key, version, timeout=None):
+            version = cache.get(version_key, version)
+    return version
+
+
+def get_post_detail_version(slug):
+    '''
+    Returns the current version of a post's cached detail, the time in nanoseconds it was last invalidated
+    (or first read).
+    '''
+    return _get_version(POST_DETAIL_VERSION_KEY.format(slug=slug))
+
+
+def get_posts_version():
+    '''
+    Returns the version of the posts and tags as a whole, the time in nanoseconds any of them was last
+    invalidated (or first read). Bumped by every write that changes how a post or tag is serialized,
+    including the counter and tag updates that leave updated_at alone.
+    '''
+    return _get_version(POSTS_VERSION_KEY)
+
+
+def get_post_detail(slug, build):
+    '''
+    --Read-through cache for serialized post details--
+    ==========================================================================================================
+    :param: str slug
+    :param: callable build, returns the post's detail entry (the serialized post with its ETag digest) or None
+            when there is no active post with the slug.
+    :returns: the detail entry or None.
+    1) Looks up the post's current version then the detail entry under slug + version. Hits never
+       touch the database.
+    2) On a miss only the request that wins the rebuild lock calls build(), the rest wait for it to fill the
+       cache and only build themselves if it takes longer than the lock poll.
+    3) Caches the result with a jittered timeout so hot posts don't all expire together. None is not cached.
+    ==========================================================================================================
+    '''
+    version = get_post_detail_version(slug)  # 1
+    key = POST_DETAIL_KEY.format(slug=slug, version=version)
+    post_detail = cache.get(key)
+    if post_detail is not None:
+        return post_detail
+
+    lock_key = POST_DETAIL_LOCK_KEY.format(slug=slug, version=version)  # 2
+    locked = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+    if not locked:
+        for attempt in range(LOCK_POLL_ATTEMPTS):
+            time.sleep(LOCK_POLL_INTERVAL)
+            post_detail = cache.get(key)
+            if post_detail is not None:
+                return post_detail
+
+    try:
+        post_detail = build()
+        if post_detail is not None:  # 3
+            timeout = settings.POST_DETAIL_CACHE_TIMEOUT
+            cache.set(key, post_detail, timeout=timeout + random.randint(0, timeout // 10))
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return post_detail
+
+
+def invalidate_post_detail(*slugs):
+    '''
+    Drops the cached detail of the provided posts by dropping their versions, and the posts version. Runs
+    right away and again once the transaction commits, so a request that rebuilt from the old rows in between
+    is thrown away too.
+    '''
+    version_keys = [POSTS_VERSION_KEY] + [POST_DETAIL_VERSION_KEY.format(slug=slug) for slug in slugs if slug]
+    cache.delete_many(version_keys)
+    transaction.on_commit(lambda: cache.delete_many(version_keys))
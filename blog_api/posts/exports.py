@@ -0,0 +1,160 @@
+import csv
+import json
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog_api.posts.models import Post, Reaction
+from blog_api.users.models import User
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _post_rows():
+    return Post.objects.values(
+        'id', 'slug', 'title', 'content', 'featured', 'is_active', 'estimated_reading_time',
+        'likes_count', 'dislikes_count', 'score', 'bookmarks_count', 'created_at', 'updated_at',
+        author_pub_id=F('author__pub_id'), author_username=F('author__username'),
+    )
+
+
+def _add_post_tags(rows):
+    '''
+    Denormalizes the tag names onto a chunk of post rows with one query for the whole chunk.
+    '''
+    tags = defaultdict(list)
+    links = Post.tags.through.objects.filter(post_id__in=[row['id'] for row in rows]).order_by('tag__name')
+    for post_id, name in links.values_list('post_id', 'tag__name'):
+        tags[post_id].append(name)
+    for row in rows:
+        row['tags'] = tags[row.pop('id')]
+    return rows
+
+
+def _user_rows():
+    return User.objects.values(
+        'pub_id', 'username', 'name', 'is_active', 'followers_count', 'following_count', 'created_at', 'updated_at',
+    )
+
+
+def _reaction_rows():
+    return Reaction.objects.values(
+        'value', 'created_at', 'updated_at', post_slug=F('post__slug'), user_pub_id=F('user__pub_id'),
+    )
+
+
+# kind: (function returning a values() queryset of the rows, chunk transform or None, columns in output order)
+EXPORTS = {
+    'posts': (_post_rows, _add_post_tags, (
+        'slug', 'title', 'content', 'author_pub_id', 'author_username', 'tags', 'featured', 'is_active',
+        'estimated_reading_time', 'likes_count', 'dislikes_count', 'score', 'bookmarks_count', 'created_at', 'updated_at',
+    )),
+    'users': (_user_rows, None, (
+        'pub_id', 'username', 'name', 'is_active', 'followers_count', 'following_count', 'created_at', 'updated_at',
+    )),
+    'reactions': (_reaction_rows, None, (
+        'post_slug', 'user_pub_id', 'value', 'created_at', 'updated_at',
+    )),
+}
+
+
+def parse_watermark(value):
+    '''
+    Parses a `since` watermark, an ISO 8601 datetime read as UTC if it has no offset. Returns None if invalid.
+    '''
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        return None
+    if since and timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.utc)
+    return since
+
+
+def _isoformat(value):
+    '''
+    JSON encodes datetimes with their microseconds, unlike DjangoJSONEncoder, so an exported updated_at passed
+    back as `since` does not pull the same row again.
+    '''
+    return value.isoformat()
+
+
+class _Echo:
+    '''File-like object csv.writer writes a row to and gets it straight back.'''
+
+    def write(self, value):
+        return value
+
+
+def export_chunks(kind, since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    --Export rows--
+    Yields the rows of an export chunk_size rows at a time, oldest update first. Rows are read from a server side
+    cursor with .iterator(chunk_size) and each chunk is transformed with one query, so memory stays flat whatever
+    the size of the table. Passing the updated_at of the last row exported as `since` pulls only what changed,
+    served by the (updated_at, id) indexes. Stored counters move without touching updated_at, the reactions export
+    carries those changes.
+    '''
+    rows_qs, transform, columns = EXPORTS[kind]
+    rows_qs = rows_qs().order_by('updated_at', 'id')
+    if since:
+        rows_qs = rows_qs.filter(updated_at__gt=since)
+
+    rows = rows_qs.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        if transform:
+            chunk = transform(chunk)
+        yield chunk
+
+
+def export_lines(kind, export_format='jsonl', since=None, chunk_size=EXPORT_CHUNK_SIZE, stats=None):
+    '''
+    Renders export_chunks as JSON Lines or CSV (with a header row), one string per chunk. `stats`, if passed,
+    is updated with the number of rows and the updated_at watermark to pass as `since` next time.
+    '''
+    columns = EXPORTS[kind][2]
+    if stats is None:
+        stats = {}
+    stats.update(rows=0, watermark=since)
+
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+
+    for chunk in export_chunks(kind, since=since, chunk_size=chunk_size):
+        if export_format == 'csv':
+            lines = [
+                writer.writerow([
+                    ','.join(row[column]) if column == 'tags' else row[column] for column in columns
+                ]) for row in chunk
+            ]
+        else:
+            lines = [json.dumps({column: row[column] for column in columns}, default=_isoformat) + '\n' for row in chunk]
+
+        stats['rows'] += len(chunk)
+        stats['watermark'] = max((row['updated_at'] for row in chunk if row['updated_at']), default=stats['watermark'])
+        yield ''.join(lines)
+
+
+def gzip_chunks(chunks):
+    '''
+    Gzips a stream of strings on the fly, compressing one chunk at a time.
+    '''
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,178 @@
+import json
+import uuid
+from collections import Counter, defaultdict
+from itertools import islice
+
+from rest_framework.exceptions import ValidationError
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.text import slugify
+
+from blog_api.posts.models import Tag, Post
+from blog_api.posts.rankings import RANKINGS, build_ranking
+from blog_api.posts.api.serializers import PostImportSerializer
+from blog_api.users.models import User
+
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+# room for the '-<uuid4 hex>' suffix Post._get_unique_slug adds
+SLUG_TITLE_LENGTH = Post._meta.get_field('slug').max_length - 33
+TAG_NAME_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def _tag_names(tag_str):
+    '''
+    Lower cased tag names of a comma separated string, in order and without duplicates like Tag.items.comma_to_qs.
+    '''
+    names = {}
+    for name in (tag_str or '').split(','):
+        name = name.strip()
+        if name:
+            names.setdefault(name.lower(), name)
+    return names
+
+
+def _validate_line(serializer, line, require_author):
+    '''
+    Parses and validates one JSON line with a PostImportSerializer shared by the whole import, building its fields
+    once instead of per line, and checks its tag names fit Tag.name.
+    Returns (validated data, None) or (None, errors).
+    '''
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None, 'Invalid JSON.'
+    if not isinstance(row, dict):
+        return None, 'Each line must be a JSON object.'
+
+    try:
+        data = serializer.run_validation(row)
+    except ValidationError as exc:
+        return None, exc.detail
+    if require_author and not data.get('author'):
+        return None, {'author': ['This field is required.']}
+    if any(len(name) > TAG_NAME_LENGTH for name in _tag_names(data.get('post_tags')).values()):
+        return None, {'post_tags': [f'Tag names must be at most {TAG_NAME_LENGTH} characters.']}
+    return data, None
+
+
+def _import_chunk(rows, author, report_error):
+    '''
+    Inserts one chunk of validated rows, see import_posts. Returns the number of posts inserted.
+    '''
+    if author is None:
+        authors = User.objects.filter(pub_id__in={data['author'] for number, data in rows}, is_active=True).in_bulk(
+            field_name='pub_id'
+        )
+        resolved = []
+        for number, data in rows:
+            if data['author'] in authors:
+                resolved.append((number, data, authors[data['author']]))
+            else:
+                report_error(number, {'author': ['No user found with provided id.']})
+        if not resolved:
+            return 0
+    else:
+        resolved = [(number, data, author) for number, data in rows]
+
+    now = timezone.now()
+    posts = []
+    post_tag_names = []
+    for number, data, post_author in resolved:
+        post = Post(
+            title=data['title'],
+            content=data['content'],
+            featured=data.get('featured', False),
+            author=post_author,
+            created_at=data.get('created_at') or now,
+            updated_at=now,
+        )
+        post.slug = f'{slugify(post.title)[:SLUG_TITLE_LENGTH]}-{uuid.uuid4().hex}'
+        post.estimated_reading_time = post._get_estimated_reading_time()
+        posts.append(post)
+        post_tag_names.append(_tag_names(data.get('post_tags')))
+
+    with transaction.atomic():
+        all_tag_names = {}
+        for names in post_tag_names:
+            for lower_name, name in names.items():
+                all_tag_names.setdefault(lower_name, name)
+        tags = {tag.name.lower(): tag for tag in Tag.items.comma_to_qs(','.join(all_tag_names.values()))}
+
+        Post.objects.bulk_create(posts)
+
+        links = [
+            Post.tags.through(post_id=post.id, tag_id=tags[lower_name].id)
+            for post, names in zip(posts, post_tag_names) for lower_name in names if lower_name in tags
+        ]
+        Post.tags.through.objects.bulk_create(links)
+
+        tags_by_delta = defaultdict(list)
+        for tag_id, delta in Counter(link.tag_id for link in links).items():
+            tags_by_delta[delta].append(tag_id)
+        for delta, tag_ids in tags_by_delta.items():
+            Tag.objects.filter(id__in=tag_ids).update(post_count=F('post_count') + delta)
+
+    return len(posts)
+
+
+def _rebuild_rankings():
+    for ranking in RANKINGS:
+        build_ranking(ranking)
+
+
+def import_posts(lines, author=None, chunk_size=IMPORT_CHUNK_SIZE):
+    '''
+    --Bulk post import--
+    Imports posts from JSON Lines, one object per line with title, content and optionally featured, created_at,
+    post_tags (comma separated) and author (a user pub_id, ignored when an author is passed). Lines are read lazily
+    so a large file or request body is never held in memory, about 5 queries per chunk whatever its size.
+    1) Reads chunk_size lines at a time, parses and validates each. Invalid lines are reported by line number.
+    2) Resolves the chunk's authors and tags with one query each, inserting the missing tags.
+    3) Inserts the posts with one bulk_create. Slugs and reading times are computed here, the search vectors by the
+       posts_post_search_vector_trigger (migration 0021) within the same INSERT.
+    4) Inserts the tag links with one bulk_create and moves the tags post counts, one UPDATE per distinct delta.
+    5) Rebuilds the post rankings once the import commits, bulk inserts send no post_save.
+    Returns the number of posts imported, the number of lines that failed and the first MAX_REPORTED_ERRORS errors.
+    '''
+    result = {'imported': 0, 'failed': 0, 'errors': []}
+    serializer = PostImportSerializer()
+
+    def report_error(number, message):
+        result['failed'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'line': number, 'message': message})
+
+    numbered_lines = enumerate(lines, 1)
+    while True:
+        chunk = list(islice(numbered_lines, chunk_size))  # 1
+        if not chunk:
+            break
+
+        rows = []
+        for number, line in chunk:
+            if isinstance(line, bytes):
+                try:
+                    line = line.decode('utf-8')
+                except UnicodeDecodeError:
+                    report_error(number, 'Lines must be UTF-8 encoded.')
+                    continue
+            if not line.strip():
+                continue
+            data, errors = _validate_line(serializer, line, require_author=author is None)
+            if errors:
+                report_error(number, errors)
+            else:
+                rows.append((number, data))
+
+        if rows:
+            result['imported'] += _import_chunk(rows, author, report_error)  # 2, 3, 4
+
+    if result['imported']:
+        transaction.on_commit(_rebuild_rankings)  # 5
+
+    return result
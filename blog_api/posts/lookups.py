@@ -0,0 +1,22 @@
+from django.db.models import CharField, FloatField, Func, Value
+from django.contrib.postgres.lookups import PostgresOperatorLookup
+
+
+@CharField.register_lookup
+class TrigramWordSimilar(PostgresOperatorLookup):
+    '''
+    `title %> 'text'`, true when the text is similar to some run of words in the title. Unlike trigram_similar it
+    does not penalise long titles for short search terms. Can use a gin_trgm_ops index on the column.
+    '''
+    lookup_name = 'trigram_word_similar'
+    postgres_operator = '%%>'
+
+
+class TrigramWordSimilarity(Func):
+    function = 'WORD_SIMILARITY'
+    output_field = FloatField()
+
+    def __init__(self, string, expression, **extra):
+        if not hasattr(string, 'resolve_expression'):
+            string = Value(string)
+        super().__init__(string, expression, **extra)
@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_api.posts.imports import IMPORT_CHUNK_SIZE, import_posts
+from blog_api.users.models import User
+
+
+class Command(BaseCommand):
+    '''
+    --Import posts--
+    Bulk imports posts from a JSON Lines file with import_posts, chunk_size posts validated and inserted at a time. Every
+    line needs an author pub_id unless --author is passed. Rejected lines are written to stderr with their line number.
+    '''
+    help = 'Bulk import posts from a JSON Lines file, one post per line.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON Lines file to import, - reads stdin.')
+        parser.add_argument('--author', help='Email of the user every post is imported for.')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Posts inserted per chunk.')
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            try:
+                author = User.objects.get(email=options['author'], is_active=True)
+            except User.DoesNotExist:
+                raise CommandError(f'No active user found with email {options["author"]}.')
+
+        start = time.perf_counter()
+        if options['path'] == '-':
+            result = import_posts(sys.stdin, author=author, chunk_size=options['chunk_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                result = import_posts(lines, author=author, chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - start
+
+        for error in result['errors']:
+            self.stderr.write(f'Line {error["line"]}: {error["message"]}')
+
+        rate = result['imported'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result["imported"]} posts, {result["failed"]} failed in {elapsed:.1f}s ({rate:.0f} posts/s).'
+        ))
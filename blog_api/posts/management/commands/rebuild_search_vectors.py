@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.contrib.postgres.search import SearchVector
+
+from blog_api.posts.models import Post
+
+
+# Same weights and config as the posts_post_search_vector_trigger installed by migration 0021.
+SEARCH_VECTOR = SearchVector('title', weight='A', config='english') + SearchVector('content', weight='B', config='english')
+
+
+class Command(BaseCommand):
+    '''
+    --Rebuild search vectors--
+    Rewrites Post.search_vector for every post in batches of post ids, one UPDATE per batch. The database trigger keeps
+    vectors current on insert and on title/content updates, this backfills rows written before it or after a config change.
+    '''
+    help = 'Rebuild the stored full text search vector of every post in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts rewritten per UPDATE.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        rebuilt = 0
+        last_id = 0
+        while True:
+            batch_ids = list(
+                Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+            rebuilt += Post.objects.filter(id__in=batch_ids).update(search_vector=SEARCH_VECTOR)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} search vectors.'))
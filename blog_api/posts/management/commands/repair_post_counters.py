@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from blog_api.posts.models import Post, Reaction
+
+
+def count_subquery(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ), 0
+    )
+
+
+class Command(BaseCommand):
+    '''
+    --Repair post counters--
+    Recomputes likes_count, dislikes_count, bookmarks_count and score from the reaction and bookmark rows in batches of
+    post ids and rewrites only the posts whose stored counters drifted.
+    '''
+    help = 'Recompute the stored like, dislike and bookmark counters on posts and repair any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts checked per UPDATE.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted posts without fixing them.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        likes = count_subquery(Reaction.objects.filter(post=OuterRef('pk'), value=Reaction.LIKE), 'post')
+        dislikes = count_subquery(Reaction.objects.filter(post=OuterRef('pk'), value=Reaction.DISLIKE), 'post')
+        bookmarks = count_subquery(Post.bookmarks.through.objects.filter(post=OuterRef('pk')), 'post')
+
+        checked = 0
+        repaired = 0
+        last_id = 0
+        while True:
+            batch_ids = list(
+                Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+            checked += len(batch_ids)
+
+            drifted_ids = list(
+                Post.objects.filter(id__in=batch_ids)
+                            .annotate(real_likes=likes, real_dislikes=dislikes, real_bookmarks=bookmarks)
+                            .filter(
+                                ~Q(likes_count=F('real_likes')) |
+                                ~Q(dislikes_count=F('real_dislikes')) |
+                                ~Q(bookmarks_count=F('real_bookmarks')) |
+                                ~Q(score=F('real_likes') - F('real_dislikes'))
+                            )
+                            .values_list('id', flat=True)
+            )
+            if not drifted_ids:
+                continue
+
+            if not dry_run:
+                with transaction.atomic():
+                    Post.objects.filter(id__in=drifted_ids).update(
+                        likes_count=likes, dislikes_count=dislikes, bookmarks_count=bookmarks,
+                        score=likes - dislikes
+                    )
+            repaired += len(drifted_ids)
+
+        action = 'would be repaired' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} posts, {repaired} {action}.'))
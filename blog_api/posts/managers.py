@@ -1,89 +1,142 @@
-from django.db import models
-from django.db.models import Count, F
-from django.contrib.postgres.aggregates import StringAgg
-from django.contrib.postgres.search import (
-    SearchQuery, SearchRank, SearchVector, TrigramSimilarity,
-)
+import re
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
+from django.contrib.postgres.search import SearchQuery, SearchRank
+
+from blog_api.posts.lookups import TrigramWordSimilarity
+
+
+@contextmanager
+def fuzzy_search_threshold(using=DEFAULT_DB_ALIAS):
+    '''
+    Lowers pg_trgm's word similarity threshold, which %> matches above, from its default of 0.6 that misses most
+    typos to POST_SEARCH_FUZZY_THRESHOLD for the queries run within the block. Set with SET LOCAL semantics in
+    a transaction (a savepoint within ATOMIC_REQUESTS) and reset on the way out, so it never reaches other
+    queries on a persistent connection.
+    '''
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(settings.POST_SEARCH_FUZZY_THRESHOLD)],
+            )
+        yield
+        with connections[using].cursor() as cursor:
+            cursor.execute('SET LOCAL pg_trgm.word_similarity_threshold TO DEFAULT')
 
 
 class PostQuerySet(models.QuerySet):
 
-    def search(self, search_text):
-        search_vectors = (
-            SearchVector(
-                'title', weight='A', config='english'
-            ) +
-            SearchVector(
-                StringAgg(
-                    'content', delimiter=' '
-                ), weight='B', config='english',
-            )
+    def search(self, search_text, mode=None):
+        '''
+        Full text search ranked on the stored search_vector.
+        mode='prefix' matches every word as a prefix e.g. while typing. mode='fuzzy' matches titles by trigram word
+        similarity of at least POST_SEARCH_FUZZY_THRESHOLD so misspelt terms still match, served by the title
+        gin_trgm_ops index. Fuzzy searches must be evaluated within `fuzzy_search_threshold()`.
+        '''
+        posts = (
+            self.prefetch_related('tags')
+                .select_related('author')
+                .filter(is_active=True)
         )
-        search_query = SearchQuery(
-            search_text, config='english',
+        if mode == 'fuzzy':
+            return (
+                posts.filter(title__trigram_word_similar=search_text)
+                    .annotate(rank=TrigramWordSimilarity(search_text, 'title'))
+                    .order_by('-rank', '-id')
+            )
 
-        )
-        search_rank = SearchRank(search_vectors, search_query)
-        trigram_similarity = TrigramSimilarity('title', search_text)
+        if mode == 'prefix':
+            terms = re.findall(r'\w+', search_text)
+            search_query = SearchQuery(
+                ' & '.join(f'{term}:*' for term in terms), search_type='raw', config='english',
+            )
+        else:
+            search_query = SearchQuery(
+                search_text, config='english',
+            )
         return (
-            self.filter(search_vector=search_query, is_active=True)
-                .select_related('author')
-                .select_related('previouspost')
-                .select_related('nextpost')
-                .annotate(rank=search_rank + trigram_similarity)
-                .order_by('-rank')
+            posts.filter(search_vector=search_query)
+                .annotate(rank=SearchRank(F('search_vector'), search_query))
+                .order_by('-rank', '-id')
         )
+
     def featured(self):
         return (
-            self.prefetch_related('bookmarks')
-                .prefetch_related('tags')
+            self.prefetch_related('tags')
                 .select_related('author')
                 .select_related('previouspost')
                 .select_related('nextpost')
                 .filter(is_active=True, featured=True)
+                .order_by('-created_at', '-id')
         )
 
     def most_liked(self):
         return (
-            self.prefetch_related('bookmarks')
-                .prefetch_related('tags')
+            self.prefetch_related('tags')
                 .select_related('author')
                 .select_related('previouspost')
                 .select_related('nextpost')
                 .filter(is_active=True)
-                .order_by('-score')
+                .order_by('-score', '-id')
         )
 
     def most_disliked(self):
         return (
-            self.prefetch_related('bookmarks')
-                .prefetch_related('tags')
+            self.prefetch_related('tags')
                 .select_related('author')
                 .select_related('previouspost')
                 .select_related('nextpost')
                 .filter(is_active=True)
-                .order_by('score')
+                .order_by('score', 'id')
         )
 
     def oldest_posts(self):
         return (
-            self.prefetch_related('bookmarks')
-                .prefetch_related('tags')
+            self.prefetch_related('tags')
                 .select_related('author')
-                .select_related('previouspost')
-                .select_related('nextpost')
-                .filter(is_active=True).order_by('created_at')
+                .filter(is_active=True)
+                .order_by('created_at', 'id')
         )
 
     def most_bookmarked(self):
         return (
-            self.prefetch_related('bookmarks')
-                .prefetch_related('tags')
+            self.prefetch_related('tags')
                 .select_related('author')
                 .select_related('previouspost').select_related('nextpost')
                 .filter(is_active=True)
-                .annotate(bookmark_count=Count(F('bookmarks')))
-                .order_by('-bookmark_count')
+                .order_by('-bookmarks_count', '-id')
+        )
+
+    def following_feed(self, user):
+        '''
+        Active posts by the users this user follows. One query, the follow rows are an IN subquery
+        so the cost does not grow with the number of follows. The subquery resolves the follows to user ids,
+        which the planner estimates well and serves from the author index, where an author__pub_id join had
+        it walking the created_at index past every other author's posts.
+        '''
+        return (
+            self.prefetch_related('tags')
+                .select_related('author')
+                .filter(author__in=type(user).objects.filter(pub_id__in=user.following.values('following')))
+                .filter(is_active=True)
+        )
+
+    def follower_feed(self, user):
+        '''
+        Active posts by the users following this user, resolved to user ids like following_feed.
+        '''
+        return (
+            self.prefetch_related('tags')
+                .select_related('author')
+                .filter(author__in=type(user).objects.filter(pub_id__in=user.followers.values('user')))
+                .filter(is_active=True)
         )
 
 class PostManager(models.Manager):
@@ -91,8 +144,8 @@ class PostManager(models.Manager):
     def get_queryset(self):
         return PostQuerySet(self.model, using=self._db)
 
-    def search(self, search_text):
-        return self.get_queryset().search(search_text)
+    def search(self, search_text, mode=None):
+        return self.get_queryset().search(search_text, mode=mode)
 
     def featured(self):
         return self.get_queryset().featured()
@@ -109,11 +162,30 @@ class PostManager(models.Manager):
     def most_bookmarked(self):
         return self.get_queryset().most_bookmarked()
 
+    def following_feed(self, user):
+        return self.get_queryset().following_feed(user)
+
+    def follower_feed(self, user):
+        return self.get_queryset().follower_feed(user)
+
 
 class TagQuerySet(models.QuerySet):
 
     def highest_post_count(self):
-        return self.annotate(posts_total=Count(F('posts'))).order_by('-posts_total')
+        return self.order_by('-post_count', 'name')
+
+    def refresh_post_counts(self):
+        '''
+        Recomputes the stored post_count of these tags from their active posts with one UPDATE.
+        '''
+        active_posts = (
+            self.model.posts.through.objects.filter(tag=OuterRef('pk'), post__is_active=True)
+                .order_by()
+                .values('tag')
+                .annotate(total=Count('*'))
+                .values('total')
+        )
+        return self.update(post_count=Coalesce(Subquery(active_posts, output_field=models.IntegerField()), 0))
 
 
 class TagManager(models.Manager):
@@ -121,20 +193,47 @@ class TagManager(models.Manager):
     def get_queryset(self):
         return TagQuerySet(self.model, using=self._db)
 
-    def create_or_new(self, name):
-        name = name.strip()
-        qs = self.get_queryset().filter(name__iexact=name)
-        if qs.exists():
-            return qs.first(), False
-        return self.get_queryset().create(name=name), True
+    def _by_lower_name(self, lower_names):
+        tags = {}
+        for tag in (
+            self.get_queryset()
+                .annotate(name_lower=Lower('name'))
+                .filter(name_lower__in=lower_names)
+                .order_by('id')
+        ):
+            tags.setdefault(tag.name_lower, tag)
+        return tags
 
     def comma_to_qs(self, tag_str):
-        final_ids = []
-        for tag in tag_str.split(','):
-            obj, created = self.create_or_new(tag)
-            final_ids.append(obj.id)
-        qs = self.get_queryset().filter(id__in=final_ids).distinct()
-        return qs
+        '''
+        Resolves a comma separated string of tag names to a list of tags, creating the missing ones.
+        1) Strips the names and drops blanks and case-insensitive duplicates, the first spelling wins.
+        2) Matches every existing tag with one IN query on lower(name), served by posts_tag_name_lower_idx.
+        3) Inserts the missing tags with one bulk_create and reads them back. A tag inserted by a concurrent
+           request in between is skipped by ignore_conflicts and picked up by the read.
+        '''
+        names = {}
+        for name in tag_str.split(','):
+            name = name.strip()
+            if name:
+                names.setdefault(name.lower(), name)  # 1
+        if not names:
+            return []
+
+        tags = self._by_lower_name(list(names))  # 2
+        missing = [lower_name for lower_name in names if lower_name not in tags]
+        if missing:
+            now = timezone.now()
+            self.bulk_create([
+                self.model(name=names[lower_name], pub_id=uuid.uuid4().hex, created_at=now, updated_at=now)
+                for lower_name in missing
+            ], ignore_conflicts=True)  # 3
+            tags.update(self._by_lower_name(missing))
+
+        return [tags[lower_name] for lower_name in names if lower_name in tags]
 
     def highest_post_count(self):
         return self.get_queryset().highest_post_count()
+
+    def refresh_post_counts(self):
+        return self.get_queryset().refresh_post_counts()
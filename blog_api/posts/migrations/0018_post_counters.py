@@ -0,0 +1,54 @@
+# Generated by Django 3.1.13 on 2021-08-06 16:40
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ), 0
+    )
+
+
+def populate_post_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('posts', 'Like')
+    DisLike = apps.get_model('posts', 'DisLike')
+
+    likes = count_subquery(Like.users.through.objects.filter(like__post=OuterRef('pk')), 'like__post')
+    dislikes = count_subquery(DisLike.users.through.objects.filter(dislike__post=OuterRef('pk')), 'dislike__post')
+    bookmarks = count_subquery(Post.bookmarks.through.objects.filter(post=OuterRef('pk')), 'post')
+
+    Post.objects.update(
+        likes_count=likes, dislikes_count=dislikes, bookmarks_count=bookmarks, score=likes - dislikes
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='bookmarks_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='dislikes_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.1.13 on 2021-08-08 11:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+COPY_LIKES_TO_REACTIONS = '''
+    INSERT INTO posts_reaction (created_at, updated_at, post_id, user_id, value)
+    SELECT now(), now(), l.post_id, lu.user_id, 1
+    FROM posts_like_users lu INNER JOIN posts_like l ON l.id = lu.like_id
+    ON CONFLICT DO NOTHING;
+    INSERT INTO posts_reaction (created_at, updated_at, post_id, user_id, value)
+    SELECT now(), now(), d.post_id, du.user_id, -1
+    FROM posts_dislike_users du INNER JOIN posts_dislike d ON d.id = du.dislike_id
+    ON CONFLICT DO NOTHING;
+'''
+
+COPY_REACTIONS_TO_LIKES = '''
+    INSERT INTO posts_like (created_at, updated_at, post_id) SELECT now(), now(), id FROM posts_post;
+    INSERT INTO posts_dislike (created_at, updated_at, post_id) SELECT now(), now(), id FROM posts_post;
+    INSERT INTO posts_like_users (like_id, user_id)
+    SELECT l.id, r.user_id FROM posts_reaction r INNER JOIN posts_like l ON l.post_id = r.post_id WHERE r.value = 1;
+    INSERT INTO posts_dislike_users (dislike_id, user_id)
+    SELECT d.id, r.user_id FROM posts_reaction r INNER JOIN posts_dislike d ON d.post_id = r.post_id WHERE r.value = -1;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_post_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(editable=False, null=True)),
+                ('value', models.SmallIntegerField(choices=[(1, 'Like'), (-1, 'Dislike')])),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('post', 'user'), name='unique_post_reaction'),
+        ),
+        migrations.AddIndex(
+            model_name='reaction',
+            index=models.Index(fields=['post', 'value', 'user'], name='reaction_post_value_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reaction',
+            index=models.Index(fields=['user', 'value', 'post'], name='reaction_user_value_post_idx'),
+        ),
+        migrations.RunSQL(COPY_LIKES_TO_REACTIONS, COPY_REACTIONS_TO_LIKES),
+        migrations.DeleteModel(
+            name='DisLike',
+        ),
+        migrations.DeleteModel(
+            name='Like',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.13 on 2021-08-08 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_reaction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_active=True), fields=['-score', '-id'], name='post_active_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_active=True), fields=['-bookmarks_count', '-id'], name='post_active_bookmarks_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('featured', True), ('is_active', True)), fields=['-created_at', '-id'], name='post_featured_created_idx'),
+        ),
+    ]
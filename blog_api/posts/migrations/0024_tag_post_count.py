@@ -0,0 +1,28 @@
+# Generated by Django 3.1.13 on 2021-08-16 09:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_tag_name_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql='''
+                UPDATE posts_tag t SET post_count = (
+                    SELECT count(*) FROM posts_post_tags pt
+                    JOIN posts_post p ON p.id = pt.post_id
+                    WHERE pt.tag_id = t.id AND p.is_active
+                );
+            ''',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -2,8 +2,10 @@ import uuid
 from datetime import timedelta
 
 from django.conf import settings
-from django.db.models import Manager, Model, DateTimeField, TextField, CharField, EmailField, IntegerField, \
-                                                        BooleanField,  ForeignKey, ManyToManyField, OneToOneField, SlugField, CASCADE, SET_NULL
+from django.db import transaction
+from django.db.models import F, Q, Manager, Model, Index, DateTimeField, TextField, CharField, EmailField, IntegerField, \
+                                                        BooleanField,  ForeignKey, ManyToManyField, SlugField, SmallIntegerField, UniqueConstraint, \
+                                                        CASCADE, SET_NULL
 from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
@@ -16,6 +18,7 @@ User = get_user_model()
 from blog_api.users.model_validators import validate_min_3_characters, validate_no_special_chars
 from blog_api.posts.validators import validate_min_8_words
 from blog_api.posts.managers import PostManager, TagManager
+from blog_api.posts.cache import invalidate_post_detail
 
 
 class BaseModel(Model):
@@ -42,10 +45,15 @@ class Tag(BaseModel):
         blank=False, null=False, max_length=30, unique=True, 
         validators=[validate_no_special_chars, validate_min_3_characters]
     )
+    post_count = IntegerField(editable=False, default=0)
 
     objects = Manager()
     items = TagManager()
 
+    # Active posts with this tag. Maintained with F() expressions by the receivers in signals.py and
+    # reconciled by the refresh_tag_post_counts task, never written by save().
+    COUNTER_FIELDS = ('post_count',)
+
     class Meta:
         ordering = ['name']
 
@@ -53,7 +61,7 @@ class Tag(BaseModel):
         return self.name
 
     def get_post_count(self):
-        return self.posts.filter(is_active=True).count()
+        return self.post_count
 
     def save(self, *args, **kwargs):
         '''
@@ -62,6 +70,13 @@ class Tag(BaseModel):
         '''
         if not self.id:
             self.pub_id = str(uuid.uuid4().hex)
+
+        if self.id and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [  # a stale instance must not overwrite the post count
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+
         return super(Tag, self).save(*args, **kwargs)
 
 
@@ -82,18 +97,43 @@ class Post(BaseModel):
     search_vector = SearchVectorField(editable=False, null=True)
     tags = ManyToManyField(Tag, related_name='posts', blank=True)
     score = IntegerField(editable=False, default=0)
+    likes_count = IntegerField(editable=False, default=0)
+    dislikes_count = IntegerField(editable=False, default=0)
+    bookmarks_count = IntegerField(editable=False, default=0)
 
     objects = Manager()
     items = PostManager()
 
+    # Maintained with F() expressions by the m2m_changed receivers in signals.py, never written by save().
+    COUNTER_FIELDS = ('score', 'likes_count', 'dislikes_count', 'bookmarks_count',)
+    # Never written by save(). search_vector is set by the posts_post_search_vector_trigger (migration 0021).
+    DATABASE_MAINTAINED_FIELDS = COUNTER_FIELDS + ('search_vector',)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Posts'
-        indexes = [GinIndex(fields=['search_vector'])]
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            GinIndex(fields=['title'], name='post_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            Index(fields=['author', '-created_at', '-id'], name='post_author_created_id_idx'),
+            Index(fields=['-score', '-id'], name='post_active_score_idx', condition=Q(is_active=True)),
+            Index(fields=['-bookmarks_count', '-id'], name='post_active_bookmarks_idx', condition=Q(is_active=True)),
+            Index(
+                fields=['-created_at', '-id'], name='post_featured_created_idx', condition=Q(is_active=True, featured=True)
+            ),
+            Index(fields=['updated_at', 'id'], name='post_updated_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        post._loaded_is_active = post.__dict__.get('is_active')  # lets signals.py tell a soft delete from a save
+        return post
+
     def get_overview(self):
         return self.content[:300]
 
@@ -117,9 +157,9 @@ class Post(BaseModel):
             _get_unique_slug(self)
         return unique_slug
 
-    def bookmark(self, pubid):
+    def bookmark(self, pubid=None, user=None):
         '''
-        Bookmarks this post with provided user.
+        Bookmarks this post with the provided user, or the user looked up by pubid.
         '''
         if not self.is_active:
             return {
@@ -127,7 +167,8 @@ class Post(BaseModel):
                 'message': 'Post inactive. Can not bookmark.'
             }
         try:
-            user = User.objects.get(pub_id=pubid)
+            if user is None:
+                user = User.objects.get(pub_id=pubid)
             if not user.is_active:
                 raise User.DoesNotExist()
         except User.DoesNotExist:
@@ -136,13 +177,13 @@ class Post(BaseModel):
                 'message': 'No user found with provided id.'
             }
 
-        if self.author == user:
+        if self.author_id == user.pk:
             return {
                 'bookmarked': False,
                 'message': 'You can not bookmark your own post.'
             }
 
-        if not user in self.bookmarks.all():
+        if not self.bookmarks.filter(pk=user.pk).exists():
             self.bookmarks.add(user)
             self.save()
             return {
@@ -158,24 +199,63 @@ class Post(BaseModel):
             }
 
     def get_bookmark_count(self):
-        return self.bookmarks.all().count()
+        return self.bookmarks_count
 
     def get_likes_count(self):
-        return self.likes.users.all().count()
+        return self.likes_count
 
     def get_dislikes_count(self):
-        return self.dislikes.users.all().count()
+        return self.dislikes_count
 
     def get_like_score(self):
-        return self.get_likes_count() - self.get_dislikes_count()
+        return self.likes_count - self.dislikes_count
 
     def set_like_score(self):
-        try:
-            self.score = self.get_likes_count() - self.get_dislikes_count()
-            self.save()
-        except (Post.likes.RelatedObjectDoesNotExist, Post.dislikes.RelatedObjectDoesNotExist):
-            self.score = 0
-            self.save()
+        '''
+        Resyncs the score from the stored counters and refreshes them on this instance.
+        '''
+        Post.objects.filter(pk=self.pk).update(score=F('likes_count') - F('dislikes_count'))
+        self.refresh_from_db(fields=self.COUNTER_FIELDS)
+
+    def react(self, user, like):
+        '''
+        Likes or dislikes this post for the provided user in one transaction.
+        1) Flips an existing opposite reaction with a single UPDATE on the (post, user) unique index.
+        2) Otherwise inserts the reaction. If it already exists with the same value nothing changes.
+        3) Moves the counters and score with one F() update, cost does not depend on post popularity.
+        '''
+        from blog_api.posts.rankings import update_post_rankings  # avoid circular imports
+
+        if like == 'like':
+            value, counter, opposite_counter = Reaction.LIKE, 'likes_count', 'dislikes_count'
+            message = f'{user.username} liked {self.slug} successfully.'
+        else:
+            value, counter, opposite_counter = Reaction.DISLIKE, 'dislikes_count', 'likes_count'
+            message = f'{user.username} disliked {self.slug} successfully.'
+
+        with transaction.atomic():
+            flipped = Reaction.objects.filter(post_id=self.pk, user_id=user.pk).exclude(value=value).update(  # 1
+                value=value, updated_at=timezone.now()
+            )
+            if flipped:
+                counters = {
+                    counter: F(counter) + 1, opposite_counter: F(opposite_counter) - 1, 'score': F('score') + 2 * value
+                }
+            else:
+                reaction, created = Reaction.objects.get_or_create(  # 2
+                    post_id=self.pk, user_id=user.pk, defaults={'value': value}
+                )
+                counters = {counter: F(counter) + 1, 'score': F('score') + value} if created else None
+
+            if counters:
+                Post.objects.filter(pk=self.pk).update(**counters)  # 3
+                invalidate_post_detail(self.slug)
+                update_post_rankings(self.pk)
+
+        return {
+            'liked': value == Reaction.LIKE,
+            'message': message
+        }
 
     def save(self, *args, **kwargs):
         if not self.id:
@@ -198,81 +278,45 @@ class Post(BaseModel):
                 )
 
         self.estimated_reading_time = self._get_estimated_reading_time()
-        
-        return super(Post, self).save(*args, **kwargs)
-
-    def __str__(self):
-        return self.title
 
+        if self.id and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [  # a stale instance must not overwrite the counters or search vector
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DATABASE_MAINTAINED_FIELDS
+            ]
 
-class Like(BaseModel):
-    post = OneToOneField(Post, null=False, on_delete=CASCADE, related_name='likes')
-    users = ManyToManyField(User, related_name='post_likes')
-
-    class Meta:
-        ordering = ['-created_at',]
+        return super(Post, self).save(*args, **kwargs)
 
     def __str__(self):
-        return f'{self.users.all().count()} likes for {self.post.slug}'
-
-    def like(self, pubid):
-        try:
-            user = User.objects.get(pub_id=pubid)
-            if not user.is_active:
-                raise User.DoesNotExist()
-        except User.DoesNotExist:
-            return {
-                'liked': False,
-                'message': 'No user found with provided id.'
-            }
-       
-        if user in self.post.dislikes.users.all():
-            self.post.dislikes.users.remove(user)
-            self.post.save()
+        return self.title
 
-        if not user in self.users.all():
-            self.users.add(user)
-            self.save()
-
-        self.post.set_like_score()
-        return {
-            'liked': True,
-            'message': f'{user.username} liked {self.post.slug} successfully.'
-        }
 
+class Reaction(BaseModel):
+    '''
+    A user's like (1) or dislike (-1) of a post. One row per (post, user), the covering indexes let
+    both "who reacted to this post" and "what did this user react to" run as single index scans.
+    '''
+    LIKE = 1
+    DISLIKE = -1
+    VALUE_CHOICES = (
+        (LIKE, 'Like'),
+        (DISLIKE, 'Dislike'),
+    )
 
-class DisLike(BaseModel):
-    post = OneToOneField(Post, null=False, on_delete=CASCADE, related_name='dislikes')
-    users = ManyToManyField(User, related_name='post_dislikes')
+    post = ForeignKey(Post, on_delete=CASCADE, related_name='reactions')
+    user = ForeignKey(User, on_delete=CASCADE, related_name='reactions')
+    value = SmallIntegerField(choices=VALUE_CHOICES)
 
     class Meta:
         ordering = ['-created_at',]
-        verbose_name_plural = 'Dislikes'
+        constraints = [
+            UniqueConstraint(fields=['post', 'user'], name='unique_post_reaction')
+        ]
+        indexes = [
+            Index(fields=['post', 'value', 'user'], name='reaction_post_value_user_idx'),
+            Index(fields=['user', 'value', 'post'], name='reaction_user_value_post_idx'),
+            Index(fields=['updated_at', 'id'], name='reaction_updated_id_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.users.all().count()} dislikes for {self.post.slug}'
-
-    def dislike(self, pubid):
-        try:
-            user = User.objects.get(pub_id=pubid)
-            if not user.is_active:
-                raise User.DoesNotExist()
-        except User.DoesNotExist:
-            return {
-                'liked': False,
-                'message': 'No user found with provided id.'
-            }
-        
-        if user in self.post.likes.users.all():
-            self.post.likes.users.remove(user)
-            self.post.save()
-
-        if not user in self.users.all():
-            self.users.add(user)
-            self.save()
-
-        self.post.set_like_score()
-        return {
-            'liked': False,
-            'message': f'{user.username} disliked {self.post.slug} successfully.'
-        }
+        return f'{self.user} {self.get_value_display().lower()}s {self.post.slug}'
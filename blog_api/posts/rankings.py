@@ -0,0 +1,211 @@
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from blog_api.posts.models import Post
+
+
+# ranking: (PostManager method with the ranking's filters, ordering of stable keys ending in id)
+RANKINGS = {
+    'featured': ('featured', ('-created_at', '-id',)),
+    'most_liked': ('most_liked', ('-score', '-id',)),
+    'most_disliked': ('most_disliked', ('score', 'id',)),
+    'most_bookmarked': ('most_bookmarked', ('-bookmarks_count', '-id',)),
+}
+
+RANKING_KEY = 'posts:ranking:{ranking}'
+RANKING_FIELDS = ('id', 'is_active', 'featured', 'created_at', 'score', 'bookmarks_count',)
+
+# Moves one post within a ranking's sorted set, if the ranking is built, and trims it to its size.
+# KEYS[1] ranking, ARGV post member, its score ('' to remove it), 1 if the ranking is descending, ranking size.
+UPDATE_RANKING_SCRIPT = '''
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+else
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+end
+local size = tonumber(ARGV[4])
+if ARGV[3] == '1' then
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -size - 1)
+else
+    redis.call('ZREMRANGEBYRANK', KEYS[1], size, -1)
+end
+return 1
+'''
+
+
+def _get_sort_key(ordering, values):
+    '''
+    Turns a post's ranking values into an ascending sort key e.g. ('-score', '-id') -> (-score, -id).
+    '''
+    sort_key = []
+    for field in ordering:
+        value = values[field.lstrip('-')]
+        if hasattr(value, 'timestamp'):
+            value = value.timestamp()
+        sort_key.append(-value if field.startswith('-') else value)
+    return tuple(sort_key)
+
+
+def _in_ranking(ranking, values):
+    return values['is_active'] and (ranking != 'featured' or values['featured'])
+
+
+def _get_ranking_values(ranking):
+    '''
+    The ranking values of the top POST_RANKING_SIZE posts of a ranking, in order. One index scan.
+    '''
+    manager_method, ordering = RANKINGS[ranking]
+    return (
+        getattr(Post.items, manager_method)()
+            .prefetch_related(None)
+            .select_related(None)
+            .order_by(*ordering)
+            .values(*RANKING_FIELDS)[:settings.POST_RANKING_SIZE]
+    )
+
+
+class CacheRankings:
+    '''
+    --Cache post rankings--
+    Each ranking is a list of (sort key, post id) in the default cache, for caches other than Redis (local
+    and test runs). Updates rewrite the whole list and may race each other, the periodic
+    `refresh_post_rankings` task reconciles them.
+    '''
+
+    def build(self, ranking):
+        ordering = RANKINGS[ranking][1]
+        entries = [(_get_sort_key(ordering, values), values['id']) for values in _get_ranking_values(ranking)]
+        cache.set(RANKING_KEY.format(ranking=ranking), entries, timeout=settings.POST_RANKING_TIMEOUT)
+        return [post_id for sort_key, post_id in entries]
+
+    def get_ids(self, ranking):
+        entries = cache.get(RANKING_KEY.format(ranking=ranking))
+        if entries is None:
+            return self.build(ranking)
+        return [post_id for sort_key, post_id in entries]
+
+    def update(self, post_id, values):
+        for ranking, (manager_method, ordering) in RANKINGS.items():
+            key = RANKING_KEY.format(ranking=ranking)
+            entries = cache.get(key)
+            if entries is None:
+                continue  # built from the database on the next read
+            entries = [entry for entry in entries if entry[1] != post_id]
+            if values and _in_ranking(ranking, values):
+                entries.append((_get_sort_key(ordering, values), post_id))
+                entries.sort()
+            cache.set(key, entries[:settings.POST_RANKING_SIZE], timeout=settings.POST_RANKING_TIMEOUT)
+
+
+class RedisRankings:
+    '''
+    --Redis post rankings--
+    Each ranking is a Redis sorted set of post ids scored by the ranking's first ordering field, on the
+    POST_RANKING_CACHE django-redis cache's server. Ids are zero padded so ties are broken by id, as they are
+    in the database. Reads are one ZRANGE and a post moves with one atomic script per ranking, so there
+    is nothing to lock. When Redis is down rankings are read from the database and updates are dropped,
+    like the cache ignores its errors.
+    '''
+
+    def __init__(self):
+        self.cache = caches[settings.POST_RANKING_CACHE]
+        self.redis = get_redis_connection(settings.POST_RANKING_CACHE)
+        self.update_ranking = self.redis.register_script(UPDATE_RANKING_SCRIPT)
+
+    def get_key(self, ranking):
+        return self.cache.make_key(RANKING_KEY.format(ranking=ranking))
+
+    @staticmethod
+    def get_member(post_id):
+        return f'{post_id:020d}'
+
+    @staticmethod
+    def get_score(ranking, values):
+        value = values[RANKINGS[ranking][1][0].lstrip('-')]
+        return value.timestamp() if hasattr(value, 'timestamp') else value
+
+    @staticmethod
+    def is_descending(ranking):
+        return RANKINGS[ranking][1][0].startswith('-')
+
+    def build(self, ranking):
+        posts = list(_get_ranking_values(ranking))
+        try:
+            pipeline = self.redis.pipeline()
+            pipeline.delete(self.get_key(ranking))
+            if posts:
+                pipeline.zadd(self.get_key(ranking), {
+                    self.get_member(values['id']): self.get_score(ranking, values) for values in posts
+                })
+                pipeline.expire(self.get_key(ranking), settings.POST_RANKING_TIMEOUT)
+            pipeline.execute()
+        except RedisError:
+            pass
+        return [values['id'] for values in posts]
+
+    def get_ids(self, ranking):
+        zrange = self.redis.zrevrange if self.is_descending(ranking) else self.redis.zrange
+        try:
+            members = zrange(self.get_key(ranking), 0, settings.POST_RANKING_SIZE - 1)
+        except RedisError:
+            return [values['id'] for values in _get_ranking_values(ranking)]
+        if not members:
+            return self.build(ranking)
+        return [int(member) for member in members]
+
+    def update(self, post_id, values):
+        pipeline = self.redis.pipeline()
+        for ranking in RANKINGS:
+            score = self.get_score(ranking, values) if values and _in_ranking(ranking, values) else ''
+            self.update_ranking(
+                keys=[self.get_key(ranking)],
+                args=[self.get_member(post_id), score, int(self.is_descending(ranking)), settings.POST_RANKING_SIZE],
+                client=pipeline,
+            )
+        try:
+            pipeline.execute()
+        except RedisError:
+            pass  # left for the periodic refresh to pick up
+
+
+def get_rankings():
+    return import_string(settings.POST_RANKING_BACKEND)()
+
+
+def build_ranking(ranking):
+    '''
+    Rebuilds a ranking from the database. Returns its ordered post ids.
+    '''
+    return get_rankings().build(ranking)
+
+
+def get_ranking_ids(ranking):
+    '''
+    Returns the ordered post ids of a ranking, building it on a miss.
+    '''
+    return get_rankings().get_ids(ranking)
+
+
+def _update_rankings(post_id):
+    values = Post.objects.filter(pk=post_id).values(*RANKING_FIELDS).first()
+    get_rankings().update(post_id, values)
+
+
+def update_post_rankings(post_id):
+    '''
+    --Incremental ranking update--
+    ==========================================================================================================
+    Moves one post within every cached ranking after its counters or flags changed, without rebuilding the
+    rankings. Runs once the transaction commits, so rolled back changes never reach the rankings and the
+    committed values are read. Updates that are lost are reconciled by the periodic `refresh_post_rankings` task.
+    ==========================================================================================================
+    '''
+    transaction.on_commit(lambda: _update_rankings(post_id))
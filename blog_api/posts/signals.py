@@ -1,21 +1,224 @@
-from django.db.models.signals import post_save
+from collections import Counter, defaultdict
+
+from django.db.models import F, Q
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.db import transaction
-from django.contrib.postgres.search import SearchVector
 
-from blog_api.posts.models import Post, Like, DisLike
+from blog_api.posts.models import Tag, Post, Reaction
+from blog_api.users.models import User
+from blog_api.posts.cache import invalidate_post_detail
+from blog_api.posts.rankings import update_post_rankings
+
+
+# through model: (owner column, target column, post lookup for owner ids, {counter: weight})
+COUNTED_RELATIONS = {
+    Post.bookmarks.through: ('post_id', 'user_id', 'id__in', {'bookmarks_count': 1}),
+}
+
+# through model: Post field the relation is reached by from the other side
+DETAIL_RELATIONS = {
+    Post.tags.through: 'tags',
+    Post.bookmarks.through: 'bookmarks',
+}
+
+
+@receiver(post_delete, sender=Reaction)
+def remove_reaction_from_post_counters(sender, instance, **kwargs):
+    '''
+    Reactions are added and flipped through Post.react() which moves the counters itself. Deletes can come
+    from anywhere (admin, user cascades) so they are taken off the counters here.
+    '''
+    counter = 'likes_count' if instance.value == Reaction.LIKE else 'dislikes_count'
+    Post.objects.filter(pk=instance.post_id).update(**{
+        counter: F(counter) - 1,
+        'score': F('score') - instance.value,
+    })
+    invalidate_post_detail(*Post.objects.filter(pk=instance.post_id).values_list('slug', flat=True))
+    update_post_rankings(instance.post_id)
+
+
+def _update_post_counters(sender, owner_ids, sign):
+    '''
+    Applies +/- deltas to the post counters for every changed through row. Rows are grouped by how many
+    times their owner changed so adding n users to one post, or one user to n posts, is one UPDATE.
+    '''
+    post_lookup, counters = COUNTED_RELATIONS[sender][2:]
+    owners_by_delta = defaultdict(list)
+    for owner_id, delta in Counter(owner_ids).items():
+        owners_by_delta[delta].append(owner_id)
+
+    for delta, owners in owners_by_delta.items():
+        Post.objects.filter(**{post_lookup: owners}).update(**{
+            counter: F(counter) + (sign * weight * delta) for counter, weight in counters.items()
+        })
+
+    for post_id in set(owner_ids):
+        update_post_rankings(post_id)
+
+
+@receiver(m2m_changed, sender=Post.bookmarks.through)
+def update_post_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    '''
+    Keeps Post.bookmarks_count in step with the m2m rows.
+    post_add only reports rows that were really inserted, removes and clears report what was asked for,
+    so the rows that really exist are collected before they are deleted.
+    '''
+    owner_field, target_field = COUNTED_RELATIONS[sender][:2]
+    pending = instance.__dict__.setdefault('_pending_counter_changes', {})
+
+    if action == 'post_add' and pk_set:
+        owner_ids = list(pk_set) if reverse else [instance.pk] * len(pk_set)
+        _update_post_counters(sender, owner_ids, 1)
+
+    elif action in ('pre_remove', 'pre_clear'):
+        if reverse:
+            rows = sender.objects.filter(**{target_field: instance.pk})
+            if action == 'pre_remove':
+                rows = rows.filter(**{f'{owner_field}__in': pk_set})
+        else:
+            rows = sender.objects.filter(**{owner_field: instance.pk})
+            if action == 'pre_remove':
+                rows = rows.filter(**{f'{target_field}__in': pk_set})
+        pending[sender] = list(rows.values_list(owner_field, flat=True))
+
+    elif action in ('post_remove', 'post_clear'):
+        _update_post_counters(sender, pending.pop(sender, []), -1)
 
 
 @receiver(post_save, sender=Post)
-def update_search_vectors(sender, instance, created, **kwargs):
-    search_vectors = SearchVector('title', weight='A') + SearchVector('content', weight='B')
-    if created:
-        instance.search_vector = search_vectors
-        instance.save()
+def invalidate_post_detail_on_save(sender, instance, created, **kwargs):
+    '''
+    Moves a saved post within the rankings (it may have been featured or deactivated) and drops its cached
+    detail and, since their next/previous post titles come from it, that of the posts linking to it.
+    '''
+    update_post_rankings(instance.pk)
+    slugs = [instance.slug]
+    if not created:
+        slugs += Post.objects.filter(Q(nextpost=instance) | Q(previouspost=instance)).values_list('slug', flat=True)
+    invalidate_post_detail(*slugs)
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_post_detail_on_tag_save(sender, instance, created, **kwargs):
+    '''
+    Drops the cached detail of the tag's posts. A new tag has none but still changes the tag lists.
+    '''
+    invalidate_post_detail(*([] if created else instance.posts.values_list('slug', flat=True)))
+
+
+@receiver(pre_delete, sender=Tag)
+def invalidate_post_detail_on_tag_delete(sender, instance, **kwargs):
+    '''
+    Deleting a tag cascades to its post rows without an m2m_changed signal, so its posts are collected first.
+    '''
+    invalidate_post_detail(*instance.posts.values_list('slug', flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_posts_on_author_rename(sender, instance, created, update_fields, **kwargs):
+    '''
+    Post lists show their author's username and post details their username and name. A user saved with a
+    different username or name than it was loaded with, recorded by User.from_db, drops the posts version and
+    the cached detail of its posts. Other saves (last login, verification, password...) leave them alone.
+    '''
+    loaded = instance.__dict__.get('_loaded_post_author_fields')
+    current = {field: instance.__dict__[field] for field in User.POST_AUTHOR_FIELDS if field in instance.__dict__}
+    instance._loaded_post_author_fields = current
+    if created or (update_fields is not None and not set(update_fields) & set(User.POST_AUTHOR_FIELDS)):
+        return
+    if loaded is not None and all(field in loaded and loaded[field] == value for field, value in current.items()):
+        return
+    invalidate_post_detail(*Post.objects.filter(author=instance).values_list('slug', flat=True))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Post.bookmarks.through)
+def invalidate_post_detail_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    '''
+    Drops the cached detail of posts whose tags or bookmarks changed. Clearing from the tag/user side
+    reports no pks so those posts are collected before the rows are gone.
+    '''
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_post_detail(instance.slug)
+        return
+
+    pending = instance.__dict__.setdefault('_pending_detail_invalidations', {})
+    if action == 'pre_clear':
+        posts = Post.objects.filter(**{DETAIL_RELATIONS[sender]: instance})
+        pending[sender] = list(posts.values_list('slug', flat=True))
+    elif action == 'post_clear':
+        invalidate_post_detail(*pending.pop(sender, []))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        invalidate_post_detail(*Post.objects.filter(pk__in=pk_set).values_list('slug', flat=True))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_post_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    '''
+    Keeps Tag.post_count, the number of active posts with the tag, in step with the m2m rows. Only rows of
+    active posts count. Removes and clears are counted before the rows go, in the same transaction.
+    '''
+    if action not in ('post_add', 'pre_remove', 'pre_clear') or (action == 'post_add' and not pk_set):
+        return
+    sign = 1 if action == 'post_add' else -1
+
+    rows = sender.objects.filter(post__is_active=True)
+    if reverse:
+        rows = rows.filter(tag_id=instance.pk)
+        if pk_set is not None:
+            rows = rows.filter(post_id__in=pk_set)
+        count = rows.count()
+        if count:
+            Tag.objects.filter(pk=instance.pk).update(post_count=F('post_count') + sign * count)
+    else:
+        rows = rows.filter(post_id=instance.pk)
+        if pk_set is not None:
+            rows = rows.filter(tag_id__in=pk_set)
+        Tag.objects.filter(id__in=rows.values('tag_id')).update(post_count=F('post_count') + sign)
 
 
 @receiver(post_save, sender=Post)
-def create_like_dislike_objects(sender, instance, created, **kwargs):
-    if created:
-        Like.objects.create(post=instance)
-        DisLike.objects.create(post=instance)
+def update_tag_post_counts_on_save(sender, instance, created, **kwargs):
+    '''
+    Moves the post's tags counts when it is soft deleted or reactivated. The is_active it was loaded with
+    is recorded by Post.from_db.
+    '''
+    was_active = instance.__dict__.get('_loaded_is_active')
+    instance._loaded_is_active = instance.is_active
+    if created or was_active is None or was_active == instance.is_active:
+        return
+    Tag.objects.filter(posts=instance).update(post_count=F('post_count') + (1 if instance.is_active else -1))
+
+
+@receiver(pre_delete, sender=Post)
+def remove_post_from_tag_post_counts(sender, instance, **kwargs):
+    '''
+    Deleting a post cascades to its tag rows without an m2m_changed signal, so an active post is taken off
+    its tags counts before the rows go.
+    '''
+    if instance.is_active:
+        Tag.objects.filter(posts=instance).update(post_count=F('post_count') - 1)
+
+
+@receiver(pre_delete, sender=Post)
+def collect_linking_posts_on_delete(sender, instance, **kwargs):
+    '''
+    Deleting a post nulls the next/previous post of the posts linking to it with an UPDATE that sends no
+    signal, so their slugs are collected before it goes.
+    '''
+    instance._linking_post_slugs = list(
+        Post.objects.filter(Q(nextpost=instance) | Q(previouspost=instance)).values_list('slug', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_post_detail_on_delete(sender, instance, **kwargs):
+    '''
+    A hard deleted post (admin, author cascades) doesn't move max(updated_at) unless it was the last updated,
+    so the posts version is dropped with its cached detail, and that of the posts linking to it, for the lists
+    to drop it too. It is taken out of the rankings once the delete commits.
+    '''
+    invalidate_post_detail(instance.slug, *instance.__dict__.pop('_linking_post_slugs', []))
+    update_post_rankings(instance.pk)
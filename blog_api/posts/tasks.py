@@ -0,0 +1,22 @@
+import logging
+logger = logging.getLogger(__name__)
+
+from config import celery_app
+
+from blog_api.posts.models import Tag
+from blog_api.posts.rankings import RANKINGS, build_ranking
+
+
+@celery_app.task()
+def refresh_post_rankings():
+    '''Rebuilds every cached post ranking, reconciling any incremental updates that were missed'''
+    for ranking in RANKINGS:
+        build_ranking(ranking)
+    logger.info('[Celery] Refreshed post rankings...')
+
+
+@celery_app.task()
+def refresh_tag_post_counts():
+    '''Recomputes every tag post count from the active posts, reconciling any incremental updates that drifted'''
+    refreshed = Tag.items.refresh_post_counts()
+    logger.info(f'[Celery] Refreshed {refreshed} tag post counts...')
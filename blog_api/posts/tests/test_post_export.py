@@ -0,0 +1,158 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from rest_framework.status import HTTP_200_OK, HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST
+from rest_framework.test import APITestCase
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from blog_api.users.models import User
+from blog_api.posts.models import Tag, Post
+
+
+class PostTestsExport(APITestCase):
+
+    def setUp(self):
+
+        self.blog_post_data = {
+            'title': 'A really cool title for some really cool blog post by a really cool developer.',
+            'content': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed facilisis nunc id orci hendrerit, id tempor lorem tincidunt. Praesent id fermentum orci. Proin malesuada est sed nisl aliquam, ac congue nibh sagittis. Vestibulum sed ipsum vulputate, sodales neque auctor, mollis odio. Nullam sit amet mattis ante. Aenean mi sapien, aliquet eget sapien ac, finibus accumsan erat. Donec pretium risus faucibus ultrices egestas.',
+        }
+
+        self.admin = User.objects.create_user(
+            username='someadmin', email='someadmin@email.com', password='Testing4321@', is_active=True, is_staff=True
+        )
+        self.user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+
+        self.post = Post.objects.create(author=self.user, **self.blog_post_data)
+        self.post.tags.set([Tag.objects.create(name='tag2'), Tag.objects.create(name='tag1')])
+        self.post.react(self.admin, 'like')
+        self.post2 = Post.objects.create(author=self.admin, **self.blog_post_data)
+        self.post2.react(self.user, 'dislike')
+
+    def login(self, email):
+        login_response = self.client.post(reverse('user-login'), {'email': email, 'password': 'Testing4321@'}, format='json')
+        self.assertEqual(login_response.status_code, HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + login_response.data['access'])
+
+    def export(self, **params):
+        response = self.client.get(reverse('posts-export'), params)
+        if response.status_code != HTTP_200_OK:
+            return response, None
+        return response, b''.join(response.streaming_content)
+
+    def test_admin_can_export_posts(self):
+        '''
+        Ensure an admin can stream posts as JSON Lines with their author, tags and counters, oldest update first.
+        '''
+        print('Testing admin can export posts')
+        self.login(self.admin.email)
+
+        response, content = self.export(kind='posts')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('posts.jsonl', response['Content-Disposition'])
+
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row['slug'] for row in rows], [self.post.slug, self.post2.slug])
+        self.assertEqual(rows[0]['author_pub_id'], self.user.pub_id)
+        self.assertEqual(rows[0]['author_username'], self.user.username)
+        self.assertEqual(rows[0]['tags'], ['tag1', 'tag2'])
+        self.assertEqual((rows[0]['likes_count'], rows[0]['score']), (1, 1))
+        self.assertEqual((rows[1]['dislikes_count'], rows[1]['score'], rows[1]['tags']), (1, -1, []))
+        print('Done.....')
+
+    def test_admin_can_export_incrementally(self):
+        '''
+        Ensure only rows updated after the since watermark are exported.
+        '''
+        print('Testing admin can export rows updated since a watermark')
+        self.login(self.admin.email)
+        Post.objects.filter(pk=self.post.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+        response, content = self.export(kind='posts', since=(timezone.now() - timedelta(days=1)).isoformat())
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row['slug'] for row in rows], [self.post2.slug])
+
+        response, content = self.export(kind='reactions')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), 2)
+        response, content = self.export(kind='reactions', since=rows[-1]['updated_at'])
+        self.assertEqual(content, b'')
+        print('Done.....')
+
+    def test_admin_can_export_gzipped_csv(self):
+        '''
+        Ensure users and reactions can be exported as gzipped CSV with a header row.
+        '''
+        print('Testing admin can export gzipped csv')
+        self.login(self.admin.email)
+
+        response, content = self.export(kind='reactions', export_format='csv', gzip='true')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('reactions.csv.gz', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(gzip.decompress(content).decode())))
+        self.assertEqual(rows[0], ['post_slug', 'user_pub_id', 'value', 'created_at', 'updated_at'])
+        self.assertEqual(
+            [row[:3] for row in rows[1:]], [[self.post.slug, self.admin.pub_id, '1'], [self.post2.slug, self.user.pub_id, '-1']]
+        )
+
+        response, content = self.export(kind='users', export_format='csv')
+        rows = list(csv.reader(StringIO(content.decode())))
+        self.assertNotIn('email', rows[0])
+        self.assertNotIn('password', rows[0])
+        self.assertEqual({row[0] for row in rows[1:]}, {self.admin.pub_id, self.user.pub_id})
+        print('Done.....')
+
+    def test_user_cannot_export_not_admin(self):
+        '''
+        Ensure a user who is not an admin can not export.
+        '''
+        print('Testing user can not export not admin')
+        response, content = self.export(kind='posts')
+        self.assertEqual(response.status_code, HTTP_403_FORBIDDEN)
+
+        self.login(self.user.email)
+        response, content = self.export(kind='posts')
+        self.assertEqual(response.status_code, HTTP_403_FORBIDDEN)
+        print('Done.....')
+
+    def test_admin_cannot_export_invalid_params(self):
+        '''
+        Ensure an unknown kind, format or an invalid since are rejected.
+        '''
+        print('Testing admin can not export with invalid params')
+        self.login(self.admin.email)
+        for params in ({}, {'kind': 'passwords'}, {'kind': 'posts', 'export_format': 'xml'}, {'kind': 'posts', 'since': 'yesterday'}):
+            response, content = self.export(**params)
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        print('Done.....')
+
+    def test_export_data_command(self):
+        '''
+        Ensure the export_data command writes every row in chunks and reports the watermark.
+        '''
+        print('Testing the export_data command')
+        for i in range(5):
+            Post.objects.create(author=self.user, **self.blog_post_data).tags.set(Tag.objects.all())
+
+        with tempfile.NamedTemporaryFile(suffix='.jsonl.gz', delete=False) as export_file:
+            pass
+        self.addCleanup(os.remove, export_file.name)
+
+        err = StringIO()
+        call_command('export_data', 'posts', gzip=True, output=export_file.name, chunk_size=2, stderr=err)
+        with gzip.open(export_file.name, 'rt') as lines:
+            rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[-1]['tags'], ['tag1', 'tag2'])
+        self.assertIn(f'Exported 7 posts, watermark {rows[-1]["updated_at"]}.', err.getvalue())
+        print('Done.....')
@@ -0,0 +1,200 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST
+from rest_framework.test import APITestCase
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog_api.users.models import User, VerificationCode
+from blog_api.posts.models import Tag, Post
+
+
+class PostTestsImport(APITestCase):
+
+    def setUp(self):
+
+        self.user_data = {
+            'name': 'DabApps',
+            'username': 'someuser00',
+            'email': 'someemail@email.com',
+            'password': 'Testing4321@',
+            'password2': 'Testing4321@'
+        }
+
+        self.blog_post_data = {
+            'title': 'A really cool title for some really cool blog post by a really cool developer.',
+            'content': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed facilisis nunc id orci hendrerit, id tempor lorem tincidunt. Praesent id fermentum orci. Proin malesuada est sed nisl aliquam, ac congue nibh sagittis. Vestibulum sed ipsum vulputate, sodales neque auctor, mollis odio. Nullam sit amet mattis ante. Aenean mi sapien, aliquet eget sapien ac, finibus accumsan erat. Donec pretium risus faucibus ultrices egestas.',
+        }
+
+    def login(self, is_staff=True):
+        reg_response = self.client.post(reverse('user-register'), self.user_data, format='json')
+        self.assertEqual(reg_response.status_code, HTTP_201_CREATED)
+
+        verificaton_data = {
+            'verification_code': VerificationCode.objects.latest('created_at').verification_code
+        }
+        verification_response = self.client.post(reverse('user-verify'), verificaton_data, format='json')
+        self.assertEqual(verification_response.status_code, HTTP_200_OK)
+        User.objects.filter(email=self.user_data['email']).update(is_staff=is_staff)
+
+        login_data = {
+            'email': self.user_data['email'],
+            'password': self.user_data['password']
+        }
+        new_login = self.client.post(reverse('user-login'), login_data, format='json')
+        self.assertEqual(new_login.status_code, HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + new_login.data['access'])
+        return User.objects.get(email=self.user_data['email'])
+
+    def import_lines(self, lines):
+        body = '\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+        return self.client.generic('POST', reverse('post-import'), body, content_type='application/x-ndjson')
+
+    def test_admin_can_import_posts(self):
+        '''
+        Ensure an admin can bulk import posts, with their tags, and invalid lines are reported by line number.
+        '''
+        print('Testing admin can import posts')
+        user = self.login()
+        other_user = User.objects.create(username='otheruser', email='other@email.com', password='Testing4321@')
+        Tag.objects.create(name='Tag1')
+
+        import_response = self.import_lines([
+            dict(self.blog_post_data, post_tags='tag1, tag2'),
+            '{not json',
+            dict(self.blog_post_data, featured=True, post_tags='tag2, TAG2', author=other_user.pub_id),
+            dict(self.blog_post_data, content='Too short.'),
+            '',
+            dict(self.blog_post_data, created_at='2020-01-01T10:00:00Z'),
+        ])
+        self.assertEqual(import_response.status_code, HTTP_201_CREATED)
+        self.assertEqual(import_response.data['created'], True)
+        self.assertEqual(import_response.data['imported'], 3)
+        self.assertEqual(import_response.data['failed'], 2)
+        self.assertEqual([error['line'] for error in import_response.data['errors']], [2, 4])
+        self.assertIn('content', import_response.data['errors'][1]['message'])
+
+        posts = Post.objects.order_by('id')
+        self.assertEqual(posts.count(), 3)
+        self.assertEqual(set(posts.values_list('author', flat=True)), {user.id})
+        self.assertEqual(list(posts.values_list('featured', flat=True)), [False, True, False])
+        self.assertEqual(posts.last().created_at.year, 2020)
+        for post in posts:
+            self.assertTrue(post.slug.startswith('a-really-cool-title-for-some-really-cool-blog-post'))
+            self.assertEqual(post.estimated_reading_time, 1)
+            self.assertIsNotNone(post.search_vector)
+        self.assertEqual([list(post.tags.values_list('name', flat=True)) for post in posts], [['Tag1', 'tag2'], ['tag2'], []])
+        self.assertEqual(dict(Tag.objects.values_list('name', 'post_count')), {'Tag1': 1, 'tag2': 2})
+        self.assertEqual(Post.items.search('lorem ipsum').count(), 3)
+        print('Done.....')
+
+    def test_user_cannot_import_posts_no_valid_lines(self):
+        '''
+        Ensure an import with no valid lines is rejected.
+        '''
+        print('Testing user can not import posts with no valid lines')
+        self.login()
+
+        empty_response = self.import_lines([])
+        self.assertEqual(empty_response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(empty_response.data['created'], False)
+
+        invalid_response = self.import_lines([dict(self.blog_post_data, title='Too short')])
+        self.assertEqual(invalid_response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(invalid_response.data['message'][0]['line'], 1)
+        self.assertEqual(Post.objects.count(), 0)
+        print('Done.....')
+
+    def test_admin_cannot_import_future_posts_or_long_tags(self):
+        '''
+        Ensure lines dated in the future or with tag names longer than Tag.name allows are reported, not imported.
+        '''
+        print('Testing admin can not import future posts or long tag names')
+        self.login()
+
+        import_response = self.import_lines([
+            dict(self.blog_post_data, created_at='2099-01-01T00:00:00Z'),
+            dict(self.blog_post_data, post_tags='tag1, ' + 'a' * 31),
+            dict(self.blog_post_data, post_tags='tag1, ' + 'a' * 30),
+        ])
+        self.assertEqual(import_response.status_code, HTTP_201_CREATED)
+        self.assertEqual(import_response.data['imported'], 1)
+        self.assertEqual([error['line'] for error in import_response.data['errors']], [1, 2])
+        self.assertIn('created_at', import_response.data['errors'][0]['message'])
+        self.assertIn('post_tags', import_response.data['errors'][1]['message'])
+        self.assertEqual(Tag.objects.get(name='a' * 30).post_count, 1)
+        print('Done.....')
+
+    def test_user_cannot_import_posts_not_admin(self):
+        '''
+        Ensure a user who is not an admin can not import posts.
+        '''
+        print('Testing user can not import posts not admin')
+        self.login(is_staff=False)
+        import_response = self.import_lines([self.blog_post_data])
+        self.assertEqual(import_response.status_code, HTTP_403_FORBIDDEN)
+        self.assertEqual(Post.objects.count(), 0)
+        print('Done.....')
+
+    def test_user_cannot_import_posts_unauthenticated(self):
+        '''
+        Ensure a user can not import posts unauthenticated.
+        '''
+        print('Testing user cannot import posts unauthenticated')
+        import_response = self.import_lines([self.blog_post_data])
+        self.assertEqual(import_response.status_code, HTTP_403_FORBIDDEN)
+        self.assertEqual(Post.objects.count(), 0)
+        print('Done.....')
+
+    def test_import_queries_do_not_grow_with_posts(self):
+        '''
+        Ensure importing runs the same number of queries for a handful of posts as for many.
+        '''
+        print('Testing importing posts runs a constant number of queries')
+        self.login()
+        self.client.get(reverse('user'))  # caches the authenticated user like the imports below
+
+        query_counts = []
+        for post_total in (5, 50):
+            lines = [dict(self.blog_post_data, post_tags=f'tag{i}, common') for i in range(post_total)]
+            with CaptureQueriesContext(connection) as queries:
+                import_response = self.import_lines(lines)
+            self.assertEqual(import_response.data['imported'], post_total)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Tag.objects.get(name='common').post_count, 55)
+        print('Done.....')
+
+    def test_import_posts_command(self):
+        '''
+        Ensure the import_posts command imports a JSON Lines file in chunks, resolving each line's author.
+        '''
+        print('Testing the import_posts command')
+        user = User.objects.create(username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True)
+
+        lines = [dict(self.blog_post_data, author=user.pub_id) for i in range(5)]
+        lines.append(dict(self.blog_post_data, author='nosuchuser'))
+        lines.append(self.blog_post_data)
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as import_file:
+            import_file.write('\n'.join(json.dumps(line) for line in lines))
+        self.addCleanup(os.remove, import_file.name)
+
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', import_file.name, chunk_size=2, stdout=out, stderr=err)
+        self.assertIn('Imported 5 posts, 2 failed', out.getvalue())
+        self.assertIn('Line 6:', err.getvalue())
+        self.assertIn('Line 7:', err.getvalue())
+        self.assertEqual(Post.objects.filter(author=user).count(), 5)
+
+        call_command('import_posts', import_file.name, author=user.email, stdout=out, stderr=err)
+        self.assertIn('Imported 7 posts, 0 failed', out.getvalue())
+        self.assertEqual(Post.objects.filter(author=user).count(), 12)
+        print('Done.....')
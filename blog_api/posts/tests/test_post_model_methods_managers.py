@@ -1,14 +1,20 @@
+from io import StringIO
+
 from rest_framework_simplejwt.tokens import OutstandingToken
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_401_UNAUTHORIZED, \
                                                                         HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST
 from rest_framework.test import APITestCase
 
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.template.defaultfilters import slugify
 
 from blog_api.users.models import User, VerificationCode, UserFollowing
-from blog_api.posts.models import Tag, Post, Like, DisLike
+from blog_api.posts.models import Tag, Post, Reaction
+from blog_api.posts.managers import fuzzy_search_threshold
 
 
 class UserTestsRead(APITestCase):
@@ -143,16 +149,59 @@ class UserTestsRead(APITestCase):
         self.assertEqual(len(search_results), 1)
         print('Done.....')
 
-    def test_like_dislike_str_model_methods(self):
+    def test_post_manager_search_modes(self):
         '''
-        Ensure the str model method works on both Like and Dislike
+        Ensure Post.items.search() matches prefixes and misspelt titles in the prefix and fuzzy modes.
         '''
-        print('Testing Like and Dislike model str methods')
+        print('Testing Post.items.search() prefix and fuzzy modes')
+        post = Post.objects.create(
+                title=self.blog_post_data['title'],
+                content=self.blog_post_data['content']
+            )
+
+        self.assertEqual(len(Post.items.search(search_text='develo')), 0)
+        self.assertEqual(list(Post.items.search(search_text='develo', mode='prefix')), [post])
+        self.assertEqual(len(Post.items.search(search_text='devloper')), 0)
+        with fuzzy_search_threshold():
+            self.assertEqual(list(Post.items.search(search_text='devloper', mode='fuzzy')), [post])
+            self.assertEqual(list(Post.items.search(search_text='devoleper', mode='fuzzy')), [post])
+            self.assertEqual(len(Post.items.search(search_text='banana', mode='fuzzy')), 0)
+        self.assertEqual(len(Post.items.search(search_text='devoleper', mode='fuzzy')), 0)
+        print('Done.....')
+
+    def test_post_search_vector_follows_content_updates(self):
+        '''
+        Ensure the search vector is kept current on updates and can be rebuilt with rebuild_search_vectors.
+        '''
+        print('Testing the post search vector follows content updates and can be rebuilt')
+        post = Post.objects.create(
+                title=self.blog_post_data['title'],
+                content=self.blog_post_data['content']
+            )
+        self.assertEqual(len(Post.items.search(search_text='zebra')), 0)
+
+        post.content = post.content + ' A zebra wandered into the paragraph.'
+        post.save()
+        self.assertEqual(len(Post.items.search(search_text='zebra')), 1)
+
+        Post.objects.filter(pk=post.pk).update(search_vector=None)
+        self.assertEqual(len(Post.items.search(search_text='zebra')), 0)
+
+        out = StringIO()
+        call_command('rebuild_search_vectors', batch_size=1, stdout=out)
+        self.assertIn('Rebuilt 1 search vectors.', out.getvalue())
+        self.assertEqual(len(Post.items.search(search_text='zebra')), 1)
+        print('Done.....')
+
+    def test_reaction_str_model_method(self):
+        '''
+        Ensure the str model method works on Reaction.
+        '''
+        print('Testing Reaction model str method')
         post = Post.objects.create(
                 title='this is title longer than 8 words longer than 8 words',
                 content='content'
-            ) 
-        like = Like.objects.get(post=post)
+            )
         user = User.objects.create(
                 username=self.user_data['username'],
                 email=self.user_data['email'],
@@ -161,26 +210,20 @@ class UserTestsRead(APITestCase):
         user.is_active = True
         user.save()
 
-        like.users.add(user)
-        like.save()
-
-        self.assertEqual(like.__str__(), f'{like.users.all().count()} likes for {post.slug}')
-
-        dislike = DisLike.objects.get(post=post)
-
-        dislike.users.add(user)
-        dislike.save()
-
-        self.assertEqual(dislike.__str__(), f'{dislike.users.all().count()} dislikes for {post.slug}')
-
-
+        post.react(user, 'like')
+        reaction = Reaction.objects.get(post=post, user=user)
+        self.assertEqual(reaction.__str__(), f'{user.username} likes {post.slug}')
 
+        post.react(user, 'dislike')
+        reaction.refresh_from_db()
+        self.assertEqual(reaction.__str__(), f'{user.username} dislikes {post.slug}')
+        print('Done.....')
 
-    def test_like_dislike_model_method_like_model(self):
+    def test_post_react_model_method(self):
         '''
-        Ensure we can call Like.like() and Dislike.dislike()
+        Ensure we can call post.react() to like and dislike, one reaction row per user.
         '''
-        print('Testing we can call like() on a Like instance and dislike() on a Dislike instance')
+        print('Testing we can call react() on a Post instance to like and dislike')
 
         user = User.objects.create(
                 username=self.user_data['username'],
@@ -195,12 +238,134 @@ class UserTestsRead(APITestCase):
                 title=self.blog_post_data['title'],
                 content=self.blog_post_data['content']
             )
-        liked = post.likes.like(user.pub_id)
+        liked = post.react(user, 'like')
         self.assertEqual(liked['liked'], True)
         self.assertEqual(liked['message'], f'{user.username} liked {post.slug} successfully.')
-        disliked = post.dislikes.dislike(user.pub_id)
+        disliked = post.react(user, 'dislike')
         self.assertEqual(disliked['liked'], False)
         self.assertEqual(disliked['message'], f'{user.username} disliked {post.slug} successfully.')
+        self.assertEqual(Reaction.objects.filter(post=post, user=user).count(), 1)
+        self.assertEqual(Reaction.objects.get(post=post, user=user).value, Reaction.DISLIKE)
+        print('Done.....')
+
+    def test_post_counters_follow_reactions_and_bookmarks(self):
+        '''
+        Ensure the stored counters follow reactions, reaction deletes and bookmark m2m changes from both sides.
+        '''
+        print('Testing post counters follow reactions and bookmarks')
+
+        user = User.objects.create(
+                username=self.user_data['username'],
+                email=self.user_data['email'],
+                password=self.user_data['password']
+        )
+        user2 = User.objects.create(
+                username=self.user2_data['username'],
+                email=self.user2_data['email'],
+                password=self.user2_data['password']
+        )
+
+        post = Post.objects.create(
+                title=self.blog_post_data['title'],
+                content=self.blog_post_data['content']
+            )
+
+        post.react(user, 'like')
+        post.react(user, 'like')  # already liked, not counted twice
+        post.react(user2, 'dislike')
+        post.bookmarks.add(user, user2)
+        post.bookmarks.add(user)  # already bookmarked, not counted twice
+        post.save()  # stale instance must not overwrite the counters
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(post.dislikes_count, 1)
+        self.assertEqual(post.bookmarks_count, 2)
+        self.assertEqual(post.score, 0)
+
+        Reaction.objects.get(post=post, user=user2).delete()
+        post.bookmarks.remove(user2)
+        post.bookmarks.remove(user2)  # already removed, not counted twice
+        user.bookmarked_posts.clear()
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(post.dislikes_count, 0)
+        self.assertEqual(post.bookmarks_count, 0)
+        self.assertEqual(post.score, 1)
+        print('Done.....')
+
+    def test_repair_post_counters_command(self):
+        '''
+        Ensure the repair_post_counters command fixes drifted counters.
+        '''
+        print('Testing repair_post_counters command fixes drifted counters')
+
+        user = User.objects.create(
+                username=self.user_data['username'],
+                email=self.user_data['email'],
+                password=self.user_data['password']
+        )
+        post = Post.objects.create(
+                title=self.blog_post_data['title'],
+                content=self.blog_post_data['content']
+            )
+        post.react(user, 'like')
+        post.bookmarks.add(user)
+
+        Post.objects.filter(pk=post.pk).update(likes_count=7, dislikes_count=3, bookmarks_count=0, score=4)
+
+        out = StringIO()
+        call_command('repair_post_counters', stdout=out)
+        self.assertIn('Checked 1 posts, 1 repaired.', out.getvalue())
+
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(post.dislikes_count, 0)
+        self.assertEqual(post.bookmarks_count, 1)
+        self.assertEqual(post.score, 1)
+        print('Done.....')
+
+    def test_post_react_query_count_does_not_grow_with_likes(self):
+        '''
+        Ensure post.react() costs the same number of queries on a popular post as on a new one.
+        '''
+        print('Testing post.react() query count does not grow with likes')
+
+        user = User.objects.create(
+                username=self.user_data['username'],
+                email=self.user_data['email'],
+                password=self.user_data['password']
+        )
+        quiet_post = Post.objects.create(
+                title=self.blog_post_data['title'],
+                content=self.blog_post_data['content']
+            )
+        popular_post = Post.objects.create(
+                title=self.blog_post_data['title'],
+                content=self.blog_post_data['content']
+            )
+        likers = [
+            User.objects.create(username=f'liker{i}', email=f'liker{i}@email.com', password='Testing4321@')
+            for i in range(25)
+        ]
+        for liker in likers:
+            popular_post.react(liker, 'like')
+
+        quiet_post = Post.objects.get(pk=quiet_post.pk)
+        with CaptureQueriesContext(connection) as quiet_queries:
+            quiet_post.react(user, 'dislike')
+
+        popular_post = Post.objects.get(pk=popular_post.pk)
+        with CaptureQueriesContext(connection) as popular_queries:
+            popular_post.react(user, 'dislike')
+
+        self.assertEqual(len(quiet_queries), len(popular_queries))
+
+        popular_post.react(user, 'like')
+        popular_post.react(user, 'like')
+        popular_post.refresh_from_db()
+        self.assertEqual(popular_post.likes_count, 26)
+        self.assertEqual(popular_post.dislikes_count, 0)
+        self.assertEqual(popular_post.score, 26)
         print('Done.....')
 
     def test_tag_str_method(self):
@@ -210,6 +375,64 @@ class UserTestsRead(APITestCase):
 
         self.assertEqual(tag.__str__(), 'tag1')
 
+    def test_tag_manager_comma_to_qs_resolves_tags_in_bulk(self):
+        '''
+        Ensure Tag.items.comma_to_qs() matches tags case-insensitively and costs the same queries for any number of tags.
+        '''
+        print('Testing Tag.items.comma_to_qs() resolves tags in bulk')
+
+        existing = Tag.objects.create(name='Django')
+
+        with CaptureQueriesContext(connection) as queries:
+            tags = Tag.items.comma_to_qs('django, tag1, Tag1 ,, tag2, ' + ', '.join(f'bulk{i}' for i in range(10)))
+        self.assertEqual(len(queries), 3)
+        self.assertEqual([tag.name for tag in tags], ['Django', 'tag1', 'tag2'] + [f'bulk{i}' for i in range(10)])
+        self.assertEqual(tags[0], existing)
+        self.assertTrue(all(tag.pk and tag.pub_id and tag.created_at for tag in tags))
+        self.assertEqual(Tag.objects.count(), 13)
+
+        with CaptureQueriesContext(connection) as queries:
+            tags = Tag.items.comma_to_qs('TAG1, bulk9')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([tag.name for tag in tags], ['tag1', 'bulk9'])
+        self.assertEqual(Tag.items.comma_to_qs(' , '), [])
+        print('Done.....')
+
+    def test_tag_post_counts_follow_tags_and_active_posts(self):
+        '''
+        Ensure Tag.post_count only counts active posts through tag changes from both sides, soft and hard deletes.
+        '''
+        print('Testing tag post counts follow tag changes and active posts')
+
+        post = Post.objects.create(title=self.blog_post_data['title'], content=self.blog_post_data['content'])
+        post2 = Post.objects.create(title=self.blog_post_data['title'], content=self.blog_post_data['content'])
+        tag, tag2 = Tag.objects.create(name='tag1'), Tag.objects.create(name='tag2')
+
+        post.tags.set([tag, tag2])
+        tag.posts.add(post2)
+        self.assertEqual(list(Tag.items.highest_post_count().values_list('name', 'post_count')), [('tag1', 2), ('tag2', 1)])
+
+        post = Post.objects.get(pk=post.pk)
+        post.is_active = False
+        post.save()
+        self.assertEqual(list(Tag.items.highest_post_count().values_list('name', 'post_count')), [('tag1', 1), ('tag2', 0)])
+
+        post.tags.remove(tag2)
+        post.is_active = True
+        post.save()
+        self.assertEqual(list(Tag.items.highest_post_count().values_list('name', 'post_count')), [('tag1', 2), ('tag2', 0)])
+
+        tag.posts.clear()
+        post2.tags.add(tag2)
+        post2.delete()
+        self.assertEqual(list(Tag.items.highest_post_count().values_list('name', 'post_count')), [('tag1', 0), ('tag2', 0)])
+
+        post.tags.add(tag)
+        Tag.objects.filter(pk=tag.pk).update(post_count=9)
+        self.assertEqual(Tag.items.refresh_post_counts(), 2)
+        self.assertEqual(list(Tag.items.highest_post_count().values_list('name', 'post_count')), [('tag1', 1), ('tag2', 0)])
+        print('Done.....')
+
     def test_post_model_save_fails_next_post_author_not_self(self):
         '''
         Ensure the post model save method fails with next post author not self.
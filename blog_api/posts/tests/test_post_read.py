@@ -1,16 +1,27 @@
+import json
+import time
 from datetime import timedelta
-from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_401_UNAUTHORIZED, \
-                                                                        HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_304_NOT_MODIFIED, \
+                                                    HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST
 from rest_framework.test import APITestCase
+from rest_framework.renderers import JSONRenderer
 from django.urls import reverse
+from django.utils.http import http_date
+from django.db import connection, transaction, IntegrityError
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
 
 from blog_api.users.models import User, VerificationCode
-from blog_api.posts.models import Post
+from blog_api.posts.models import Tag, Post
+from blog_api.posts.api.serializers import PostOverviewSerializer, PostDetailSerializer, PostOverviewReadSerializer, \
+                                                                                                PostDetailReadSerializer
+from blog_api.utils.testing import capture_on_commit_callbacks
 
 
 class PostTestsRead(APITestCase):
 
     def setUp(self):
+        cache.clear()
         self.user_data = {
             'name': 'DabApps',
             'username': 'someuser00',
@@ -204,10 +215,10 @@ class PostTestsRead(APITestCase):
         post1 = Post.objects.first()
         post2 = Post.objects.last()
 
-        post1.likes.users.add(user1)
-        post1.likes.users.add(user2)
+        post1.react(user1, 'like')
+        post1.react(user2, 'like')
 
-        post2.likes.users.add(user2)
+        post2.react(user2, 'like')
 
         most_liked_posts_response = self.client.get(most_liked_posts_url)
         self.assertEqual(most_liked_posts_response.status_code, HTTP_200_OK)
@@ -261,10 +272,10 @@ class PostTestsRead(APITestCase):
         post1 = Post.objects.first()
         post2 = Post.objects.last()
 
-        post1.likes.users.add(user1)
-        post1.likes.users.add(user2)
+        post1.react(user1, 'like')
+        post1.react(user2, 'like')
 
-        post2.likes.users.add(user2)
+        post2.react(user2, 'like')
 
         post1.is_active = False
         post1.save()
@@ -321,10 +332,10 @@ class PostTestsRead(APITestCase):
         post1 = Post.objects.first()
         post2 = Post.objects.last()
 
-        post1.dislikes.users.add(user1)
-        post1.dislikes.users.add(user2)
+        post1.react(user1, 'dislike')
+        post1.react(user2, 'dislike')
 
-        post2.dislikes.users.add(user2)
+        post2.react(user2, 'dislike')
 
         most_disliked_posts_response = self.client.get(most_disliked_posts_url)
         self.assertEqual(most_disliked_posts_response.status_code, HTTP_200_OK)
@@ -378,10 +389,10 @@ class PostTestsRead(APITestCase):
         post1 = Post.objects.first()
         post2 = Post.objects.last()
 
-        post1.dislikes.users.add(user1)
-        post1.dislikes.users.add(user2)
+        post1.react(user1, 'dislike')
+        post1.react(user2, 'dislike')
 
-        post2.dislikes.users.add(user2)
+        post2.react(user2, 'dislike')
 
         post1.is_active = False
         post1.save()
@@ -726,3 +737,310 @@ class PostTestsRead(APITestCase):
         self.assertEqual(len(next_previous_choices_response.data['results']), 5)
 
         print('Done.....')
+
+    def test_user_can_get_post_detail_from_cache(self):
+        '''
+        Ensure a post detail is served from the cache and a reaction invalidates it.
+        '''
+        print('Testing a user can get a post detail from the cache and reactions invalidate it')
+        register_url = reverse('user-register')
+        verification_url = reverse('user-verify')
+        post_detail_url = reverse('post-detail')
+
+        reg_response = self.client.post(register_url, self.user_data, format='json')
+        self.assertEqual(reg_response.status_code, HTTP_201_CREATED)
+
+        verificaton_data = {
+            'verification_code': VerificationCode.objects.latest('created_at').verification_code
+        }
+        verification_response = self.client.post(verification_url, verificaton_data, format='json')
+        self.assertEqual(verification_response.status_code, HTTP_200_OK)
+
+        user = User.objects.latest('created_at')
+        post = Post.objects.create(author=user, **self.blog_post_data)
+        post_detail_data = json.dumps({'post_slug': post.slug})
+
+        post_detail_response = self.client.generic('GET', post_detail_url, post_detail_data, content_type='application/json')
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+        self.assertEqual(post_detail_response.data['post']['likes_count'], 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            post_detail_response = self.client.generic('GET', post_detail_url, post_detail_data, content_type='application/json')
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+        self.assertFalse([query for query in queries.captured_queries if 'posts_post' in query['sql']])
+
+        post.react(user, 'like')
+        post_detail_response = self.client.generic('GET', post_detail_url, post_detail_data, content_type='application/json')
+        self.assertEqual(post_detail_response.data['post']['likes_count'], 1)
+
+        post.is_active = False
+        post.save()
+        post_detail_response = self.client.generic('GET', post_detail_url, post_detail_data, content_type='application/json')
+        self.assertEqual(post_detail_response.status_code, HTTP_400_BAD_REQUEST)
+        print('Done.....')
+
+    def test_user_can_get_most_liked_posts_from_ranking(self):
+        '''
+        Ensure the most liked ranking is precomputed and kept up to date incrementally.
+        '''
+        print('Testing a user can get most liked posts from the precomputed ranking')
+        register_url = reverse('user-register')
+        verification_url = reverse('user-verify')
+        most_liked_posts_url = reverse('posts-most-liked')
+
+        reg_response = self.client.post(register_url, self.user_data, format='json')
+        self.assertEqual(reg_response.status_code, HTTP_201_CREATED)
+
+        verificaton_data = {
+            'verification_code': VerificationCode.objects.latest('created_at').verification_code
+        }
+        verification_response = self.client.post(verification_url, verificaton_data, format='json')
+        self.assertEqual(verification_response.status_code, HTTP_200_OK)
+
+        user = User.objects.latest('created_at')
+        posts = [Post.objects.create(author=user, **self.blog_post_data) for i in range(3)]
+
+        most_liked_posts_response = self.client.get(most_liked_posts_url)
+        self.assertEqual(most_liked_posts_response.status_code, HTTP_200_OK)
+        self.assertEqual(most_liked_posts_response.data['count'], 3)
+
+        with capture_on_commit_callbacks(execute=True):
+            posts[-1].react(user, 'like')
+            posts[0].react(user, 'dislike')
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                posts[0].react(user, 'like')
+                raise IntegrityError  # rolled back, the ranking must not see the like
+        with CaptureQueriesContext(connection) as queries:
+            most_liked_posts_response = self.client.get(most_liked_posts_url)
+        self.assertEqual(
+            [post['slug'] for post in most_liked_posts_response.data['results']],
+            [posts[-1].slug, posts[1].slug, posts[0].slug]
+        )
+        self.assertFalse([
+            query for query in queries.captured_queries if 'FROM "posts_post"' in query['sql'] and 'ORDER BY' in query['sql']
+        ])
+
+        posts[-1].is_active = False
+        with capture_on_commit_callbacks(execute=True):
+            posts[-1].save()
+        most_liked_posts_response = self.client.get(most_liked_posts_url)
+        self.assertEqual(most_liked_posts_response.data['count'], 2)
+        self.assertEqual(most_liked_posts_response.data['results'][0]['slug'], posts[1].slug)
+        print('Done.....')
+
+    def test_user_can_fuzzy_search_posts(self):
+        '''
+        Ensure fuzzy searches match misspelt titles and the lowered similarity threshold does not outlive the request.
+        '''
+        print('Testing a user can fuzzy search posts')
+        user = User.objects.create_user(username='someuser00', email='someemail@email.com', password='Testing4321@')
+        post = Post.objects.create(author=user, **self.blog_post_data)
+        search_data = {'search_term': 'devoleper', 'search_mode': 'fuzzy'}
+
+        search_response = self.client.generic('GET', reverse('post-search'), json.dumps(search_data), content_type='application/json')
+        self.assertEqual(search_response.status_code, HTTP_200_OK)
+        self.assertEqual([result['slug'] for result in search_response.data['results']], [post.slug])
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW pg_trgm.word_similarity_threshold')
+            self.assertEqual(cursor.fetchone()[0], '0.6')
+        print('Done.....')
+
+    def test_user_can_get_oldest_posts_cursor_paginated(self):
+        '''
+        Ensure oldest posts are cursor paginated without a count query.
+        '''
+        print('Testing a user can walk the oldest posts with cursors')
+        register_url = reverse('user-register')
+        verification_url = reverse('user-verify')
+        oldest_posts_url = reverse('posts-oldest')
+
+        reg_response = self.client.post(register_url, self.user_data, format='json')
+        self.assertEqual(reg_response.status_code, HTTP_201_CREATED)
+
+        verificaton_data = {
+            'verification_code': VerificationCode.objects.latest('created_at').verification_code
+        }
+        verification_response = self.client.post(verification_url, verificaton_data, format='json')
+        self.assertEqual(verification_response.status_code, HTTP_200_OK)
+
+        user = User.objects.latest('created_at')
+        posts = [Post.objects.create(author=user, **self.blog_post_data) for i in range(15)]
+
+        with CaptureQueriesContext(connection) as queries:
+            first_page = self.client.get(oldest_posts_url)
+        self.assertEqual(first_page.status_code, HTTP_200_OK)
+        self.assertFalse([query for query in queries.captured_queries if 'COUNT(' in query['sql']])
+        self.assertNotIn('count', first_page.data)
+        self.assertEqual(first_page.data['previous'], None)
+
+        second_page = self.client.get(first_page.data['next'])
+        self.assertEqual(second_page.status_code, HTTP_200_OK)
+        self.assertEqual(second_page.data['next'], None)
+        self.assertEqual(
+            [post['slug'] for post in first_page.data['results'] + second_page.data['results']],
+            [post.slug for post in posts]
+        )
+        print('Done.....')
+
+    def test_read_serializers_render_like_model_serializers(self):
+        '''
+        Ensure the read serializers render posts with the same bytes as PostOverviewSerializer and PostDetailSerializer.
+        '''
+        print('Testing read serializers render like model serializers')
+        user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+        posts = [Post.objects.create(author=user, **self.blog_post_data) for i in range(3)]
+        posts[0].tags.set([Tag.objects.create(name='tag2'), Tag.objects.create(name='tag1')])
+        posts[0].previouspost = posts[1]
+        posts[0].save()
+        posts[0].react(user, 'like')
+        posts[2].author = None
+        posts[2].save()
+
+        instances = Post.objects.select_related('author', 'previouspost', 'nextpost').prefetch_related('tags').order_by('id')
+        rows = PostOverviewReadSerializer.get_queryset(instances)
+        self.assertEqual(
+            JSONRenderer().render(PostOverviewReadSerializer(rows, many=True).data),
+            JSONRenderer().render(PostOverviewSerializer(instances, many=True).data)
+        )
+        rows = PostDetailReadSerializer.get_queryset(instances)
+        self.assertEqual(
+            JSONRenderer().render(PostDetailReadSerializer(rows, many=True).data),
+            JSONRenderer().render(PostDetailSerializer(instances, many=True).data)
+        )
+        print('Done.....')
+
+    def test_user_gets_not_modified_post_lists_until_they_change(self):
+        '''
+        Ensure post and tag lists carry validators and a conditional GET gets a 304, without querying the posts,
+        until a post, a reaction, a tag or an author's username changes or a post is deleted.
+        '''
+        print('Testing a user gets not modified post lists until they change')
+        all_posts_url = reverse('posts')
+        all_tags_url = reverse('tags')
+        user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+        old_post = Post.objects.create(author=user, **self.blog_post_data)
+        post = Post.objects.create(author=user, **self.blog_post_data)
+
+        all_posts_response = self.client.get(all_posts_url)
+        self.assertEqual(all_posts_response.status_code, HTTP_200_OK)
+        self.assertIn('public', all_posts_response['Cache-Control'])
+        self.assertIn('Last-Modified', all_posts_response)
+        etag = all_posts_response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            all_posts_response = self.client.get(all_posts_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(all_posts_response.status_code, HTTP_304_NOT_MODIFIED)
+        self.assertEqual(all_posts_response.content, b'')
+        self.assertEqual(len([query for query in queries.captured_queries if 'posts_post' in query['sql']]), 1)
+        all_posts_response = self.client.get(all_posts_url, HTTP_IF_MODIFIED_SINCE=all_posts_response['Last-Modified'])
+        self.assertEqual(all_posts_response.status_code, HTTP_304_NOT_MODIFIED)
+
+        User.objects.get(pk=user.pk).save()  # nothing the lists show changed
+        all_posts_response = self.client.get(all_posts_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(all_posts_response.status_code, HTTP_304_NOT_MODIFIED)
+
+        def rename_author():
+            author = User.objects.get(pk=user.pk)
+            author.username = 'someuser01'
+            author.save()
+
+        for change in (
+            lambda: post.react(user, 'like'),
+            lambda: post.tags.set([Tag.objects.create(name='tag1')]),
+            rename_author,
+            lambda: Post.objects.create(author=user, **self.blog_post_data),
+            lambda: old_post.delete(),  # not the last updated post, max(updated_at) stays
+        ):
+            change()
+            all_posts_response = self.client.get(all_posts_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(all_posts_response.status_code, HTTP_200_OK)
+            etag = all_posts_response['ETag']
+
+        all_tags_response = self.client.get(all_tags_url)
+        all_tags_response = self.client.get(all_tags_url, HTTP_IF_NONE_MATCH=all_tags_response['ETag'])
+        self.assertEqual(all_tags_response.status_code, HTTP_304_NOT_MODIFIED)
+        Tag.objects.create(name='tag2')
+        all_tags_response = self.client.get(all_tags_url, HTTP_IF_NONE_MATCH=all_tags_response['ETag'])
+        self.assertEqual(all_tags_response.status_code, HTTP_200_OK)
+        print('Done.....')
+
+    def test_user_gets_not_modified_post_detail_until_it_changes(self):
+        '''
+        Ensure a conditional GET of a post detail gets a 304 without any query until the detail served changes.
+        '''
+        print('Testing a user gets a not modified post detail until it changes')
+        post_detail_url = reverse('post-detail')
+        user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+        post = Post.objects.create(author=user, **self.blog_post_data)
+        post_detail_data = json.dumps({'post_slug': post.slug})
+
+        post_detail_response = self.client.generic('GET', post_detail_url, post_detail_data, content_type='application/json')
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+        self.assertIn('private', post_detail_response['Cache-Control'])
+        self.assertNotIn('Last-Modified', post_detail_response)
+        etag = post_detail_response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            post_detail_response = self.client.generic(
+                'GET', post_detail_url, post_detail_data, content_type='application/json', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(post_detail_response.status_code, HTTP_304_NOT_MODIFIED)
+        self.assertFalse([query for query in queries.captured_queries if 'SAVEPOINT' not in query['sql']])
+
+        other_post = Post.objects.create(author=user, **self.blog_post_data)
+        post_detail_response = self.client.generic(
+            'GET', post_detail_url, json.dumps({'post_slug': other_post.slug}), content_type='application/json',
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+        post_detail_response = self.client.generic(
+            'GET', post_detail_url, post_detail_data, content_type='application/json',
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+
+        post.react(user, 'like')
+        post_detail_response = self.client.generic(
+            'GET', post_detail_url, post_detail_data, content_type='application/json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+        self.assertEqual(post_detail_response.data['post']['likes_count'], 1)
+        etag = post_detail_response['ETag']
+
+        follower = User.objects.create_user(
+            username='someuser01', email='someemail01@email.com', password='Testing4321@', is_active=True
+        )
+        follower.follow_user(user=user)  # the counters move with F() updates, the cached detail stays
+        post_detail_response = self.client.generic(
+            'GET', post_detail_url, post_detail_data, content_type='application/json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(post_detail_response.status_code, HTTP_304_NOT_MODIFIED)
+        cache.clear()
+        post_detail_response = self.client.generic(
+            'GET', post_detail_url, post_detail_data, content_type='application/json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+        self.assertEqual(post_detail_response.data['post']['author']['followers_count'], 1)
+        self.assertNotEqual(post_detail_response['ETag'], etag)
+        etag = post_detail_response['ETag']
+
+        user.refresh_from_db()
+        user.save()
+        post_detail_response = self.client.generic(
+            'GET', post_detail_url, post_detail_data, content_type='application/json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(post_detail_response.status_code, HTTP_304_NOT_MODIFIED)
+        user.name = 'New Name'
+        user.save()
+        post_detail_response = self.client.generic(
+            'GET', post_detail_url, post_detail_data, content_type='application/json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(post_detail_response.status_code, HTTP_200_OK)
+        self.assertEqual(post_detail_response.data['post']['author']['name'], 'New Name')
+        print('Done.....')
@@ -1,12 +1,13 @@
 from django.urls import path
 
-from blog_api.posts.api.views import post_create, post_detail, post_update, post_delete, post_bookmarks, \
+from blog_api.posts.api.views import post_create, post_import, post_detail, post_update, post_delete, post_bookmarks, \
         post_bookmark, post_likes, post_dislikes, post_like, all_tags, all_tags_by_post_count, all_tag_posts, next_previous_posts, post_search, \
-        featured_posts, most_liked_posts, most_disliked_posts, oldest_posts, most_bookmarked_posts, all_posts, posts_fallback
+        featured_posts, most_liked_posts, most_disliked_posts, oldest_posts, most_bookmarked_posts, all_posts, export, posts_fallback
 
 
 urlpatterns = [
     path('post/create/', post_create, name='post-create'),
+    path('post/import/', post_import, name='post-import'),
     path('post/detail/', post_detail, name='post-detail'),
     path('post/update/', post_update, name='post-update'),
     path('post/delete/', post_delete, name='post-delete'),
@@ -26,5 +27,6 @@ urlpatterns = [
     path('oldest/', oldest_posts, name='posts-oldest'),
     path('most-bookmarked/', most_bookmarked_posts, name='posts-most-bookmarked'),
     path('posts/', all_posts, name='posts'),
+    path('export/', export, name='posts-export'),
     path('', posts_fallback, name='posts-fallback'),
 ]
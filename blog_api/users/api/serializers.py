@@ -1,9 +1,9 @@
-from rest_framework.serializers import Serializer, ModelSerializer, ValidationError, CharField, EmailField, PrimaryKeyRelatedField, SerializerMethodField
+from rest_framework.serializers import Serializer, ModelSerializer, ValidationError, CharField, EmailField, IntegerField, \
+                                                                                PrimaryKeyRelatedField, SerializerMethodField
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.validators import UniqueValidator
 
 from rest_framework_simplejwt.settings import api_settings
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.serializers import PasswordField
 
 from django.conf import settings
@@ -14,11 +14,22 @@ from django.contrib.auth.validators import UnicodeUsernameValidator
 from blog_api.users.model_validators import validate_3_special_characters_max, validate_no_special_chars
 
 from blog_api.users.models import UserFollowing
+from blog_api.users.tokens import RefreshToken
 from blog_api.posts.models import Post
 
 User = get_user_model()
 
 
+def get_count(obj, name, user=None):
+    '''
+    Reads a count annotated by `User.items.with_counts()` or `UserFollowing.items`. Falls back to the
+    user's get_<name>() COUNT query for objects that were not annotated e.g. a post author.
+    '''
+    if hasattr(obj, name):
+        return getattr(obj, name)
+    return getattr(user or obj, f'get_{name}')()
+
+
 class TokenObtainSerializer(Serializer):
     '''
     --Base login serializer override from https://tinyurl.com/DRFSimplejwt--
@@ -124,6 +135,33 @@ class TokenObtainPairSerializer(TokenObtainSerializer):
         return data
 
 
+class TokenRefreshSerializer(Serializer):
+    '''
+    --Refresh serializer override from https://tinyurl.com/DRFSimplejwt--
+    Refreshes with blog_api.users.tokens.RefreshToken so rotated tokens are blacklisted by the
+    TOKEN_BLACKLIST_BACKEND.
+    '''
+    refresh = CharField()
+
+    def validate(self, attrs):
+        '''
+        :returns: dict
+        1) Verifies the refresh token, checking the blacklist, and adds a new access token.
+        2) Blacklists the refresh token and adds a new one when rotating refresh tokens.
+        '''
+        refresh = RefreshToken(attrs['refresh'])  # 1
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:  # 2
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
 class RegisterSerializer(ModelSerializer):
     '''
     --Register Serializer--
@@ -185,8 +223,6 @@ class UserSerializer(ModelSerializer):
     User detail and update serializer.
     '''
 
-    following_count = SerializerMethodField()
-    followers_count = SerializerMethodField()
     post_count = SerializerMethodField()
 
     class Meta:
@@ -200,22 +236,14 @@ class UserSerializer(ModelSerializer):
             'followers_count',
         ]
 
-    def get_following_count(self, obj):
-        return obj.get_following_count()
-
-    def get_followers_count(self, obj):
-        return obj.get_followers_count()
-
     def get_post_count(self, obj):
-        return obj.get_post_count()
+        return get_count(obj, 'post_count')
 
 
 class UserPublicSerializer(ModelSerializer):
     '''
     User public detail. Read only. Email excluded.
     '''
-    following_count = SerializerMethodField()
-    followers_count = SerializerMethodField()
     post_count = SerializerMethodField()
 
     class Meta:
@@ -226,21 +254,15 @@ class UserPublicSerializer(ModelSerializer):
         ]
         read_only_fields = fields
 
-    def get_following_count(self, obj):
-        return obj.get_following_count()
-
-    def get_followers_count(self, obj):
-        return obj.get_followers_count()
-
     def get_post_count(self, obj):
-        return obj.get_post_count()
+        return get_count(obj, 'post_count')
 
 
 class UserFollowingSerializer(ModelSerializer):
     pub_id = SerializerMethodField()
     username = SerializerMethodField()
-    followers_count = SerializerMethodField()
-    following_count = SerializerMethodField()
+    followers_count = IntegerField(source='following.followers_count', read_only=True)
+    following_count = IntegerField(source='following.following_count', read_only=True)
     post_count = SerializerMethodField()
 
     class Meta:
@@ -255,21 +277,15 @@ class UserFollowingSerializer(ModelSerializer):
     def get_username(self, obj):
         return obj.following.username
 
-    def get_followers_count(self, obj):
-        return obj.following.get_followers_count()
-
-    def get_following_count(self, obj):
-        return obj.following.get_following_count()
-
     def get_post_count(self, obj):
-        return obj.following.get_post_count()
+        return get_count(obj, 'post_count', obj.following)
 
 
 class UserFollowersSerializer(ModelSerializer):
     pub_id = SerializerMethodField()
     username = SerializerMethodField()
-    followers_count = SerializerMethodField()
-    following_count = SerializerMethodField()
+    followers_count = IntegerField(source='user.followers_count', read_only=True)
+    following_count = IntegerField(source='user.following_count', read_only=True)
     post_count = SerializerMethodField()
 
     class Meta:
@@ -284,11 +300,5 @@ class UserFollowersSerializer(ModelSerializer):
     def get_username(self, obj):
         return obj.user.username
 
-    def get_followers_count(self, obj):
-        return obj.user.get_followers_count()
-
-    def get_following_count(self, obj):
-        return obj.user.get_following_count()
-
     def get_post_count(self, obj):
-        return obj.user.get_post_count()
+        return get_count(obj, 'post_count', obj.user)
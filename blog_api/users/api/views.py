@@ -6,8 +6,6 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
 from rest_framework.response import Response
 
-from rest_framework_simplejwt.tokens import RefreshToken, OutstandingToken
-from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.exceptions import TokenError
 
@@ -16,10 +14,12 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-from blog_api.users.api.serializers import TokenObtainPairSerializer, RegisterSerializer, UserSerializer, UserPublicSerializer, UserFollowingSerializer
-from blog_api.users.models import VerificationCode, PasswordResetCode
-from blog_api.posts.models import Post, Like, DisLike
-from blog_api.posts.api.serializers import PostOverviewSerializer
+from blog_api.users.api.serializers import TokenObtainPairSerializer, TokenRefreshSerializer, RegisterSerializer, UserSerializer, UserPublicSerializer, UserFollowingSerializer, \
+                                                                                                    UserFollowersSerializer
+from blog_api.users.models import UserFollowing, VerificationCode, PasswordResetCode
+from blog_api.users.tokens import RefreshToken
+from blog_api.posts.models import Post, Reaction
+from blog_api.posts.api.serializers import PostOverviewReadSerializer
 from blog_api.posts.api.views import get_paginated_queryset
 from blog_api.users.signals import new_registration
 from blog_api.users.utils import get_client_ip
@@ -194,7 +194,9 @@ def user_verify_resend(request):
                 'message': 'Password does not match what we have on file. Please try again.'
             }, status=HTTP_400_BAD_REQUEST)
 
-        verification_code = user.verification_codes.latest('created_at')
+        verification_code = user.verification_codes.order_by('-created_at').first()
+        if verification_code is None:  # purged by purge_expired_codes
+            verification_code = VerificationCode.objects.create(user_to_verify=user)
 
         verification_code_sent = verification_code.send_user_verification_email()  # 4
 
@@ -219,7 +221,7 @@ def user_verify_resend(request):
         )
 
 
-user_login_refresh = TokenRefreshView().as_view()
+user_login_refresh = TokenRefreshView().as_view(serializer_class=TokenRefreshSerializer)
 
 
 class MyObtainTokenPairView(TokenObtainPairView):  # 1
@@ -314,10 +316,9 @@ def user_password_reset_send(request):
     try:
         user = User.objects.get(email=email)  # 2
 
-        codes_exist = PasswordResetCode.objects.filter(user=user).exists()
-        if codes_exist:
-            password_reset_link_sent = PasswordResetCode.objects.filter(
-                                            user=user).latest('created_at').send_user_password_reset_email()  # 3
+        code = PasswordResetCode.objects.filter(user=user).order_by('-created_at').first()
+        if code:
+            password_reset_link_sent = code.send_user_password_reset_email()  # 3
             return Response({
                     'password_reset_link_sent': password_reset_link_sent['password_reset_link_sent'],
                     'message': password_reset_link_sent['message']
@@ -437,7 +438,7 @@ def user_update(request):
                 'message': 'You need to include at least one field to update.'
             }, status=HTTP_400_BAD_REQUEST
         )
-    user = request.user
+    user = User.items.with_counts().get(pk=request.user.pk)
     serializer = UserSerializer(user, data=request.data, partial=partial)  # 4
 
     if serializer.is_valid():  # 5
@@ -534,7 +535,7 @@ def user(request):
 
     if user_pub_id:
         try:
-            user = User.objects.get(pub_id=user_pub_id)  # 2
+            user = User.items.with_counts().get(pub_id=user_pub_id)  # 2
         except User.DoesNotExist:
             return Response({
                     'message': 'No user found with provided user id.'
@@ -546,7 +547,7 @@ def user(request):
                 }, status=HTTP_200_OK
             )
 
-    user = request.user
+    user = User.items.with_counts().get(pk=request.user.pk)
     serialized_user = UserSerializer(user).data  # 3
     return Response({
             'user': serialized_user 
@@ -587,7 +588,7 @@ def user_follow(request):
 
     user = request.user  # 3
 
-    followed = user.follow_user(follow_pub_id)  # 4
+    followed = user.follow_user(user=user_to_follow)  # 4
 
     if followed['followed']:
         return Response({
@@ -609,12 +610,12 @@ def user_posts(request):
     '''
     --All user posts view--
     ==========================================================================================================
-    Returns nested representations of all posts for this user. Paginates the quereyset.
+    Returns nested representations of all posts for this user, newest first. Cursor paginates the quereyset.
     ==========================================================================================================
     '''
     posts_to_paginate = \
-        Post.objects.prefetch_related('bookmarks').select_related('previouspost').select_related('nextpost').filter(author=request.user, is_active=True)
-    all_posts = get_paginated_queryset(request, posts_to_paginate, PostOverviewSerializer)
+        Post.objects.prefetch_related('tags').select_related('author').filter(author=request.user, is_active=True)
+    all_posts = get_paginated_queryset(request, posts_to_paginate, PostOverviewReadSerializer, ordering=('-created_at', '-id',))
 
     return all_posts
 
@@ -625,10 +626,10 @@ def user_following(request):
     '''
     --All user following view--
     ==========================================================================================================
-    Returns all users a user is folllowing. Paginates the queryset.
+    Returns all users a user is folllowing. Paginates the queryset, counts are annotated so a page is one query.
     ==========================================================================================================
     '''
-    user_followings = request.user.following.all()
+    user_followings = UserFollowing.items.following_of(request.user)
 
     all_followings = get_paginated_queryset(request, user_followings, UserFollowingSerializer, page_size=30)
 
@@ -641,12 +642,12 @@ def user_followers(request):
     '''
     --All user followers view--
     ==========================================================================================================
-    Returns all users that are following him. Paginates the queryset.
+    Returns all users that are following him. Paginates the queryset, counts are annotated so a page is one query.
     ==========================================================================================================
     '''
-    user_followers = request.user.followers.all()
+    user_followers = UserFollowing.items.followers_of(request.user)
 
-    all_followers = get_paginated_queryset(request, user_followers, UserFollowingSerializer, page_size=30)
+    all_followers = get_paginated_queryset(request, user_followers, UserFollowersSerializer, page_size=30)
 
     return all_followers
 
@@ -657,19 +658,14 @@ def user_following_posts(request):
     '''
     --All user following posts view--
     ==========================================================================================================
-    Returns all post by those hes following. Paginates the queryset.
+    Returns all post by those hes following, newest first. Keyset paginated on (created_at, id).
     ==========================================================================================================
     '''
-    user_following = request.user.following.all()
-
-    posts = []
+    posts_to_paginate = Post.items.following_feed(request.user)
 
-    for follow in user_following:
-        follow_posts = Post.objects.filter(author=follow.following.id, is_active=True)
-        for post in follow_posts:
-            posts.append(post)
-
-    all_following_posts = get_paginated_queryset(request, posts, PostOverviewSerializer)
+    all_following_posts = get_paginated_queryset(
+        request, posts_to_paginate, PostOverviewReadSerializer, ordering=('-created_at', '-id',)
+    )
 
     return all_following_posts
 
@@ -678,21 +674,16 @@ def user_following_posts(request):
 @permission_classes((IsAuthenticated,))
 def user_follower_posts(request):
     '''
-    --All user following posts view--
+    --All user follower posts view--
     ==========================================================================================================
-    Returns all post by those hes following. Paginates the queryset.
+    Returns all post by those following him, newest first. Keyset paginated on (created_at, id).
     ==========================================================================================================
     '''
-    user_followers = request.user.followers.all()
-
-    posts = []
+    posts_to_paginate = Post.items.follower_feed(request.user)
 
-    for follow in user_followers:
-        follow_posts = Post.objects.filter(author=follow.user.id, is_active=True)
-        for post in follow_posts:
-            posts.append(post)
-
-    all_followers_posts = get_paginated_queryset(request, posts, PostOverviewSerializer)
+    all_followers_posts = get_paginated_queryset(
+        request, posts_to_paginate, PostOverviewReadSerializer, ordering=('-created_at', '-id',)
+    )
 
     return all_followers_posts
 
@@ -707,7 +698,7 @@ def user_bookmarks(request):
     ==========================================================================================================
     '''
     user_bookmarks = Post.objects.filter(bookmarks=request.user, is_active=True)
-    all_user_bookmarks = get_paginated_queryset(request, user_bookmarks, PostOverviewSerializer)
+    all_user_bookmarks = get_paginated_queryset(request, user_bookmarks, PostOverviewReadSerializer)
     return all_user_bookmarks
 
 
@@ -720,15 +711,13 @@ def user_likes(request):
     Returns all posts liked by a user. Paginates the queryset.
     ==========================================================================================================
     '''
-    user = request.user
-    user_liked_posts = Like.objects.filter(users=user)
-    liked_posts = []
-    for like in user_liked_posts:
-        if not like.post.is_active:
-            continue
-        liked_posts.append(like.post)
-
-    all_liked_posts = get_paginated_queryset(request, liked_posts, PostOverviewSerializer)
+    liked_posts = (
+        Post.objects.prefetch_related('tags')
+                    .select_related('author')
+                    .filter(reactions__user=request.user, reactions__value=Reaction.LIKE, is_active=True)
+    )
+
+    all_liked_posts = get_paginated_queryset(request, liked_posts, PostOverviewReadSerializer)
     return all_liked_posts
 
 
@@ -736,20 +725,18 @@ def user_likes(request):
 @permission_classes((IsAuthenticated,))
 def user_dislikes(request):
     '''
-    --All posts liked view--
+    --All posts disliked view--
     ==========================================================================================================
-    Returns all posts liked by a user. Paginates the queryset.
+    Returns all posts disliked by a user. Paginates the queryset.
     ==========================================================================================================
     '''
-    user = request.user
-    user_disliked_posts = DisLike.objects.filter(users=user)
-    disliked_posts = []
-    for dislike in user_disliked_posts:
-        if not dislike.post.is_active:
-            continue
-        disliked_posts.append(dislike.post)
-
-    all_disliked_posts = get_paginated_queryset(request, disliked_posts, PostOverviewSerializer)
+    disliked_posts = (
+        Post.objects.prefetch_related('tags')
+                    .select_related('author')
+                    .filter(reactions__user=request.user, reactions__value=Reaction.DISLIKE, is_active=True)
+    )
+
+    all_disliked_posts = get_paginated_queryset(request, disliked_posts, PostOverviewReadSerializer)
     return all_disliked_posts
 
 
@@ -0,0 +1,31 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from django.utils.translation import gettext_lazy as _
+
+from blog_api.users.cache import get_auth_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    '''
+    --Cached JWT authentication--
+    Authenticates like JWTAuthentication but resolves the token's user through blog_api.users.cache instead
+    of fetching the user row on every request. request.user only has id, pub_id, username, is_active and
+    is_staff loaded, views that need the rest of the user fetch it themselves.
+    '''
+
+    def get_user(self, validated_token):
+        try:
+            pub_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = get_auth_user(pub_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
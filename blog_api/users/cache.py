@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+AUTH_USER_KEY = 'users:auth:{pub_id}'
+AUTH_USER_FIELDS = ('id', 'pub_id', 'username', 'is_active', 'is_staff',)  # is_staff for IsAdminUser
+
+
+class LocalCache:
+    '''
+    --In-process LRU cache--
+    Keeps up to size entries for timeout seconds in this process. Entries can't be invalidated from other
+    processes so the timeout is kept short.
+    '''
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_auth_users = LocalCache(settings.AUTH_USER_LOCAL_CACHE_SIZE, settings.AUTH_USER_LOCAL_CACHE_TIMEOUT)
+
+
+def _build_user(state):
+    '''
+    Builds a User from its cached state as if it was loaded with .only(*AUTH_USER_FIELDS), the other fields
+    load from the database the first time they are read.
+    '''
+    from blog_api.users.models import User  # avoid circular imports
+
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in state]
+    return User.from_db(DEFAULT_DB_ALIAS, fields, [state[field] for field in fields])
+
+
+def get_auth_user(pub_id):
+    '''
+    --Read-through cache for authenticated users--
+    ==========================================================================================================
+    :param: str pub_id
+    :returns: a User with only AUTH_USER_FIELDS loaded, or None when no user has the pub_id.
+    1) Looks the user's state up in the process' LRU, then in the shared cache, then in the database.
+    2) The state found is kept in the caches it was missing from. Missing users are not cached.
+    ==========================================================================================================
+    '''
+    from blog_api.users.models import User  # avoid circular imports
+
+    key = AUTH_USER_KEY.format(pub_id=pub_id)
+    state = local_auth_users.get(key)  # 1
+    if state is None:
+        state = cache.get(key)
+        if state is None:
+            state = User.objects.filter(pub_id=pub_id).values(*AUTH_USER_FIELDS).first()
+            if state is None:
+                return None
+            cache.set(key, state, timeout=settings.AUTH_USER_CACHE_TIMEOUT)  # 2
+        local_auth_users.set(key, state)
+    return _build_user(state)
+
+
+def invalidate_auth_user(pub_id):
+    '''
+    Drops a user's cached state from the shared cache and this process' LRU. Runs right away and again
+    once the transaction commits, so a request that cached the old row in between is thrown away too.
+    Other processes drop it when their LRU entry times out.
+    '''
+    key = AUTH_USER_KEY.format(pub_id=pub_id)
+
+    def invalidate():
+        cache.delete(key)
+        local_auth_users.delete(key)
+
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -0,0 +1,57 @@
+import time
+
+from django.apps import apps
+from django.db import transaction
+
+
+CLEANUP_LOCK_KEY = 'users:cleanup:lock'
+
+# model label: field holding when a row expires. Codes are expired as soon as they are used.
+CLEANUPS = {
+    'users.verificationcode': 'code_expiration',
+    'users.passwordresetcode': 'code_expiration',
+}
+
+
+def purge_expired_batch(model, field, expired_at, batch_size):
+    '''
+    Deletes up to batch_size rows of model whose field is at or before expired_at, the longest expired first, in
+    one DELETE ... WHERE id IN (SELECT ... LIMIT batch_size) statement. Returns the number of rows deleted.
+    '''
+    expired = model._base_manager.filter(**{f'{field}__lte': expired_at}).order_by(field).values('pk')[:batch_size]
+    deleted, _ = model._base_manager.filter(pk__in=expired).delete()
+    return deleted
+
+
+def purge_expired(expired_at, batch_size, time_budget, cleanups=CLEANUPS):
+    '''
+    --Expired row cleanup--
+    ==========================================================================================================
+    :param: datetime expired_at, rows that expired at or before it are purged.
+    :param: int batch_size, rows deleted per statement.
+    :param: float time_budget, seconds after which no more batches are started.
+    :param: dict cleanups, model label: field holding when a row expires.
+    :returns: dict with the rows deleted per model label, the batches run and whether every expired row is gone.
+    1) Purges each model in turn, batch_size rows at a time. Each batch is its own transaction so the rows
+       being purged are only ever locked for one batch.
+    2) Stops once time_budget seconds have passed, at least one batch is always run so that runs that carry
+       on after another always make progress.
+    ==========================================================================================================
+    '''
+    started = time.monotonic()
+    progress = {'deleted': {label: 0 for label in cleanups}, 'batches': 0, 'finished': False}
+    for label, field in cleanups.items():
+        model = apps.get_model(label)
+        while True:
+            with transaction.atomic():  # 1
+                deleted = purge_expired_batch(model, field, expired_at, batch_size)
+            if not deleted:
+                break
+            progress['deleted'][label] += deleted
+            progress['batches'] += 1
+            if deleted < batch_size:
+                break
+            if time.monotonic() - started >= time_budget:  # 2
+                return progress
+    progress['finished'] = True
+    return progress
@@ -0,0 +1,133 @@
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+EMAIL_RATE_KEY = 'emails:rate:{domain}:{window}'
+
+# code model label: the code's user field
+CODE_MODELS = {
+    'users.verificationcode': 'user_to_verify',
+    'users.passwordresetcode': 'user',
+}
+
+
+def _dispatch(emails):
+    '''
+    Hands the emails to the send_emails task in chunks of EMAIL_BATCH_SIZE.
+    '''
+    from blog_api.users.tasks import send_emails
+
+    for start in range(0, len(emails), settings.EMAIL_BATCH_SIZE):
+        send_emails.delay(emails[start:start + settings.EMAIL_BATCH_SIZE])
+
+
+# Open batches of this thread by (connection alias, savepoint ids). Only the batch's on_commit callback holds
+# on to it, so a batch is gone from here once its transaction or savepoint is rolled back.
+_email_batches = threading.local()
+
+
+def _get_email_batches():
+    if not hasattr(_email_batches, 'batches'):
+        _email_batches.batches = weakref.WeakValueDictionary()
+    return _email_batches.batches
+
+
+class EmailBatch(list):
+    '''Emails queued in one transaction or savepoint.'''
+
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def send(self):
+        batches = _get_email_batches()
+        if batches.get(self.key) is self:
+            del batches[self.key]
+        _dispatch(list(self))
+        self.clear()
+
+
+def queue_email(code):
+    '''
+    --Queue code email--
+    ==========================================================================================================
+    Sends the email of a VerificationCode or PasswordResetCode from a Celery worker once the transaction
+    commits, so requests never wait on the mail provider and workers never see uncommitted codes.
+    1) Outside of a transaction the email is handed to the task right away.
+    2) Emails queued in the same transaction and savepoint, e.g. one request, are sent by one task over one
+       connection. Each batch registers one on_commit callback, a new one is started in another savepoint or
+       once the batch was sent or rolled back.
+    ==========================================================================================================
+    '''
+    email = [code._meta.label_lower, code.pk]
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _dispatch([email])  # 1
+        return
+
+    batches = _get_email_batches()
+    key = (connection.alias, tuple(connection.savepoint_ids))
+    batch = batches.get(key)
+    if batch is None:
+        batch = batches[key] = EmailBatch(key)  # 2
+        transaction.on_commit(batch.send)
+    batch.append(email)
+
+
+def get_email_messages(emails):
+    '''
+    Builds the email messages of [code model label, code id] pairs, in order, with one query per code model.
+    Codes deleted since they were queued and codes with nothing left to send, e.g. users verified in the
+    meantime, are skipped. Codes rotated since they were queued are sent with their current code.
+    '''
+    ids = defaultdict(list)
+    for label, pk in emails:
+        ids[label].append(pk)
+
+    codes = {}
+    for label, pks in ids.items():
+        for code in apps.get_model(label).objects.select_related(CODE_MODELS[label]).filter(pk__in=pks):
+            codes[label, code.pk] = code
+
+    messages = []
+    for label, pk in emails:
+        message = codes[label, pk].get_email_message() if (label, pk) in codes else None
+        if message is not None:
+            messages.append(([label, pk], message))
+    return messages
+
+
+def get_email_domain(message):
+    return message.to[0].rsplit('@', 1)[-1].lower()
+
+
+def take_email_rate(domain, count):
+    '''
+    --Per domain rate limit--
+    ==========================================================================================================
+    Takes up to count sends from the domain's EMAIL_DOMAIN_RATE_LIMIT for the current EMAIL_DOMAIN_RATE_WINDOW
+    seconds. Counters live in the cache so every worker shares them.
+    :returns: the number of sends allowed and the seconds until the window resets.
+    ==========================================================================================================
+    '''
+    window_length = settings.EMAIL_DOMAIN_RATE_WINDOW
+    now = time.time()
+    window = int(now // window_length)
+    reset_in = window_length - now % window_length
+    key = EMAIL_RATE_KEY.format(domain=domain, window=window)
+
+    cache.add(key, 0, timeout=window_length * 2)
+    try:
+        sent = cache.incr(key, count)
+    except ValueError:
+        sent = None
+    if sent is None:  # the cache is unavailable or evicted the counter, don't hold emails back
+        return count, reset_in
+    return max(0, min(count, settings.EMAIL_DOMAIN_RATE_LIMIT - (sent - count))), reset_in
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from blog_api.users.managers import count_subquery
+from blog_api.users.models import User, UserFollowing
+
+
+class Command(BaseCommand):
+    '''
+    --Repair follow counters--
+    Recomputes followers_count and following_count from the UserFollowing rows in batches of user ids and rewrites
+    only the users whose stored counters drifted.
+    '''
+    help = 'Recompute the stored follower and following counters on users and repair any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users checked per UPDATE.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted users without fixing them.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        followers = count_subquery(UserFollowing.objects.all(), 'following', 'pub_id')
+        following = count_subquery(UserFollowing.objects.all(), 'user', 'pub_id')
+
+        checked = 0
+        repaired = 0
+        last_id = 0
+        while True:
+            batch_ids = list(
+                User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+            checked += len(batch_ids)
+
+            drifted_ids = list(
+                User.objects.filter(id__in=batch_ids)
+                            .annotate(real_followers=followers, real_following=following)
+                            .filter(
+                                ~Q(followers_count=F('real_followers')) |
+                                ~Q(following_count=F('real_following'))
+                            )
+                            .values_list('id', flat=True)
+            )
+            if not drifted_ids:
+                continue
+
+            if not dry_run:
+                with transaction.atomic():
+                    User.objects.filter(id__in=drifted_ids).update(
+                        followers_count=followers, following_count=following
+                    )
+            repaired += len(drifted_ids)
+
+        action = 'would be repaired' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} users, {repaired} {action}.'))
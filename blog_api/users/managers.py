@@ -0,0 +1,80 @@
+from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field, outer_ref):
+    '''
+    COUNT(*) of the queryset rows whose `field` matches `outer_ref` of the outer row. A correlated subquery on
+    an indexed column, so a page of users costs one query however many posts or follows they have.
+    '''
+    counts = (
+        queryset.filter(**{field: OuterRef(outer_ref)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('*'))
+            .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def user_counts(prefix=''):
+    '''
+    post_count annotation for the user at `prefix` e.g. 'following__' when annotating UserFollowing rows.
+    Follower and following counts are stored on User.
+    '''
+    from blog_api.posts.models import Post  # avoid circular imports
+
+    return {
+        'post_count': count_subquery(Post.objects.filter(is_active=True), 'author', prefix + 'pk'),
+    }
+
+
+class UserQuerySet(models.QuerySet):
+
+    def with_counts(self):
+        return self.annotate(**user_counts())
+
+
+class UserManager(models.Manager):
+
+    def get_queryset(self):
+        return UserQuerySet(self.model, using=self._db)
+
+    def with_counts(self):
+        return self.get_queryset().with_counts()
+
+
+class UserFollowingQuerySet(models.QuerySet):
+
+    def following_of(self, user):
+        '''
+        The users this user follows, each row annotated with the followed user's post count.
+        '''
+        return (
+            self.select_related('following')
+                .filter(user=user)
+                .annotate(**user_counts('following__'))
+        )
+
+    def followers_of(self, user):
+        '''
+        The users following this user, each row annotated with the follower's post count.
+        '''
+        return (
+            self.select_related('user')
+                .filter(following=user)
+                .annotate(**user_counts('user__'))
+        )
+
+
+class UserFollowingManager(models.Manager):
+
+    def get_queryset(self):
+        return UserFollowingQuerySet(self.model, using=self._db)
+
+    def following_of(self, user):
+        return self.get_queryset().following_of(user)
+
+    def followers_of(self, user):
+        return self.get_queryset().followers_of(user)
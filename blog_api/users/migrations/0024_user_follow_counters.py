@@ -0,0 +1,31 @@
+# Generated by Django 3.1.13 on 2021-08-14 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0023_auto_20210802_1335'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql='''
+                UPDATE users_user u SET
+                    followers_count = (SELECT count(*) FROM users_userfollowing f WHERE f.following_id = u.pub_id),
+                    following_count = (SELECT count(*) FROM users_userfollowing f WHERE f.user_id = u.pub_id);
+            ''',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.1.13 on 2026-10-18 06:16
+
+import blog_api.users.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0024_user_follow_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='passwordresetcode',
+            name='code_expiration',
+            field=models.DateTimeField(default=blog_api.users.models.get_code_expiration),
+        ),
+        migrations.AlterField(
+            model_name='verificationcode',
+            name='code_expiration',
+            field=models.DateTimeField(default=blog_api.users.models.get_code_expiration),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetcode',
+            index=models.Index(fields=['code_expiration'], name='resetcode_expiration_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetcode',
+            index=models.Index(fields=['user', 'created_at'], name='resetcode_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationcode',
+            index=models.Index(fields=['code_expiration'], name='vcode_expiration_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationcode',
+            index=models.Index(fields=['user_to_verify', 'created_at'], name='vcode_user_created_idx'),
+        ),
+    ]
@@ -2,19 +2,26 @@ import uuid
 from datetime import timedelta
 from django.conf import settings
 from django.db.models import Model, Manager, DateTimeField, CharField, EmailField, IntegerField, BooleanField, \
-                                                        GenericIPAddressField, ForeignKey, CASCADE, UniqueConstraint
-from django.contrib.auth.models import AbstractUser
+                                                GenericIPAddressField, ForeignKey, CASCADE, UniqueConstraint, Index
+from django.contrib.auth.models import AbstractUser, UserManager as AuthUserManager
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.urls import reverse
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 
 from blog_api.users.model_validators import validate_min_3_characters, validate_3_special_characters_max, \
                                                                                             validate_no_special_chars
+from blog_api.users.managers import UserManager, UserFollowingManager
+from blog_api.users.emails import queue_email
+
+
+def get_code_expiration():
+    '''Codes expire 3 days after they are created or rotated.'''
+    return timezone.now() + timedelta(days=3)
 
 
 class BaseModel(Model):
@@ -47,6 +54,24 @@ class User(BaseModel, AbstractUser):
     last_name = None
     is_active = BooleanField(default=False)
     ip_address = GenericIPAddressField(editable=False, blank=True, null=True)
+    followers_count = IntegerField(editable=False, default=0)
+    following_count = IntegerField(editable=False, default=0)
+
+    objects = AuthUserManager()
+    items = UserManager()
+
+    # Maintained with F() expressions by the UserFollowing receivers in signals.py, never written by save().
+    COUNTER_FIELDS = ('followers_count', 'following_count',)
+    # Shown with the user's posts, posts/signals.py drops the posts' caches when they change.
+    POST_AUTHOR_FIELDS = ('username', 'name',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._loaded_post_author_fields = {  # lets signals.py tell a rename from any other save
+            field: user.__dict__[field] for field in cls.POST_AUTHOR_FIELDS if field in user.__dict__
+        }
+        return user
 
     def password_reset(self, password):
         try:
@@ -59,65 +84,61 @@ class User(BaseModel, AbstractUser):
         self.set_password(password)
         self.save()
 
-        password_reset_codes_exist = self.password_reset_codes.all().exists()
-        if password_reset_codes_exist:
-            now = timezone.now()
-            for code in self.password_reset_codes.all():
-                code.code_expiration = (now - timedelta(days=100))
-                code.save()
+        now = timezone.now()
+        self.password_reset_codes.filter(code_expiration__gt=now - timedelta(days=100)).update(
+            code_expiration=now - timedelta(days=100), updated_at=now
+        )
 
         return {
             'password_reset': True,
             'message': 'The password has been reset. Please continue to log in.'
         }
 
-    def follow_user(self, pubid):
+    def follow_user(self, pubid=None, user=None):
         '''
         Follow or unfollow a user based on if follow exists already.
+        1) Uses the provided user to follow or looks it up by pubid.
+        2) Creates the follow or gets the existing one in a single get_or_create on the unique index.
+        3) Deletes an existing follow.
+        The insert and the delete each run in their own transaction with the receivers in signals.py that move
+        both users counters.
         '''
-        if not User.objects.filter(pub_id=pubid).exists():
-            return {
-                'followed': False,
-                'message': 'No user found with provided id.'
-            }
-        user_to_follow = User.objects.get(pub_id=pubid)
-        
-        if not UserFollowing.objects.filter(user=self, following=user_to_follow).exists():
-            follow = UserFollowing.objects.create(user=self, following=user_to_follow)
-            # follow.following.followers_count += 1
-            # follow.following.save()
-            # self.following_count += 1
-            # self.save()
+        user_to_follow = user
+        if user_to_follow is None:
+            try:
+                user_to_follow = User.objects.get(pub_id=pubid)  # 1
+            except User.DoesNotExist:
+                return {
+                    'followed': False,
+                    'message': 'No user found with provided id.'
+                }
+
+        follow, created = UserFollowing.objects.get_or_create(user=self, following=user_to_follow)  # 2
+        if created:
             return {
                 'followed': True,
                 'message': f'{user_to_follow.username} followed successfully.'
             }
-        
-        else:
-            follow = UserFollowing.objects.get(user=self, following=user_to_follow)
-            # follow.following.followers_count -= 1
-            # follow.following.save()
-            follow.delete()
-            # self.following_count -= 1
-            # self.save()
-            return {
-                'followed': False,
-                'message': f'{user_to_follow.username} unfollowed successfully.'
-            }
+
+        follow.delete()  # 3
+        return {
+            'followed': False,
+            'message': f'{user_to_follow.username} unfollowed successfully.'
+        }
 
     def get_following_count(self):
-        return self.following.all().count()
+        return self.following_count
 
     def get_followers_count(self):
-        return self.followers.all().count()
+        return self.followers_count
 
-    def bookmark_post(self, slug):
+    def bookmark_post(self, slug, post=None):
         '''
-        Bookmarks a post for this user.
+        Bookmarks a post for this user. Uses the provided post or looks it up by slug.
         '''
         from blog_api.posts.models import Post  # avoid circular imports
         try:
-            post_to_bookmark = Post.objects.get(slug=slug)
+            post_to_bookmark = post or Post.objects.get(slug=slug)
             if not post_to_bookmark.is_active:
                 raise Post.DoesNotExist()
         except Post.DoesNotExist:
@@ -125,16 +146,16 @@ class User(BaseModel, AbstractUser):
                 'bookmarked': False,
                 'message': 'No post found with provided slug.'
             }
-        bookmarked = post_to_bookmark.bookmark(pubid=self.pub_id)
+        bookmarked = post_to_bookmark.bookmark(user=self)
         return bookmarked
 
-    def like_post(self, slug, like):
+    def like_post(self, slug, like, post=None):
         '''
-        Like a post for this user.
+        Like a post for this user. Uses the provided post or looks it up by slug.
         '''
         from blog_api.posts.models import Post
         try:
-            post = Post.objects.get(slug=slug)
+            post = post or Post.objects.get(slug=slug)
             if not post.is_active:
                 raise Post.DoesNotExist()
         except Post.DoesNotExist:
@@ -148,19 +169,12 @@ class User(BaseModel, AbstractUser):
                 'message': 'Please include a `like` or `dislike` keyword to like or dislike.'
             }
 
-        if like == 'like':
-            liked = post.likes.like(self.pub_id)
-            post.set_like_score()
-            return liked
-        elif like == 'dislike':
-            disliked = post.dislikes.dislike(self.pub_id)
-            post.set_like_score()
-            return disliked
-        else:
+        if like not in ('like', 'dislike'):
             return {
                 'liked': False,
                 'message': 'Please include either `like` or `dislike` to like or dislike post.'
             }
+        return post.react(self, like)
 
     def get_post_count(self):
         return self.posts.filter(is_active=True).count()
@@ -172,9 +186,20 @@ class User(BaseModel, AbstractUser):
         '''
         --User model save method--
         1) Sets self.pub_id to UUID hex on first save.
+        2) Updates write every loaded field but the follow counters. Users authenticated from the cache only
+           have a few fields loaded.
         '''
         if not self.id:
             self.pub_id = str(uuid.uuid4().hex)
+
+        if self.id and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:  # 2
+            deferred_fields = self.get_deferred_fields()
+            kwargs['update_fields'] = [  # a stale instance must not overwrite the counters
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred_fields
+            ]
+
         return super(User, self).save(*args, **kwargs)
 
 
@@ -182,15 +207,15 @@ class VerificationCode(BaseModel):
     '''Verification Code model. Code is sent to user for verification, users are inactive until verified'''
     verification_code = CharField(editable=False, unique=True, max_length=50)
     user_to_verify = ForeignKey(User, related_name='verification_codes', on_delete=CASCADE)
-    code_expiration = DateTimeField(default=timezone.now() + timedelta(days=3))
+    code_expiration = DateTimeField(default=get_code_expiration)
 
     def send_user_verification_email(self):
 
         '''
         --Send user verification email--
-        Sends user a verification code email using user.email_user() if the user is not active, 
-        the link sent points to settings.FRONTEND_URL. If code is expired then code is rotated and
-        expiration extended.
+        Queues a verification code email to the user, sent by a Celery worker once the transaction commits,
+        if the user is not active. The link sent points to settings.FRONTEND_URL. If code is expired then
+        code is rotated and expiration extended.
         '''
         if self.user_to_verify.is_active:
             return {
@@ -203,22 +228,34 @@ class VerificationCode(BaseModel):
             self.verification_code = str(uuid.uuid4().hex)
             self.save()
 
+        queue_email(self)
+        return {
+            'verification_sent': True,
+            'message': 'Verification code sent! Check your email.'
+        }
+
+    def get_email_message(self):
+        '''
+        --Verification email message--
+        Renders the verification email, None once the user is active.
+        '''
+        if self.user_to_verify.is_active:
+            return None
+
         subject = f'{self.user_to_verify.username}, please verify your email'
         template = 'email_templates/verification_email.txt'
         html_template = 'email_templates/verification_email.html'
         message_data = {
             'url': settings.FRONTEND_URL + str(self.verification_code) + '/'
         }
-        message = render_to_string(template, message_data)
-        html_message = render_to_string(html_template, message_data)
         from_email = (
             'verification@' + settings.FRONTEND_URL.split('.')[-2] + '.com'
         )
-        self.user_to_verify.email_user(subject=subject, message=message, html_message=html_message, from_email=from_email)
-        return {
-            'verification_sent': True,
-            'message': 'Verification code sent! Check your email.'
-        }
+        message = EmailMultiAlternatives(
+            subject, render_to_string(template, message_data), from_email, [self.user_to_verify.email]
+        )
+        message.attach_alternative(render_to_string(html_template, message_data), 'text/html')
+        return message
 
     def verify(self):
         '''
@@ -246,6 +283,10 @@ class VerificationCode(BaseModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            Index(fields=['code_expiration'], name='vcode_expiration_idx'),
+            Index(fields=['user_to_verify', 'created_at'], name='vcode_user_created_idx'),
+        ]
 
     def __str__(self):
         return str(self.verification_code)
@@ -266,13 +307,14 @@ class PasswordResetCode(BaseModel):
     '''
     user = ForeignKey(User, related_name='password_reset_codes', on_delete=CASCADE)
     password_reset_code = CharField(editable=False, unique=True, max_length=50)
-    code_expiration = DateTimeField(default=timezone.now() + timedelta(days=3))
+    code_expiration = DateTimeField(default=get_code_expiration)
 
     def send_user_password_reset_email(self):
         '''
         --Send user password reset email--
         1) Send user a link to the frontend with a code that will let them post back to another url 
-           with updated passwords. 
+           with updated passwords. The email is queued and sent by a Celery worker once the transaction
+           commits.
         '''
         now = timezone.now()
         if not (self.code_expiration >= now):
@@ -280,22 +322,29 @@ class PasswordResetCode(BaseModel):
             self.password_reset_code = str(uuid.uuid4().hex)
             self.save()
 
+        queue_email(self)  # 1
+        return {
+            'password_reset_link_sent': True,
+            'message': 'Password reset link sent! Check your email.'
+        }
+
+    def get_email_message(self):
+        '''
+        --Password reset email message--
+        Renders the password reset link email.
+        '''
         subject = f'{self.user.username}, here is the link to reset your password.'
         template = 'email_templates/password_reset_link_email.txt'
         html_template = 'email_templates/password_reset_link_email.html'
         message_data = {
             'url': settings.FRONTEND_URL + 'password/reset/' + self.password_reset_code + '/'
         }
-        message = render_to_string(template, message_data)
-        html_message = render_to_string(html_template, message_data)
         from_email = (
             'password-reset@' + settings.FRONTEND_URL.split('.')[-2] + '.com/'
         )
-        self.user.email_user(subject=subject, message=message, html_message=html_message, from_email=from_email)
-        return {
-            'password_reset_link_sent': True,
-            'message': 'Password reset link sent! Check your email.'
-        }
+        message = EmailMultiAlternatives(subject, render_to_string(template, message_data), from_email, [self.user.email])
+        message.attach_alternative(render_to_string(html_template, message_data), 'text/html')
+        return message
 
     def verify(self, password):
         '''
@@ -319,6 +368,10 @@ class PasswordResetCode(BaseModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            Index(fields=['code_expiration'], name='resetcode_expiration_idx'),
+            Index(fields=['user', 'created_at'], name='resetcode_user_created_idx'),
+        ]
 
     def __str__(self):
         return str(self.password_reset_code)
@@ -338,6 +391,9 @@ class UserFollowing(BaseModel):
     user = ForeignKey(User, related_name='following', on_delete=CASCADE, to_field='pub_id')
     following = ForeignKey(User, related_name='followers', on_delete=CASCADE, to_field='pub_id')
 
+    objects = Manager()
+    items = UserFollowingManager()
+
     class Meta:
         constraints = [
             UniqueConstraint(fields=['user','following'],  name='unique_followers')
@@ -1,24 +1,29 @@
 from django.contrib.auth.signals import user_logged_in # user_logged_out, user_login_failed
-from django.db.models import signals
+from django.db.models import signals, Case, F, When
 from django.dispatch import Signal
-from django.db import transaction
 from django.dispatch import receiver
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
-from blog_api.users.models import User, VerificationCode, PasswordResetCode
+from blog_api.users.models import User, VerificationCode, PasswordResetCode, UserFollowing
+from blog_api.users.cache import invalidate_auth_user
 
 
 @receiver(signals.post_save, sender=User)
 def send_user_verification_email_signal(sender, instance, created, **kwargs):
-    '''Send user a verification email on first save.'''
+    '''Queue a verification email to the user on first save, sent once the transaction commits.'''
     if created:
         code = VerificationCode.objects.create(user_to_verify=instance)
-        transaction.on_commit(
-            lambda: code.send_user_verification_email()
-        )
+        code.send_user_verification_email()
+
+
+@receiver(signals.post_save, sender=User)
+@receiver(signals.post_delete, sender=User)
+def invalidate_auth_user_on_user_change(sender, instance, **kwargs):
+    '''Drop the cached auth state of a saved (updated, deactivated) or deleted user.'''
+    invalidate_auth_user(instance.pub_id)
 
 
 new_registration = Signal(providing_args=["ip_address", "user_username"])
@@ -30,3 +35,32 @@ def record_ip_on_new_registration(sender, task_id, **kwargs):
     user = get_object_or_404(User, username=username)
     user.ip_address = ip_address
     user.save()
+
+
+def _update_follow_counters(follow, delta):
+    '''
+    Moves the follower's following_count and the followed user's followers_count with one UPDATE.
+    '''
+    User.objects.filter(pub_id__in=[follow.user_id, follow.following_id]).update(
+        following_count=Case(
+            When(pub_id=follow.user_id, then=F('following_count') + delta), default=F('following_count')
+        ),
+        followers_count=Case(
+            When(pub_id=follow.following_id, then=F('followers_count') + delta), default=F('followers_count')
+        ),
+    )
+
+
+@receiver(signals.post_save, sender=UserFollowing)
+def add_follow_to_user_counters(sender, instance, created, **kwargs):
+    '''
+    Follows are created through User.follow_user(), the admin or directly so the counters move here, in
+    the transaction of the insert.
+    '''
+    if created:
+        _update_follow_counters(instance, 1)
+
+
+@receiver(signals.post_delete, sender=UserFollowing)
+def remove_follow_from_user_counters(sender, instance, **kwargs):
+    _update_follow_counters(instance, -1)
@@ -1,18 +1,150 @@
 import logging
 logger = logging.getLogger(__name__)
+import time
 
-from rest_framework_simplejwt.tokens import OutstandingToken
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.utils.time import get_exponential_backoff_interval
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import transaction
 from django.utils import timezone
 
 from config import celery_app
 
+from blog_api.users.cleanup import CLEANUP_LOCK_KEY, purge_expired
+from blog_api.users.emails import get_email_messages, get_email_domain, take_email_rate
+from blog_api.users.tokens import FLUSH_LOCK_KEY, delete_expired_tokens
+
 User = get_user_model()
 
 
 @celery_app.task()
 def flush_outstanding_tokens():
-    '''Flushes any expired tokens in the outstanding token list'''
-    OutstandingToken.objects.filter(expires_at__lte=timezone.now()).delete()
-    logger.info('[Celery] Flushed OutstandingToken objects from database...')
+    '''
+    --Flush expired tokens--
+    ==========================================================================================================
+    :returns: dict with the outstanding and blacklisted tokens deleted, the batches run, the seconds taken and
+              whether every token that had expired when the run started is gone, or None when skipped.
+    1) Only one flush runs at a time, a run that starts while another is still going does nothing.
+    2) Deletes the tokens that had expired when the run started, TOKEN_FLUSH_BATCH_SIZE at a time. Each batch
+       is its own transaction so logins and logouts only ever wait on one batch.
+    3) Stops after TOKEN_FLUSH_TIME_BUDGET seconds, inside CELERY_TASK_SOFT_TIME_LIMIT, and queues another
+       run that carries on where this one stopped. A batch cut off by the soft time limit is rolled back and
+       left to the next scheduled run.
+    ==========================================================================================================
+    '''
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=settings.CELERY_TASK_TIME_LIMIT):  # 1
+        logger.info('[Celery] Skipped flushing tokens, another flush is running...')
+        return None
+
+    expired_at = timezone.now()
+    started = time.monotonic()
+    progress = {'outstanding': 0, 'blacklisted': 0, 'batches': 0, 'finished': False}
+    timed_out = False
+    try:
+        while True:
+            with transaction.atomic():  # 2
+                outstanding, blacklisted = delete_expired_tokens(expired_at, settings.TOKEN_FLUSH_BATCH_SIZE)
+            if not outstanding:
+                progress['finished'] = True
+                break
+            progress['outstanding'] += outstanding
+            progress['blacklisted'] += blacklisted
+            progress['batches'] += 1
+            if time.monotonic() - started >= settings.TOKEN_FLUSH_TIME_BUDGET:  # 3
+                break
+    except SoftTimeLimitExceeded:
+        timed_out = True
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    progress['seconds'] = round(time.monotonic() - started, 3)
+    logger.info(
+        f'[Celery] Flushed {progress["outstanding"]} outstanding and {progress["blacklisted"]} blacklisted '
+        f'tokens in {progress["batches"]} batches, {progress["seconds"]}s...'
+    )
+    if timed_out:
+        logger.warning('[Celery] Flushing tokens hit the soft time limit, lower TOKEN_FLUSH_TIME_BUDGET...')
+    elif not progress['finished']:
+        flush_outstanding_tokens.delay()
+    return progress
+
+
+@celery_app.task()
+def purge_expired_codes():
+    '''
+    --Purge expired codes--
+    ==========================================================================================================
+    :returns: dict from blog_api.users.cleanup.purge_expired with the seconds taken, or None when skipped.
+    1) Only one purge runs at a time, a run that starts while another is still going does nothing.
+    2) Deletes the verification and password reset codes that had been expired for CODE_RETENTION when the
+       run started, CODE_CLEANUP_BATCH_SIZE at a time.
+    3) Stops after CODE_CLEANUP_TIME_BUDGET seconds, inside CELERY_TASK_SOFT_TIME_LIMIT, and queues another
+       run that carries on where this one stopped.
+    ==========================================================================================================
+    '''
+    if not cache.add(CLEANUP_LOCK_KEY, 1, timeout=settings.CELERY_TASK_TIME_LIMIT):  # 1
+        logger.info('[Celery] Skipped purging expired codes, another purge is running...')
+        return None
+
+    started = time.monotonic()
+    try:
+        progress = purge_expired(  # 2
+            timezone.now() - settings.CODE_RETENTION,
+            settings.CODE_CLEANUP_BATCH_SIZE,
+            settings.CODE_CLEANUP_TIME_BUDGET,
+        )
+    finally:
+        cache.delete(CLEANUP_LOCK_KEY)
+
+    progress['seconds'] = round(time.monotonic() - started, 3)
+    deleted = ', '.join(f'{count} {label}' for label, count in progress['deleted'].items())
+    logger.info(f'[Celery] Purged {deleted} in {progress["batches"]} batches, {progress["seconds"]}s...')
+    if not progress['finished']:
+        purge_expired_codes.delay()  # 3
+    return progress
+
+
+@celery_app.task(bind=True, max_retries=settings.EMAIL_MAX_RETRIES)
+def send_emails(self, emails):
+    '''
+    --Send code emails--
+    ==========================================================================================================
+    :param: list emails, [code model label, code id] pairs queued by blog_api.users.emails.queue_email.
+    1) Builds the messages from the codes as they are now.
+    2) Emails over their recipient domain's rate limit are sent again once the domain's window resets.
+    3) The rest are sent over one connection to the mail provider.
+    4) When the provider fails the unsent emails are retried with exponential backoff, up to
+       EMAIL_MAX_RETRIES times.
+    ==========================================================================================================
+    '''
+    by_domain = {}
+    for email, message in get_email_messages(emails):  # 1
+        by_domain.setdefault(get_email_domain(message), []).append((email, message))
+
+    to_send = []
+    for domain, messages in by_domain.items():
+        allowed, reset_in = take_email_rate(domain, len(messages))
+        if messages[allowed:]:
+            send_emails.apply_async(([email for email, message in messages[allowed:]],), countdown=reset_in)  # 2
+            logger.info(f'[Celery] Deferred {len(messages) - allowed} emails to {domain} for {reset_in:.0f}s...')
+        to_send.extend(messages[:allowed])
+    if not to_send:
+        return
+
+    sent = 0
+    try:
+        with get_connection() as connection:  # 3
+            for email, message in to_send:
+                connection.send_messages([message])
+                sent += 1
+    except OSError as exc:  # 4
+        countdown = get_exponential_backoff_interval(
+            settings.EMAIL_RETRY_BACKOFF, self.request.retries, settings.EMAIL_RETRY_BACKOFF_MAX, full_jitter=True
+        )
+        logger.warning(f'[Celery] Sent {sent} of {len(to_send)} emails, retrying in {countdown}s: {exc}')
+        raise self.retry(args=([email for email, message in to_send[sent:]],), exc=exc, countdown=countdown)
+    logger.info(f'[Celery] Sent {sent} emails...')
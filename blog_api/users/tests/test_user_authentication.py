@@ -0,0 +1,95 @@
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.status import HTTP_200_OK, HTTP_403_FORBIDDEN
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from blog_api.users.authentication import CachedJWTAuthentication
+from blog_api.users.cache import LocalCache, local_auth_users
+from blog_api.users.models import User
+
+
+class UserTestsAuthentication(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_auth_users.clear()
+        self.user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_cached_jwt_authentication_resolves_user_from_cache(self):
+        '''
+        Ensure only the first request with a token reads the user from the database, with the fields the views use.
+        '''
+        print('Testing CachedJWTAuthentication resolves the user from the cache')
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        with self.assertNumQueries(0):
+            cached_user = self.authenticate()
+        local_auth_users.clear()
+        with self.assertNumQueries(0):
+            shared_user = self.authenticate()
+
+        for user in (user, cached_user, shared_user):
+            self.assertEqual(user, self.user)
+            self.assertEqual((user.pub_id, user.username, user.is_active), (self.user.pub_id, 'someuser00', True))
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_user.email, 'someemail@email.com')
+        print('Done.....')
+
+    def test_cached_jwt_authentication_rejects_deactivated_user(self):
+        '''
+        Ensure saving a user drops its cached state so a deactivated user can't authenticate with a valid token.
+        '''
+        print('Testing CachedJWTAuthentication rejects a deactivated user')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(self.client.get(reverse('user')).status_code, HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.assertEqual(self.client.get(reverse('user')).status_code, HTTP_403_FORBIDDEN)
+        print('Done.....')
+
+    def test_cached_user_saves_only_loaded_fields(self):
+        '''
+        Ensure saving an authenticated user, which only has a few fields loaded, doesn't overwrite the others.
+        '''
+        print('Testing a cached user saves only its loaded fields')
+        user = self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(name='New Name')
+
+        user.username = 'someuser01'
+        with self.assertNumQueries(2):  # the update and the slugs of the renamed author's posts to invalidate
+            user.save()
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.username, self.user.name), ('someuser01', 'New Name'))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate().username, 'someuser01')
+        print('Done.....')
+
+    def test_local_cache_evicts_least_recently_used_and_expired_entries(self):
+        '''
+        Ensure the in-process cache keeps at most size entries, evicting the least recently used, for timeout seconds.
+        '''
+        print('Testing LocalCache evicts least recently used and expired entries')
+        local_cache = LocalCache(size=2, timeout=60)
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        self.assertEqual(local_cache.get('a'), 1)
+        local_cache.set('c', 3)
+        self.assertEqual((local_cache.get('a'), local_cache.get('b'), local_cache.get('c')), (1, None, 3))
+
+        local_cache = LocalCache(size=2, timeout=0)
+        local_cache.set('a', 1)
+        self.assertIsNone(local_cache.get('a'))
+        print('Done.....')
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from rest_framework.status import HTTP_200_OK
+from rest_framework.test import APITestCase
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog_api.users.cleanup import CLEANUP_LOCK_KEY, purge_expired_batch
+from blog_api.users.models import User, VerificationCode, PasswordResetCode
+from blog_api.users.tasks import purge_expired_codes
+from blog_api.utils.testing import capture_on_commit_callbacks
+
+
+@override_settings(CODE_RETENTION=timedelta(days=7), CODE_CLEANUP_BATCH_SIZE=2)
+class UserTestsCodeCleanup(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user_data = {
+            'email': 'someemail@email.com',
+            'password': 'Testing4321@',
+        }
+        self.user = User.objects.create_user(username='someuser00', **self.user_data)
+
+    def test_purge_expired_codes_deletes_codes_expired_past_retention(self):
+        '''
+        Ensure purging deletes used codes and codes expired for longer than CODE_RETENTION, one statement per batch.
+        '''
+        print('Testing purge_expired_codes deletes codes expired past retention')
+        now = timezone.now()
+        VerificationCode.objects.update(code_expiration=now - timedelta(days=100))
+        for days in (-100, -8, -6, 3):
+            PasswordResetCode.objects.create(user=self.user, code_expiration=now + timedelta(days=days))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(purge_expired_batch(VerificationCode, 'code_expiration', now - timedelta(days=7), 2), 1)
+        progress = purge_expired_codes()
+
+        self.assertEqual(progress['deleted'], {'users.verificationcode': 0, 'users.passwordresetcode': 2})
+        self.assertEqual(progress['batches'], 1)
+        self.assertTrue(progress['finished'])
+        self.assertFalse(VerificationCode.objects.exists())
+        self.assertEqual(PasswordResetCode.objects.count(), 2)
+        self.assertIsNone(cache.get(CLEANUP_LOCK_KEY))
+        print('Done.....')
+
+    @override_settings(CODE_CLEANUP_TIME_BUDGET=0)
+    def test_purge_expired_codes_carries_on_past_time_budget(self):
+        '''
+        Ensure a purge that runs out of time stops after a batch and queues another run that carries on from there.
+        '''
+        print('Testing purge_expired_codes carries on past its time budget')
+        for i in range(5):
+            PasswordResetCode.objects.create(user=self.user, code_expiration=timezone.now() - timedelta(days=100))
+
+        progress = purge_expired_codes()
+
+        self.assertEqual(progress['deleted']['users.passwordresetcode'], 2)
+        self.assertFalse(progress['finished'])
+        self.assertFalse(PasswordResetCode.objects.exists())  # the queued runs
+        print('Done.....')
+
+    def test_password_reset_expires_codes_in_one_update(self):
+        '''
+        Ensure resetting the password expires every one of the user's password reset codes with a single UPDATE.
+        '''
+        print('Testing password reset expires codes in one update')
+        for i in range(3):
+            PasswordResetCode.objects.create(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.user.password_reset('Testing1234@')['password_reset'])
+        code_queries = [query for query in queries if 'users_passwordresetcode' in query['sql']]
+        self.assertEqual(len(code_queries), 1)
+        self.assertFalse(
+            PasswordResetCode.objects.filter(code_expiration__gt=timezone.now() - timedelta(days=7)).exists()
+        )
+        print('Done.....')
+
+    def test_user_resend_verification_email_after_codes_purged(self):
+        '''
+        Ensure an inactive user whose verification codes were purged gets a new code when resending the email.
+        '''
+        print('Testing can resend verification email after codes are purged')
+        VerificationCode.objects.all().delete()
+
+        with capture_on_commit_callbacks(execute=True):
+            resend_response = self.client.post(reverse('user-verify-resend'), self.user_data)
+        self.assertEqual(resend_response.status_code, HTTP_200_OK)
+        self.assertEqual(resend_response.data['verifification_sent'], True)
+        self.assertEqual(VerificationCode.objects.get().user_to_verify, self.user)
+        self.assertEqual(len(mail.outbox), 1)
+        print('Done.....')
@@ -7,6 +7,7 @@ from django.urls import reverse
 from django.utils import timezone
 
 from blog_api.users.models import User, VerificationCode, PasswordResetCode
+from blog_api.utils.testing import capture_on_commit_callbacks
 
 
 class UserTestsCreate(APITestCase):
@@ -370,7 +371,8 @@ class UserTestsCreate(APITestCase):
             'email': self.user_data['email'],
             'password': self.user_data['password']
         }
-        resend_response = self.client.post(verify_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            resend_response = self.client.post(verify_resend_url, resend_data)
         self.assertEqual(resend_response.status_code, HTTP_200_OK)
         self.assertEqual(resend_response.data['verifification_sent'], True)
         self.assertEqual(len(mail.outbox), 1)
@@ -402,7 +404,8 @@ class UserTestsCreate(APITestCase):
             'email': self.user_data['email'],
             'password': self.user_data['password']
         }
-        resend_response = self.client.post(verify_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            resend_response = self.client.post(verify_resend_url, resend_data)
         self.assertEqual(resend_response.status_code, HTTP_400_BAD_REQUEST)
         self.assertEqual(resend_response.data['verifification_sent'], False)
         self.assertEqual(resend_response.data['message'], 'The user is already verified and active. Please log in.')
@@ -426,7 +429,8 @@ class UserTestsCreate(APITestCase):
             'email': self.user_data['email'],
             'password': ''
         }
-        resend_response = self.client.post(verify_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            resend_response = self.client.post(verify_resend_url, resend_data)
         self.assertEqual(resend_response.status_code, HTTP_400_BAD_REQUEST)
         self.assertEqual(resend_response.data['verifification_sent'], False)
         self.assertEqual(len(mail.outbox), 0)
@@ -447,7 +451,8 @@ class UserTestsCreate(APITestCase):
             'email': '',
             'password': self.user_data['password']
         }
-        resend_response = self.client.post(verify_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            resend_response = self.client.post(verify_resend_url, resend_data)
         self.assertEqual(resend_response.status_code, HTTP_400_BAD_REQUEST)
         self.assertEqual(resend_response.data['verifification_sent'], False)
         self.assertEqual(len(mail.outbox), 0)
@@ -469,7 +474,8 @@ class UserTestsCreate(APITestCase):
             'email': self.user_data['email'],
             'password': self.user_data['password']
         }
-        resend_response = self.client.post(verify_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            resend_response = self.client.post(verify_resend_url, resend_data)
         self.assertEqual(resend_response.status_code, HTTP_200_OK)
         self.assertEqual(resend_response.data['verifification_sent'], True)
         self.assertEqual(len(mail.outbox), 1)
@@ -480,7 +486,8 @@ class UserTestsCreate(APITestCase):
         verification_code.save()
 
         now_day = (timezone.now() + timedelta(days=3)).day
-        expired_resend_response = self.client.post(verify_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            expired_resend_response = self.client.post(verify_resend_url, resend_data)
         self.assertEqual(expired_resend_response.status_code, HTTP_200_OK)
         self.assertEqual(len(mail.outbox), 2)
         self.assertEqual(expired_resend_response.data['message'], 'Verification code sent! Check your email.')
@@ -533,7 +540,8 @@ class UserTestsCreate(APITestCase):
         resend_data = {
             'email': self.user_data['email'],
         }
-        resend_response = self.client.post(password_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            resend_response = self.client.post(password_resend_url, resend_data)
         self.assertEqual(resend_response.status_code, HTTP_200_OK)
         self.assertEqual(resend_response.data['password_reset_link_sent'], True)
         self.assertEqual(len(mail.outbox), 1)
@@ -544,7 +552,8 @@ class UserTestsCreate(APITestCase):
         password_reset_code.save()
 
         now_day = (timezone.now() + timedelta(days=3)).day
-        expired_resend_response = self.client.post(password_resend_url, resend_data)
+        with capture_on_commit_callbacks(execute=True):
+            expired_resend_response = self.client.post(password_resend_url, resend_data)
         self.assertEqual(expired_resend_response.status_code, HTTP_200_OK)
         self.assertEqual(len(mail.outbox), 2)
         self.assertEqual(expired_resend_response.data['message'], 'Password reset link sent! Check your email.')
@@ -0,0 +1,154 @@
+from unittest import mock
+
+from rest_framework.status import HTTP_201_CREATED
+from rest_framework.test import APITestCase
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import IntegrityError, transaction
+from django.test import override_settings
+from django.urls import reverse
+
+from blog_api.users.emails import _get_email_batches
+from blog_api.users.models import User, VerificationCode, PasswordResetCode
+from blog_api.users.tasks import send_emails
+from blog_api.utils.testing import capture_on_commit_callbacks
+
+
+class UserTestsEmails(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user_data = {
+            'name': 'DabApps',
+            'username': 'someuser00',
+            'email': 'someemail@email.com',
+            'password': 'Testing4321@',
+            'password2': 'Testing4321@'
+        }
+
+    def create_users(self, count, domain='email.com'):
+        return [
+            User.objects.create_user(username=f'someuser{i:02}{domain[0]}', email=f'someemail{i}@{domain}', password='Testing4321@')
+            for i in range(count)
+        ]
+
+    def test_user_register_sends_verification_email_after_commit(self):
+        '''
+        Ensure registering doesn't send the verification email in the request, a task sends it once the transaction commits.
+        '''
+        print('Testing register sends verification email after commit')
+        with capture_on_commit_callbacks() as callbacks:
+            response = self.client.post(reverse('user-register'), self.user_data, format='json')
+            self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(mail.outbox), 1)
+        code = VerificationCode.objects.get(user_to_verify__email=self.user_data['email'])
+        self.assertEqual(mail.outbox[0].to, [self.user_data['email']])
+        self.assertIn(code.verification_code, mail.outbox[0].body)
+        self.assertIn(code.verification_code, mail.outbox[0].alternatives[0][0])
+        print('Done.....')
+
+    def test_emails_queued_in_one_transaction_are_sent_by_one_task(self):
+        '''
+        Ensure the emails queued in one transaction are sent by one task over one connection.
+        '''
+        print('Testing emails queued in one transaction are sent by one task')
+        with mock.patch.object(send_emails, 'delay', wraps=send_emails.delay) as delay:
+            with capture_on_commit_callbacks(execute=True):
+                users = self.create_users(3)
+                PasswordResetCode.objects.create(user=users[0]).send_user_password_reset_email()
+            self.assertEqual(delay.call_count, 1)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['someemail0@email.com', 'someemail0@email.com', 'someemail1@email.com', 'someemail2@email.com']
+        )
+        print('Done.....')
+
+    def test_emails_queued_in_a_rolled_back_savepoint_are_not_sent(self):
+        '''
+        Ensure emails queued in a rolled back savepoint are dropped with it, and later emails get a batch of their own.
+        '''
+        print('Testing emails queued in a rolled back savepoint are not sent')
+        with capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.create_users(2)
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+            self.assertFalse(_get_email_batches())
+            self.create_users(1, domain='other.com')
+        self.assertEqual([message.to[0] for message in mail.outbox], ['someemail0@other.com'])
+        print('Done.....')
+
+    def test_send_emails_skips_active_users_and_deleted_codes(self):
+        '''
+        Ensure verification emails aren't sent to users verified since they were queued or for deleted codes.
+        '''
+        print('Testing send_emails skips active users and deleted codes')
+        users = self.create_users(3)
+        codes = list(VerificationCode.objects.filter(user_to_verify__in=users).order_by('id'))
+        User.objects.filter(pk=users[0].pk).update(is_active=True)
+        codes[1].delete()
+
+        send_emails([[code._meta.label_lower, code.pk] for code in codes])
+        self.assertEqual([message.to for message in mail.outbox], [[users[2].email]])
+        print('Done.....')
+
+    @override_settings(EMAIL_DOMAIN_RATE_LIMIT=2)
+    def test_send_emails_defers_emails_over_domain_rate_limit(self):
+        '''
+        Ensure emails over their domain's rate limit are sent again once the domain's window resets.
+        '''
+        print('Testing send_emails defers emails over the domain rate limit')
+        users = self.create_users(3) + self.create_users(1, domain='otheremail.com')
+        emails = [
+            [code._meta.label_lower, code.pk]
+            for code in VerificationCode.objects.filter(user_to_verify__in=users).order_by('id')
+        ]
+
+        with mock.patch.object(send_emails, 'apply_async') as apply_async:
+            send_emails(emails)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['someemail0@email.com', 'someemail0@otheremail.com', 'someemail1@email.com']
+        )
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args[0][0], ([emails[2]],))
+        self.assertGreater(apply_async.call_args[1]['countdown'], 0)
+        print('Done.....')
+
+    def test_send_emails_retries_unsent_emails(self):
+        '''
+        Ensure only the emails that weren't sent are retried when the mail provider fails.
+        '''
+        print('Testing send_emails retries unsent emails')
+        users = self.create_users(3)
+        emails = [
+            [code._meta.label_lower, code.pk]
+            for code in VerificationCode.objects.filter(user_to_verify__in=users).order_by('id')
+        ]
+
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def fail_second_send(backend, messages):
+            calls.append(messages[0].to[0])
+            if len(calls) == 2:
+                raise ConnectionError('Mail provider unavailable.')
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', fail_second_send):
+            send_emails.apply((emails,), throw=False)
+        self.assertEqual(
+            calls, ['someemail0@email.com', 'someemail1@email.com', 'someemail1@email.com', 'someemail2@email.com']
+        )
+        self.assertEqual(len(mail.outbox), 3)
+        print('Done.....')
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from rest_framework_simplejwt.tokens import OutstandingToken
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_401_UNAUTHORIZED, \
                                                                         HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST
 from rest_framework.test import APITestCase
+from django.core.management import call_command
 from django.urls import reverse
 
 from blog_api.users.models import User, VerificationCode, UserFollowing
@@ -58,3 +61,111 @@ class UserTestsRead(APITestCase):
         self.assertEqual(disliked['message'], f'{user.username} disliked {post.slug} successfully.')
 
         print('Done.....')
+
+    def test_user_manager_with_counts(self):
+        '''
+        Ensure User.items.with_counts() and UserFollowing.items annotate the post count next to the stored counters.
+        '''
+        print('Testing User.items.with_counts() and UserFollowing.items annotate counts')
+
+        user = User.objects.create(
+                username=self.user_data['username'],
+                email=self.user_data['email'],
+                password=self.user_data['password']
+        )
+        user2 = User.objects.create(
+                username=self.user2_data['username'],
+                email=self.user2_data['email'],
+                password=self.user2_data['password']
+        )
+        Post.objects.create(author=user, **self.blog_post_data)
+        Post.objects.create(author=user, is_active=False, **self.blog_post_data)
+        UserFollowing.objects.create(user=user2, following=user)
+
+        annotated_user = User.items.with_counts().get(pk=user.pk)
+        self.assertEqual(annotated_user.post_count, user.get_post_count())
+        self.assertEqual(annotated_user.post_count, 1)
+        self.assertEqual(annotated_user.followers_count, 1)
+        self.assertEqual(annotated_user.following_count, 0)
+
+        follower = UserFollowing.items.followers_of(user).get()
+        self.assertEqual(follower.user, user2)
+        self.assertEqual((follower.post_count, follower.user.followers_count, follower.user.following_count), (0, 0, 1))
+
+        following = UserFollowing.items.following_of(user2).get()
+        self.assertEqual(following.following, user)
+        self.assertEqual(
+            (following.post_count, following.following.followers_count, following.following.following_count), (1, 1, 0)
+        )
+
+        print('Done.....')
+
+    def test_user_follow_user_model_method_moves_counters(self):
+        '''
+        Ensure user.follow_user() keeps both users follow counters in step and a stale save does not overwrite them.
+        '''
+        print('Testing user.follow_user() moves the follow counters')
+
+        user = User.objects.create(
+                username=self.user_data['username'],
+                email=self.user_data['email'],
+                password=self.user_data['password']
+        )
+        user2 = User.objects.create(
+                username=self.user2_data['username'],
+                email=self.user2_data['email'],
+                password=self.user2_data['password']
+        )
+
+        followed = user.follow_user(user2.pub_id)
+        self.assertEqual(followed['followed'], True)
+        user.refresh_from_db()
+        user2.refresh_from_db()
+        self.assertEqual((user.following_count, user.followers_count), (1, 0))
+        self.assertEqual((user2.following_count, user2.followers_count), (0, 1))
+
+        stale_user2 = User.objects.get(pk=user2.pk)
+        unfollowed = user.follow_user(user2.pub_id)
+        self.assertEqual(unfollowed['followed'], False)
+        stale_user2.name = 'Renamed'
+        stale_user2.save()
+        user.refresh_from_db()
+        user2.refresh_from_db()
+        self.assertEqual((user.following_count, user.followers_count), (0, 0))
+        self.assertEqual((user2.following_count, user2.followers_count), (0, 0))
+        self.assertEqual(user2.name, 'Renamed')
+
+        not_found = user.follow_user('not-a-pub-id')
+        self.assertEqual(not_found['followed'], False)
+        self.assertEqual(not_found['message'], 'No user found with provided id.')
+        print('Done.....')
+
+    def test_repair_follow_counters_command(self):
+        '''
+        Ensure the repair_follow_counters command fixes drifted counters.
+        '''
+        print('Testing repair_follow_counters command fixes drifted counters')
+
+        user = User.objects.create(
+                username=self.user_data['username'],
+                email=self.user_data['email'],
+                password=self.user_data['password']
+        )
+        user2 = User.objects.create(
+                username=self.user2_data['username'],
+                email=self.user2_data['email'],
+                password=self.user2_data['password']
+        )
+        UserFollowing.objects.create(user=user, following=user2)
+
+        User.objects.filter(pk=user.pk).update(followers_count=5, following_count=0)
+
+        out = StringIO()
+        call_command('repair_follow_counters', stdout=out)
+        self.assertIn('Checked 2 users, 1 repaired.', out.getvalue())
+
+        user.refresh_from_db()
+        user2.refresh_from_db()
+        self.assertEqual((user.following_count, user.followers_count), (1, 0))
+        self.assertEqual((user2.following_count, user2.followers_count), (0, 1))
+        print('Done.....')
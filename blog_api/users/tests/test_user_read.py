@@ -1,11 +1,13 @@
 from rest_framework_simplejwt.tokens import OutstandingToken
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_401_UNAUTHORIZED, \
-                                                                        HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST
+                                                                        HTTP_403_FORBIDDEN, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from rest_framework.test import APITestCase
 from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from blog_api.users.models import User, VerificationCode, UserFollowing
-from blog_api.posts.models import Post, Like, DisLike
+from blog_api.posts.models import Post
 
 
 class UserTestsRead(APITestCase):
@@ -237,6 +239,68 @@ class UserTestsRead(APITestCase):
         self.assertEqual(user.following.all().count(), 10)
         print('Done.....')
 
+    def test_user_followers_counts_are_annotated(self):
+        '''
+        Ensure the followers list reads each follower's counts in a constant number of queries.
+        '''
+        print('Testing the followers list counts are annotated')
+        register_url = reverse('user-register')
+        verification_url = reverse('user-verify')
+        login_url = reverse('user-login')
+        followers_url = reverse('user-followers')
+
+        reg_response = self.client.post(register_url, self.user_data, format='json')
+        self.assertEqual(reg_response.status_code, HTTP_201_CREATED)
+
+        verificaton_data = {
+            'verification_code': VerificationCode.objects.latest('created_at').verification_code
+        }
+        self.client.post(verification_url, verificaton_data, format='json')
+
+        login_data = {
+            'email': self.user_data['email'],
+            'password': self.user_data['password']
+        }
+        new_login = self.client.post(login_url, login_data, format='json')
+        self.assertEqual(new_login.status_code, HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + new_login.data['access'])
+
+        user = User.objects.latest('created_at')
+
+        new_users = []
+        for i in range(10):
+            new_user = User.objects.create(username='user'+str(i), email='email'+str(i)+'@email.com', password='Testing32'+str(i))
+            new_users.append(new_user)
+            UserFollowing.objects.create(user=new_user, following=user)
+
+        Post.objects.create(author=new_users[0], **self.blog_post_data)
+        Post.objects.create(author=new_users[0], **self.blog_post_data2)
+        UserFollowing.objects.create(user=user, following=new_users[0])
+        UserFollowing.objects.create(user=new_users[1], following=new_users[0])
+
+        self.client.get(followers_url)  # caches the authenticated user like the request below
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(followers_url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+
+        follower = next(result for result in response.data['results'] if result['username'] == 'user0')
+        self.assertEqual(follower['pub_id'], new_users[0].pub_id)
+        self.assertEqual(follower['post_count'], 1)
+        self.assertEqual(follower['following_count'], 1)
+        self.assertEqual(follower['followers_count'], 2)
+
+        for i in range(10, 15):
+            new_user = User.objects.create(username='user'+str(i), email='email'+str(i)+'@email.com', password='Testing32'+str(i))
+            UserFollowing.objects.create(user=new_user, following=user)
+
+        with CaptureQueriesContext(connection) as more_queries:
+            response = self.client.get(followers_url)
+        self.assertEqual(len(response.data['results']), 15)
+        self.assertEqual(len(more_queries), len(queries))
+        print('Done.....')
+
     def test_user_can_get_own_posts(self):
         '''
         Ensure the user can get a list of his own posts.
@@ -533,6 +597,71 @@ class UserTestsRead(APITestCase):
         self.assertEqual(user2.posts.all().count(), 2)
         print('Done.....')
 
+    def test_user_following_posts_keyset_paginated(self):
+        '''
+        Ensure the posts of those a user follows are paginated by cursor, newest first, without duplicates.
+        '''
+        print('Testing user following posts are keyset paginated')
+        register_url = reverse('user-register')
+        verification_url = reverse('user-verify')
+        login_url = reverse('user-login')
+        user_following_posts_url = reverse('user-following-posts')
+
+        reg_response = self.client.post(register_url, self.user_data, format='json')
+        self.assertEqual(reg_response.status_code, HTTP_201_CREATED)
+        reg2_response = self.client.post(register_url, self.user2_data, format='json')
+        self.assertEqual(reg2_response.status_code, HTTP_201_CREATED)
+
+        for vcode in VerificationCode.objects.all():
+            verificaton_data = {
+                'verification_code': vcode.verification_code
+            }
+            verification_response = self.client.post(verification_url, verificaton_data, format='json')
+            self.assertEqual(verification_response.status_code, HTTP_200_OK)
+
+        login_data = {
+            'email': self.user_data['email'],
+            'password': self.user_data['password']
+        }
+        new_login = self.client.post(login_url, login_data, format='json')
+        self.assertEqual(new_login.status_code, HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + new_login.data['access'])
+
+        user = User.objects.get(username=self.user_data['username'])
+        user2 = User.objects.get(username=self.user2_data['username'])
+
+        UserFollowing.objects.create(user=user, following=user2)
+
+        for i in range(15):
+            Post.objects.create(
+                author=user2,
+                title=self.blog_post_data['title'],
+                content=self.blog_post_data['content']
+            )
+
+        first_page = self.client.get(user_following_posts_url)
+        self.assertEqual(first_page.status_code, HTTP_200_OK)
+        self.assertEqual(len(first_page.data['results']), 10)
+        self.assertEqual(first_page.data['previous'], None)
+        self.assertEqual(first_page.data['results'][0]['slug'], Post.objects.order_by('-created_at', '-id').first().slug)
+
+        second_page = self.client.get(first_page.data['next'])
+        self.assertEqual(second_page.status_code, HTTP_200_OK)
+        self.assertEqual(len(second_page.data['results']), 5)
+        self.assertEqual(second_page.data['next'], None)
+
+        slugs = [post['slug'] for post in first_page.data['results'] + second_page.data['results']]
+        self.assertEqual(len(set(slugs)), 15)
+
+        previous_page = self.client.get(second_page.data['previous'])
+        self.assertEqual(previous_page.status_code, HTTP_200_OK)
+        self.assertEqual(previous_page.data['results'], first_page.data['results'])
+
+        bad_cursor = self.client.get(user_following_posts_url + '?cursor=notacursor')
+        self.assertEqual(bad_cursor.status_code, HTTP_404_NOT_FOUND)
+        print('Done.....')
+
     def test_user_can_get_all_liked_posts(self):
         '''
         Ensure a user can get all posts he liked.
@@ -629,10 +758,10 @@ class UserTestsRead(APITestCase):
                 is_active=self.blog_post_data2['is_active']
         )
 
-        post.likes.users.add(user)
+        post.react(user, 'like')
         post.save()
 
-        post2.likes.users.add(user)
+        post2.react(user, 'like')
         post2.save()
 
         user_likes_response = self.client.get(user_likes_url)
@@ -737,10 +866,10 @@ class UserTestsRead(APITestCase):
                 is_active=self.blog_post_data2['is_active']
         )
 
-        post.dislikes.users.add(user)
+        post.react(user, 'dislike')
         post.save()
 
-        post2.dislikes.users.add(user)
+        post2.react(user, 'dislike')
         post2.save()
 
         user_likes_response = self.client.get(user_dislikes_url)
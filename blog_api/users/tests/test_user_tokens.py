@@ -0,0 +1,165 @@
+from datetime import timedelta
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework.status import HTTP_200_OK, HTTP_204_NO_CONTENT, HTTP_401_UNAUTHORIZED, HTTP_400_BAD_REQUEST
+from rest_framework.test import APITestCase
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog_api.users.models import User
+from blog_api.users.tasks import flush_outstanding_tokens
+from blog_api.users.tokens import BLACKLIST_KEY, FLUSH_LOCK_KEY, CacheBlacklist, RefreshToken
+
+
+@override_settings(TOKEN_BLACKLIST_BACKEND='blog_api.users.tokens.CacheBlacklist')
+class UserTestsCacheBlacklist(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user_data = {
+            'email': 'someemail@email.com',
+            'password': 'Testing4321@',
+        }
+        User.objects.create_user(username='someuser00', is_active=True, **self.user_data)
+
+    def login(self):
+        login_response = self.client.post(reverse('user-login'), self.user_data, format='json')
+        self.assertEqual(login_response.status_code, HTTP_200_OK)
+        return login_response.data['refresh']
+
+    def test_refresh_rotation_blacklists_token_in_cache(self):
+        '''
+        Ensure a rotated refresh token is blacklisted in the cache until it expires, without writing any token rows.
+        '''
+        print('Testing refresh rotation blacklists the token in the cache')
+        refresh = self.login()
+
+        refresh_response = self.client.post(reverse('user-login-refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(refresh_response.status_code, HTTP_200_OK)
+        self.assertNotEqual(refresh_response.data['refresh'], refresh)
+
+        token = RefreshToken(refresh_response.data['refresh'])
+        self.assertEqual(token['user_pub_id'], User.objects.get().pub_id)
+        blacklisted = RefreshToken(refresh, verify=False)
+        self.assertIsNotNone(cache.get(BLACKLIST_KEY.format(jti=blacklisted['jti'])))
+
+        reused_response = self.client.post(reverse('user-login-refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(reused_response.status_code, HTTP_401_UNAUTHORIZED)
+        self.assertEqual(OutstandingToken.objects.count(), 0)
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+        print('Done.....')
+
+    def test_logout_blacklists_token_in_cache(self):
+        '''
+        Ensure logging out blacklists the refresh token in the cache so it can't log out or refresh again.
+        '''
+        print('Testing logout blacklists the token in the cache')
+        refresh = self.login()
+
+        logout_response = self.client.post(reverse('user-logout'), {'refresh': refresh}, format='json')
+        self.assertEqual(logout_response.status_code, HTTP_204_NO_CONTENT)
+        logout_response = self.client.post(reverse('user-logout'), {'refresh': refresh}, format='json')
+        self.assertEqual(logout_response.status_code, HTTP_400_BAD_REQUEST)
+        refresh_response = self.client.post(reverse('user-login-refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(refresh_response.status_code, HTTP_401_UNAUTHORIZED)
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+        print('Done.....')
+
+    def test_cache_blacklist_checks_tokens_blacklisted_in_database(self):
+        '''
+        Ensure tokens blacklisted in the database before switching to the cache stay blacklisted until they expire,
+        after which the database is no longer checked.
+        '''
+        print('Testing the cache blacklist checks tokens blacklisted in the database')
+        with override_settings(TOKEN_BLACKLIST_BACKEND='blog_api.users.tokens.DatabaseBlacklist'):
+            refresh = self.login()
+            logout_response = self.client.post(reverse('user-logout'), {'refresh': refresh}, format='json')
+            self.assertEqual(logout_response.status_code, HTTP_204_NO_CONTENT)
+
+        refresh_response = self.client.post(reverse('user-login-refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(refresh_response.status_code, HTTP_401_UNAUTHORIZED)
+
+        OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        blacklist = CacheBlacklist()
+        self.assertFalse(blacklist.is_blacklisted(RefreshToken(self.login())['jti']))
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist.is_blacklisted(RefreshToken(refresh, verify=False)['jti']))
+        print('Done.....')
+
+    @override_settings(TOKEN_BLACKLIST_BACKEND='blog_api.users.tokens.DatabaseBlacklist')
+    def test_database_blacklist_fallback(self):
+        '''
+        Ensure the database blacklist keeps the token_blacklist app's outstanding and blacklisted token rows.
+        '''
+        print('Testing the database blacklist fallback')
+        refresh = self.login()
+        self.assertEqual(OutstandingToken.objects.get().token, refresh)
+
+        refresh_response = self.client.post(reverse('user-login-refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(refresh_response.status_code, HTTP_200_OK)
+        self.assertEqual(BlacklistedToken.objects.get().token.token, refresh)
+        reused_response = self.client.post(reverse('user-login-refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(reused_response.status_code, HTTP_401_UNAUTHORIZED)
+        print('Done.....')
+
+
+@override_settings(TOKEN_BLACKLIST_BACKEND='blog_api.users.tokens.DatabaseBlacklist', TOKEN_FLUSH_BATCH_SIZE=2)
+class UserTestsFlushTokens(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+        self.expired = []
+        for i in range(5):
+            token = RefreshToken.for_user(self.user)
+            self.expired.append(token['jti'])
+            if i % 2:
+                token.blacklist()
+        OutstandingToken.objects.filter(jti__in=self.expired).update(expires_at=timezone.now() - timedelta(days=1))
+        self.live = RefreshToken.for_user(self.user)
+        self.live.blacklist()
+
+    def test_flush_outstanding_tokens_deletes_expired_tokens_in_batches(self):
+        '''
+        Ensure flushing deletes the expired outstanding tokens and their blacklist rows in batches, keeping live tokens.
+        '''
+        print('Testing flush_outstanding_tokens deletes expired tokens in batches')
+        progress = flush_outstanding_tokens()
+
+        self.assertEqual(progress['outstanding'], 5)
+        self.assertEqual(progress['blacklisted'], 2)
+        self.assertEqual(progress['batches'], 3)
+        self.assertTrue(progress['finished'])
+        self.assertFalse(OutstandingToken.objects.filter(jti__in=self.expired).exists())
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, self.live['jti'])
+        self.assertIsNone(cache.get(FLUSH_LOCK_KEY))
+        print('Done.....')
+
+    @override_settings(TOKEN_FLUSH_TIME_BUDGET=0)
+    def test_flush_outstanding_tokens_carries_on_past_time_budget(self):
+        '''
+        Ensure a flush that runs out of time stops after a batch and queues another run that carries on from there.
+        '''
+        print('Testing flush_outstanding_tokens carries on past its time budget')
+        progress = flush_outstanding_tokens()
+
+        self.assertEqual((progress['outstanding'], progress['batches']), (2, 1))
+        self.assertFalse(progress['finished'])
+        self.assertFalse(OutstandingToken.objects.filter(jti__in=self.expired).exists())  # the queued runs
+        self.assertEqual(OutstandingToken.objects.get().jti, self.live['jti'])
+        print('Done.....')
+
+    def test_flush_outstanding_tokens_skips_while_another_flush_runs(self):
+        '''
+        Ensure a flush that starts while another is running does nothing.
+        '''
+        print('Testing flush_outstanding_tokens skips while another flush runs')
+        cache.add(FLUSH_LOCK_KEY, 1)
+        self.assertIsNone(flush_outstanding_tokens())
+        self.assertEqual(OutstandingToken.objects.count(), 6)
+        print('Done.....')
@@ -0,0 +1,146 @@
+import time
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+
+
+BLACKLIST_KEY = 'tokens:blacklist:{jti}'
+DATABASE_BLACKLIST_DRAINED_KEY = 'tokens:blacklist:database:drained'
+FLUSH_LOCK_KEY = 'tokens:flush:lock'
+
+# One batch of expired outstanding tokens, their blacklist rows deleted in the same statement. Rows locked by
+# a login or logout in progress are skipped, they go in a later batch or run. The token_blacklist foreign key
+# is deferred so deleting both tables in one statement doesn't trip it.
+DELETE_EXPIRED_TOKENS_SQL = '''
+    WITH batch AS (
+        SELECT id FROM {outstanding} WHERE expires_at <= %s ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+    ), deleted_blacklisted AS (
+        DELETE FROM {blacklisted} WHERE token_id IN (SELECT id FROM batch) RETURNING 1
+    ), deleted_outstanding AS (
+        DELETE FROM {outstanding} WHERE id IN (SELECT id FROM batch) RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM deleted_outstanding), (SELECT COUNT(*) FROM deleted_blacklisted)
+'''
+
+
+class DatabaseBlacklist:
+    '''
+    --Database token blacklist--
+    The token_blacklist app's tables: every refresh token handed out gets an OutstandingToken row and every
+    blacklisted one a BlacklistedToken row, until `flush_outstanding_tokens` deletes the expired ones.
+    '''
+
+    def outstand(self, token, user):
+        OutstandingToken.objects.create(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token['exp']),
+        )
+
+    def blacklist(self, token):
+        outstanding_token, created = OutstandingToken.objects.get_or_create(
+            jti=token[api_settings.JTI_CLAIM],
+            defaults={
+                'token': str(token),
+                'expires_at': datetime_from_epoch(token['exp']),
+            },
+        )
+        return BlacklistedToken.objects.get_or_create(token=outstanding_token)
+
+    def is_blacklisted(self, jti):
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+class CacheBlacklist:
+    '''
+    --Cache token blacklist--
+    Blacklisted JTIs are keys of the TOKEN_BLACKLIST_CACHE cache (Redis in production) that expire with their
+    token, so checks are a single GET and nothing has to be swept. Nothing reads the outstanding token list,
+    so it isn't kept. The cache must raise its errors rather than ignore them, a cache that answers misses
+    while it is down would let blacklisted tokens through, and must not evict keys.
+    Tokens blacklisted by DatabaseBlacklist before the switch stay blacklisted: the BlacklistedToken rows are
+    checked too until none is left unexpired, at most REFRESH_TOKEN_LIFETIME after the switch.
+    '''
+
+    def __init__(self):
+        self.cache = caches[settings.TOKEN_BLACKLIST_CACHE]
+
+    def outstand(self, token, user):
+        pass
+
+    def blacklist(self, token):
+        timeout = token['exp'] - int(time.time())
+        if timeout > 0:  # expired tokens are rejected without the blacklist
+            self.cache.set(BLACKLIST_KEY.format(jti=token[api_settings.JTI_CLAIM]), 1, timeout=timeout)
+
+    def is_blacklisted(self, jti):
+        if self.cache.get(BLACKLIST_KEY.format(jti=jti)) is not None:
+            return True
+        return self.is_blacklisted_in_database(jti)
+
+    def is_blacklisted_in_database(self, jti):
+        '''
+        Checks the rows DatabaseBlacklist left behind. Nothing adds rows while CacheBlacklist is in use, so once
+        none is unexpired the check is skipped, one cache GET, for a refresh token lifetime.
+        '''
+        if self.cache.get(DATABASE_BLACKLIST_DRAINED_KEY) is not None:
+            return False
+        blacklisted = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        if not blacklisted.exists():
+            self.cache.set(
+                DATABASE_BLACKLIST_DRAINED_KEY, 1, timeout=int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+            )
+            return False
+        return blacklisted.filter(token__jti=jti).exists()
+
+
+def delete_expired_tokens(expired_at, batch_size):
+    '''
+    Deletes up to batch_size outstanding tokens that expired by expired_at, with their blacklisted token rows,
+    in one bounded statement instead of through Django's delete collector.
+    Returns the number of (outstanding, blacklisted) tokens deleted.
+    '''
+    sql = DELETE_EXPIRED_TOKENS_SQL.format(
+        outstanding=connection.ops.quote_name(OutstandingToken._meta.db_table),
+        blacklisted=connection.ops.quote_name(BlacklistedToken._meta.db_table),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [expired_at, batch_size])
+        return cursor.fetchone()
+
+
+def get_blacklist():
+    return import_string(settings.TOKEN_BLACKLIST_BACKEND)()
+
+
+class RefreshToken(BaseRefreshToken):
+    '''
+    --Refresh token--
+    simplejwt's RefreshToken with its outstanding token list and blacklist kept by the TOKEN_BLACKLIST_BACKEND
+    (DatabaseBlacklist or CacheBlacklist) instead of always the token_blacklist app's tables.
+    '''
+
+    def check_blacklist(self):
+        if get_blacklist().is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        return get_blacklist().blacklist(self)
+
+    @classmethod
+    def for_user(cls, user):
+        token = super(BlacklistMixin, cls).for_user(user)  # skips BlacklistMixin's OutstandingToken insert
+        get_blacklist().outstand(token, user)
+        return token
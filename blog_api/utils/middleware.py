@@ -0,0 +1,131 @@
+import hashlib
+import logging
+logger = logging.getLogger(__name__)
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+IN_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+WHITESPACE = re.compile(r'\s+')
+
+
+def get_sql_fingerprint(sql):
+    '''
+    The shape of a query, its SQL with IN (%s, %s, ...) lists of any length collapsed and whitespace normalized.
+    Params are kept apart from the SQL, so queries that only differ in their values share a fingerprint.
+    '''
+    return WHITESPACE.sub(' ', IN_LIST.sub('%s, ...', sql)).strip()
+
+
+def get_fingerprint_id(fingerprint):
+    '''Short id of a fingerprint that is the same in every process, to group log lines by.'''
+    return hashlib.md5(fingerprint.encode()).hexdigest()[:12]
+
+
+class QueryProfile:
+    '''
+    --Query profile--
+    Database execute wrapper that counts and times the queries run through it, and how many times each query
+    shape and each exact query (shape and params) ran.
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.queries = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            fingerprint = get_sql_fingerprint(sql)
+            self.shapes[fingerprint] += 1
+            self.queries[(fingerprint, repr(params))] += 1
+
+    def get_summary(self, threshold):
+        '''
+        :returns: dict with the query count, the milliseconds spent in the database, the exact queries that ran
+                  more than once and the query shapes that ran threshold or more times, the N+1 suspects.
+        '''
+        duplicates = Counter()
+        for (fingerprint, params), count in self.queries.items():
+            if count > 1:
+                duplicates[fingerprint] += count - 1
+        return {
+            'queries': self.count,
+            'db_ms': round(self.duration * 1000, 2),
+            'duplicates': [
+                {'fingerprint': get_fingerprint_id(fingerprint), 'count': count}
+                for fingerprint, count in duplicates.most_common()
+            ],
+            'n_plus_one': [
+                {'fingerprint': get_fingerprint_id(fingerprint), 'count': count, 'sql': fingerprint[:200]}
+                for fingerprint, count in self.shapes.most_common() if count >= threshold
+            ],
+        }
+
+
+class QueryProfilingMiddleware:
+    '''
+    --SQL profiling middleware--
+    ==========================================================================================================
+    Opt in with SQL_PROFILING_SAMPLE_RATE, the fraction of requests profiled. At 0 Django drops the middleware.
+    1) Wraps every database connection of a sampled request with a QueryProfile.
+    2) Logs a summary of the request's view, status, query count, database time, duplicate queries and N+1
+       suspects (shapes that ran SQL_PROFILING_N_PLUS_ONE_THRESHOLD or more times) to this module's logger,
+       as a warning when there are suspects. The summary dict is on the record as `sql_profile`.
+    3) When DEBUG is on adds the database time and query count, and any N+1 suspects, to the response's
+       Server-Timing header so they show in the browser's dev tools.
+    ==========================================================================================================
+    '''
+
+    def __init__(self, get_response):
+        if not settings.SQL_PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SQL_PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():  # 1
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        summary = profile.get_summary(settings.SQL_PROFILING_N_PLUS_ONE_THRESHOLD)
+        summary['view'] = request.resolver_match.view_name if request.resolver_match else request.path_info
+        summary['method'] = request.method
+        summary['status'] = response.status_code
+        summary['total_ms'] = round(duration * 1000, 2)
+        suspects = ' '.join(f'{suspect["fingerprint"]}x{suspect["count"]}' for suspect in summary['n_plus_one'])
+        logger.log(  # 2
+            logging.WARNING if suspects else logging.INFO,
+            f'[SQL] {summary["method"]} {summary["view"]} {summary["status"]}: {summary["queries"]} queries in '
+            f'{summary["db_ms"]}ms of {summary["total_ms"]}ms, {len(summary["duplicates"])} duplicated'
+            + (f', N+1 suspects {suspects}' if suspects else ''),
+            extra={'sql_profile': summary},
+        )
+
+        if settings.DEBUG:  # 3
+            timings = [f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"']
+            if suspects:
+                timings.append(f'n-plus-one;desc="{suspects}"')
+            if response.has_header('Server-Timing'):
+                timings.insert(0, response['Server-Timing'])
+            response['Server-Timing'] = ', '.join(timings)
+        return response
@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def capture_on_commit_callbacks(using=DEFAULT_DB_ALIAS, execute=False):
+    '''
+    --Capture on commit callbacks--
+    TestCase wraps every test in a transaction that never commits, so transaction.on_commit callbacks never run.
+    Captures the callbacks registered inside the block and runs them on exit when execute is True, like
+    TestCase.captureOnCommitCallbacks does from Django 3.2 on.
+    '''
+    callbacks = []
+    start_count = len(connections[using].run_on_commit)
+    try:
+        yield callbacks
+    finally:
+        callbacks[:] = [entry[1] for entry in connections[using].run_on_commit[start_count:]]
+        if execute:
+            for callback in callbacks:
+                callback()
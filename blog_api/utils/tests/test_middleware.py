@@ -0,0 +1,83 @@
+from rest_framework.status import HTTP_200_OK
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog_api.users.models import User
+from blog_api.posts.models import Post
+from blog_api.utils.middleware import QueryProfilingMiddleware, get_sql_fingerprint
+
+
+@override_settings(SQL_PROFILING_SAMPLE_RATE=1, SQL_PROFILING_N_PLUS_ONE_THRESHOLD=3)
+class QueryProfilingMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+        self.post = Post.objects.create(
+            author=self.user,
+            title='A really cool title for some really cool blog post by a really cool developer.',
+            content='Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed facilisis nunc id orci hendrerit, id tempor lorem tincidunt. Praesent id fermentum orci. Proin malesuada est sed nisl aliquam, ac congue nibh sagittis.',
+        )
+
+    @override_settings(DEBUG=True)
+    def test_query_profiling_middleware_adds_server_timing_in_debug(self):
+        '''
+        Ensure profiled requests log their queries and, in debug, report the database time and query count as Server-Timing.
+        '''
+        print('Testing QueryProfilingMiddleware adds Server-Timing in debug')
+        with self.assertLogs('blog_api.utils.middleware', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('posts'))
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn(f'desc="{len(queries)} queries"', response['Server-Timing'])
+
+        summary = logs.records[0].sql_profile
+        self.assertEqual((summary['view'], summary['status'], summary['queries']), ('posts', 200, len(queries)))
+        print('Done.....')
+
+    def test_query_profiling_middleware_flags_n_plus_one_suspects(self):
+        '''
+        Ensure a query shape run SQL_PROFILING_N_PLUS_ONE_THRESHOLD times is logged as an N+1 suspect, without headers outside debug.
+        '''
+        print('Testing QueryProfilingMiddleware flags N+1 suspects')
+
+        def view(request):
+            for pk in (1, 2, 3, 3):
+                User.objects.filter(pk=pk).exists()
+            return HttpResponse()
+
+        request = APIRequestFactory().get('/some/path/')
+        with self.assertLogs('blog_api.utils.middleware', 'WARNING') as logs:
+            response = QueryProfilingMiddleware(view)(request)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+        summary = logs.records[0].sql_profile
+        self.assertEqual((summary['view'], summary['queries']), ('/some/path/', 4))
+        self.assertEqual(len(summary['n_plus_one']), 1)
+        self.assertEqual(summary['n_plus_one'][0]['count'], 4)
+        self.assertIn('users_user', summary['n_plus_one'][0]['sql'])
+        self.assertEqual(summary['duplicates'], [{'fingerprint': summary['n_plus_one'][0]['fingerprint'], 'count': 1}])
+        print('Done.....')
+
+    def test_query_profiling_middleware_is_opt_in(self):
+        '''
+        Ensure the middleware is dropped unless SQL_PROFILING_SAMPLE_RATE is set, and fingerprints ignore IN list lengths.
+        '''
+        print('Testing QueryProfilingMiddleware is opt in')
+        with override_settings(SQL_PROFILING_SAMPLE_RATE=0):
+            with self.assertRaises(MiddlewareNotUsed):
+                QueryProfilingMiddleware(lambda request: HttpResponse())
+
+        self.assertEqual(
+            get_sql_fingerprint('SELECT id FROM t WHERE id IN (%s, %s)\n  AND a = %s'),
+            get_sql_fingerprint('SELECT id FROM t WHERE id IN (%s, %s, %s) AND a = %s'),
+        )
+        print('Done.....')
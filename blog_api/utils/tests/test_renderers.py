@@ -0,0 +1,81 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.status import HTTP_200_OK
+from rest_framework.test import APITestCase
+
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from blog_api.users.models import User
+from blog_api.posts.models import Tag, Post
+from blog_api.utils.renderers import FastJSONRenderer
+
+
+class RendererTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='someuser00', email='someemail@email.com', password='Testing4321@', is_active=True
+        )
+        self.post = Post.objects.create(
+            author=self.user,
+            title='A really cool title for some really cool blog post by a really cool developer, café.',
+            content='Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed facilisis nunc id orci hendrerit, id tempor lorem tincidunt. Praesent id fermentum orci. Proin malesuada est sed nisl aliquam, ac congue nibh sagittis. Vestibulum sed ipsum vulputate, sodales neque auctor, mollis odio. Nullam sit amet mattis ante. Aenean mi sapien, aliquet eget sapien ac, finibus accumsan erat.',
+        )
+        self.post.tags.set([Tag.objects.create(name='tag1'), Tag.objects.create(name='tag2')])
+
+    def test_fast_json_renderer_renders_responses_like_json_renderer(self):
+        '''
+        Ensure responses are rendered by FastJSONRenderer with the same bytes JSONRenderer would render.
+        '''
+        print('Testing FastJSONRenderer renders responses like JSONRenderer')
+        response = self.client.get(reverse('posts'))
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(response.json()['results'][0]['title'], self.post.title)
+        print('Done.....')
+
+    def test_fast_json_renderer_renders_other_types_like_json_renderer(self):
+        '''
+        Ensure datetimes, UUIDs, lazy strings, decimals, line separators and data orjson refuses render like JSONRenderer.
+        '''
+        print('Testing FastJSONRenderer renders other types like JSONRenderer')
+        data = {
+            'created_at': timezone.now().replace(microsecond=123456),
+            'date': datetime.date(2021, 8, 1),
+            'duration': datetime.timedelta(minutes=5),
+            'pub_id': uuid.uuid4(),
+            'message': gettext_lazy('Invalid token.'),
+            'score': Decimal('1.50'),
+            'content': 'line separators \u2028 \u2029',
+            'tags': Tag.objects.values_list('name', flat=True),
+            'nested': [{'count': 1, 'ratio': 0.5, 'none': None, 'flag': True}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'), JSONRenderer().render(data, 'application/json; indent=4')
+        )
+        for data in ({1: 'non string key'}, {'big': 2 ** 70}, None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        print('Done.....')
+
+    def test_fast_json_renderer_renders_floats_like_json_renderer(self):
+        '''
+        Ensure small and large floats render like JSONRenderer, and NaN and infinity render as null where JSONRenderer raises.
+        '''
+        print('Testing FastJSONRenderer renders floats like JSONRenderer')
+        for value in (1e-7, -2.6e-05, 1e-05, 0.0001, 5e-324, 0.5, 1e16, 1.5e300, -0.0):
+            data = {'value': value, 'title': 'e-mail 0.0000'}
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render({'value': 1e-7}), b'{"value":1e-07}')
+
+        for value in (float('nan'), float('inf'), float('-inf')):
+            self.assertEqual(FastJSONRenderer().render({'value': value}), b'{"value":null}')
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'value': value})
+        print('Done.....')
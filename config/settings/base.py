@@ -127,6 +127,7 @@ AUTH_PASSWORD_VALIDATORS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "blog_api.utils.middleware.QueryProfilingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -136,6 +137,11 @@ MIDDLEWARE = [
     "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+# blog_api.utils.middleware.QueryProfilingMiddleware logs the SQL of SQL_PROFILING_SAMPLE_RATE (0 to 1) of the
+# requests, off by default, flagging query shapes run SQL_PROFILING_N_PLUS_ONE_THRESHOLD or more times in a request
+# as N+1 suspects.
+SQL_PROFILING_SAMPLE_RATE = env.float("SQL_PROFILING_SAMPLE_RATE", default=0)
+SQL_PROFILING_N_PLUS_ONE_THRESHOLD = env.int("SQL_PROFILING_N_PLUS_ONE_THRESHOLD", default=5)
 
 # STATIC
 # ------------------------------------------------------------------------------
@@ -221,6 +227,18 @@ EMAIL_BACKEND = env(
 )
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-timeout
 EMAIL_TIMEOUT = 5
+# Verification and password reset emails are sent by the users send_emails Celery task, see
+# blog_api/users/emails.py. Emails queued in one transaction are sent together, EMAIL_BATCH_SIZE per task.
+EMAIL_BATCH_SIZE = env.int("EMAIL_BATCH_SIZE", default=50)
+# Emails a recipient domain (gmail.com, ...) may be sent every EMAIL_DOMAIN_RATE_WINDOW seconds, the rest
+# wait for the next window.
+EMAIL_DOMAIN_RATE_LIMIT = env.int("EMAIL_DOMAIN_RATE_LIMIT", default=100)
+EMAIL_DOMAIN_RATE_WINDOW = env.int("EMAIL_DOMAIN_RATE_WINDOW", default=60)
+# Failed sends are retried EMAIL_MAX_RETRIES times, backing off exponentially from EMAIL_RETRY_BACKOFF
+# seconds up to EMAIL_RETRY_BACKOFF_MAX.
+EMAIL_MAX_RETRIES = env.int("EMAIL_MAX_RETRIES", default=5)
+EMAIL_RETRY_BACKOFF = 10
+EMAIL_RETRY_BACKOFF_MAX = 10 * 60
 
 # ADMIN
 # ------------------------------------------------------------------------------
@@ -255,6 +273,25 @@ LOGGING = {
     "root": {"level": "INFO", "handlers": ["console"]},
 }
 
+# POSTS
+# ------------------------------------------------------------------------------
+# Seconds a serialized post detail stays cached, writes invalidate it right away.
+POST_DETAIL_CACHE_TIMEOUT = env.int("POST_DETAIL_CACHE_TIMEOUT", default=60 * 5)
+# Number of posts kept in each precomputed ranking (featured, most liked...) and how long a ranking lives
+# without being refreshed by the refresh_post_rankings task.
+POST_RANKING_SIZE = env.int("POST_RANKING_SIZE", default=1000)
+POST_RANKING_TIMEOUT = env.int("POST_RANKING_TIMEOUT", default=60 * 15)
+# Keeps the rankings, see blog_api/posts/rankings.py. CacheRankings stores each ranking as a list in the default
+# cache, RedisRankings as a sorted set on the POST_RANKING_CACHE django-redis cache's server.
+POST_RANKING_BACKEND = env("POST_RANKING_BACKEND", default="blog_api.posts.rankings.CacheRankings")
+POST_RANKING_CACHE = "default"
+# Minimum trigram word similarity (0 to 1) between a fuzzy search and a post title, e.g. 'devloper' is 0.58
+# similar to 'developer' and 'devoleper' 0.33.
+POST_SEARCH_FUZZY_THRESHOLD = env.float("POST_SEARCH_FUZZY_THRESHOLD", default=0.3)
+# Seconds browsers and the edge may reuse a public post or tag list (Cache-Control max-age) before
+# revalidating it with its ETag.
+POST_CACHE_MAX_AGE = env.int("POST_CACHE_MAX_AGE", default=10)
+
 # Celery
 # ------------------------------------------------------------------------------
 if USE_TZ:
@@ -283,8 +320,20 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_BEAT_SCHEDULE = {
     "flush_outstanding_tokens": {
         "task": "blog_api.users.tasks.flush_outstanding_tokens",
-        "schedule": crontab(hour="23"),
-    },  # make sure this works.
+        "schedule": crontab(minute="30"),
+    },
+    "purge_expired_codes": {
+        "task": "blog_api.users.tasks.purge_expired_codes",
+        "schedule": crontab(minute="45"),
+    },
+    "refresh_post_rankings": {
+        "task": "blog_api.posts.tasks.refresh_post_rankings",
+        "schedule": crontab(minute="*/5"),
+    },
+    "refresh_tag_post_counts": {
+        "task": "blog_api.posts.tasks.refresh_tag_post_counts",
+        "schedule": crontab(minute="0"),
+    },
 }
 
 
@@ -309,11 +358,15 @@ SOCIALACCOUNT_ADAPTER = "blog_api.users.adapters.SocialAccountAdapter"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "blog_api.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "blog_api.utils.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_THROTTLE_CLASSES': [
@@ -323,6 +376,7 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'user': '2000/day',
         'anon': '500/day',
+        'post_import': env("POST_IMPORT_THROTTLE_RATE", default="60/hour"),
     }
 }
 
@@ -366,5 +420,29 @@ SIMPLE_JWT = {
 # choose wether to login with email or username
 SIMPLE_JWT_LOGIN_USERNAME_FIELD = 'email'
 
+# Keeps the refresh token blacklist, see blog_api/users/tokens.py. DatabaseBlacklist writes the token_blacklist
+# app's OutstandingToken/BlacklistedToken rows, CacheBlacklist keeps blacklisted JTIs in the
+# TOKEN_BLACKLIST_CACHE cache until their token expires.
+TOKEN_BLACKLIST_BACKEND = env("TOKEN_BLACKLIST_BACKEND", default="blog_api.users.tokens.DatabaseBlacklist")
+TOKEN_BLACKLIST_CACHE = "default"
+# blog_api.users.tasks.flush_outstanding_tokens deletes expired tokens TOKEN_FLUSH_BATCH_SIZE at a time and
+# queues another run after TOKEN_FLUSH_TIME_BUDGET seconds, well inside CELERY_TASK_SOFT_TIME_LIMIT.
+TOKEN_FLUSH_BATCH_SIZE = env.int("TOKEN_FLUSH_BATCH_SIZE", default=1000)
+TOKEN_FLUSH_TIME_BUDGET = CELERY_TASK_SOFT_TIME_LIMIT * 3 // 4
+# blog_api.users.tasks.purge_expired_codes deletes verification and password reset codes once they have been
+# expired, or used, for CODE_RETENTION, CODE_CLEANUP_BATCH_SIZE at a time, and queues another run after
+# CODE_CLEANUP_TIME_BUDGET seconds.
+CODE_RETENTION = timedelta(days=env.int("CODE_RETENTION_DAYS", default=7))
+CODE_CLEANUP_BATCH_SIZE = env.int("CODE_CLEANUP_BATCH_SIZE", default=1000)
+CODE_CLEANUP_TIME_BUDGET = CELERY_TASK_SOFT_TIME_LIMIT * 3 // 4
+
+# blog_api.users.authentication.CachedJWTAuthentication keeps the id, pub_id, username, is_active and
+# is_staff of authenticated users in the cache for AUTH_USER_CACHE_TIMEOUT seconds and in each process for
+# AUTH_USER_LOCAL_CACHE_TIMEOUT seconds. Saves drop the cached state right away, other processes may keep
+# theirs until it times out.
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", default=60)
+AUTH_USER_LOCAL_CACHE_TIMEOUT = env.int("AUTH_USER_LOCAL_CACHE_TIMEOUT", default=5)
+AUTH_USER_LOCAL_CACHE_SIZE = env.int("AUTH_USER_LOCAL_CACHE_SIZE", default=1024)
+
 # url for the frontend app that consumes this api
 FRONTEND_URL = env("FRONTEND_URL", default="https://www.my-react-frontend.com/")
@@ -49,6 +49,11 @@ if env("USE_DOCKER") == "yes":
     hostname, _, ips = socket.gethostbyname_ex(socket.gethostname())
     INTERNAL_IPS += [".".join(ip.split(".")[:-1] + ["1"]) for ip in ips]
 
+# SQL profiling
+# ------------------------------------------------------------------------------
+# Profile every request, DEBUG adds the results to the Server-Timing header.
+SQL_PROFILING_SAMPLE_RATE = env.float("SQL_PROFILING_SAMPLE_RATE", default=1)
+
 # django-extensions
 # ------------------------------------------------------------------------------
 # https://django-extensions.readthedocs.io/en/latest/installation_instructions.html#configuration
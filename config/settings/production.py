@@ -26,8 +26,21 @@ CACHES = {
             # https://github.com/jazzband/django-redis#memcached-exceptions-behavior
             "IGNORE_EXCEPTIONS": True,
         },
-    }
+    },
+    # the token blacklist must not treat a Redis outage as an empty blacklist, and lives on its own Redis
+    # server with maxmemory-policy noeviction (redis-tokens in production.yml) so neither an eviction nor a
+    # clear of the default cache un-revokes tokens
+    "tokens": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": env("TOKEN_BLACKLIST_REDIS_URL", default="redis://redis-tokens:6379/0"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+    },
 }
+TOKEN_BLACKLIST_BACKEND = env("TOKEN_BLACKLIST_BACKEND", default="blog_api.users.tokens.CacheBlacklist")
+TOKEN_BLACKLIST_CACHE = "tokens"
+POST_RANKING_BACKEND = env("POST_RANKING_BACKEND", default="blog_api.posts.rankings.RedisRankings")
 
 # SECURITY
 # ------------------------------------------------------------------------------